@@ -1,87 +1,284 @@
 # src/assistant_analyzer/assistant.py
 
-import chromadb
-from chromadb.utils import embedding_functions
-from pydantic_ai import Agent, RunContext
-from pydantic_ai.models.openai import OpenAIModel
-from pydantic_ai.providers.openai import OpenAIProvider
-from prefect.blocks.system import Secret
-import logfire
-
-# configure logfire
-logfire_secret_block = Secret.load("logfire-write-token")
-logfire.configure(token=logfire_secret_block.get())
-logfire.instrument_openai()
-
-# Initialize OpenAI API key.
-secret_block = Secret.load("openai-api-key")
-openai_api_key = secret_block.get()
-
-# Set up the embedding function
-openai_ef = embedding_functions.OpenAIEmbeddingFunction(
-    api_key=openai_api_key, model_name="text-embedding-3-small"
-)
-
-# Create a persistent client and get the collection
-client = chromadb.PersistentClient(path="./data")
-collection = client.get_collection(
-    name="coding_assistant_document_dump", embedding_function=openai_ef
-)
-
-# --- Create the PydanticAI agent ---
-model = OpenAIModel("gpt-4o", provider=OpenAIProvider(api_key=openai_api_key))
-
-agent = Agent(
-    model,
-    result_type=str,
-    system_prompt=(
-        "You are an assistant that can chat with a vector store. "
-        "When a user asks a question, use the 'query_vector_store' tool to retrieve relevant documents."
-    ),
-)
-
-
-# Define a tool that queries the vector store.
-@agent.tool
-async def query_vector_store(ctx: RunContext, query: str) -> str:
-    """
-    Query the vector store for documents related to the user's question.
-
-    Args:
-        query: The user input to search against the vector store.
-
-    Returns:
-        A formatted string with the retrieved documents.
-    """
-    result = collection.query(
-        query_texts=[query],
-        n_results=3,
-        include=["documents", "metadatas"],
+import threading
+from typing import Literal, Optional
+from src.embeddings.factory import query_embedding_function
+from src.loaders.models.models import CodeAssistantCompany
+from src.utils.secrets import get_secret
+from src.vector_store.routing import fetch_document, query_store, stored_collections
+
+# Everything heavy (Secret blocks, logfire, the embedding function, the Chroma
+# client, pydantic_ai and the agent) is created on first use rather than at import,
+# so importing this module is cheap and doesn't need a Prefect server.
+_agent = None
+_tiered_index = None
+_quantized_index = None
+_query_cache = None
+_query_embedder = None
+_query_embedding_function = None
+_init_lock = threading.Lock()
+_query_embedder_lock = threading.Lock()
+
+
+def configure_logfire():
+    """
+    Configures logfire to trace the agent's OpenAI calls.
+    """
+    import logfire
+
+    logfire.configure(token=get_secret("logfire-write-token"))
+    logfire.instrument_openai()
+
+
+def get_query_embedding_function():
+    """
+    Returns the embedding function of the backend and dimension the stored
+    documents were embedded with, which may differ from EMBEDDING_BACKEND and
+    EMBEDDING_DIM. With QUERY_BATCHING
+    set, it is wrapped in a QueryEmbedder that caches query vectors in memory and
+    batches concurrent queries.
+
+    It is resolved from the stored collections on first use and then reused, so
+    queries don't look the collections up again. A running assistant picks up a
+    dimension migration (src/vector_store/dimensions.py) when it is restarted.
+    """
+    global _query_embedder, _query_embedding_function
+    from src.embeddings.query_embedder import QUERY_BATCHING_ENABLED, QueryEmbedder
+
+    with _query_embedder_lock:
+        if _query_embedding_function is None:
+            embedding_function = query_embedding_function(stored_collections())
+            if QUERY_BATCHING_ENABLED:
+                _query_embedder = QueryEmbedder(embedding_function)
+                embedding_function = _query_embedder
+            _query_embedding_function = embedding_function
+        return _query_embedding_function
+
+
+def get_tiered_index():
+    """
+    Returns the in-memory hot tier kept in front of the store, or None if it is
+    disabled. It is loaded on first use.
+    """
+    global _tiered_index
+    from src.vector_store.tiered import HOT_TIER_ENABLED, TieredIndex
+
+    if not HOT_TIER_ENABLED:
+        return None
+    with _init_lock:
+        if _tiered_index is None:
+            _tiered_index = TieredIndex(get_query_embedding_function())
+        return _tiered_index
+
+
+def get_quantized_index():
+    """
+    Returns the quantized sidecar index searched instead of Chroma's HNSW index,
+    or None if QUANTIZED_INDEX is not set. It is loaded on first use.
+    """
+    global _quantized_index
+    from src.vector_store.quantized import QUANTIZED_INDEX, QuantizedIndex
+
+    if not QUANTIZED_INDEX:
+        return None
+    with _init_lock:
+        if _quantized_index is None:
+            _quantized_index = QuantizedIndex(get_query_embedding_function())
+        return _quantized_index
+
+
+def get_query_cache():
+    """
+    Returns the query result cache, or None if QUERY_CACHE is not set.
+    """
+    global _query_cache
+    from src.vector_store.query_cache import QUERY_CACHE_ENABLED, QueryCache
+
+    if not QUERY_CACHE_ENABLED:
+        return None
+    with _init_lock:
+        if _query_cache is None:
+            _query_cache = QueryCache()
+        return _query_cache
+
+
+def query_documents(
+    query: str,
+    n_results: int = 3,
+    companies: list[str] | None = None,
+    doc_types: list[str] | None = None,
+) -> list[dict]:
+    """
+    Returns the documents closest to a query, from the query result cache if it
+    is enabled and holds them.
+    """
+    query_cache = get_query_cache()
+    if query_cache is None:
+        return search_documents(query, n_results, companies, doc_types)
+    return query_cache.get_or_compute(
+        query,
+        n_results,
+        companies,
+        doc_types,
+        lambda: search_documents(query, n_results, companies, doc_types),
+    )
+
+
+def search_documents(
+    query: str,
+    n_results: int = 3,
+    companies: list[str] | None = None,
+    doc_types: list[str] | None = None,
+) -> list[dict]:
+    """
+    Searches the documents closest to a query, in the hot tier or the quantized
+    index if one is enabled.
+    """
+    tiered_index = get_tiered_index()
+    if tiered_index is not None:
+        return tiered_index.query(
+            query, n_results=n_results, companies=companies, doc_types=doc_types
+        )
+    quantized_index = get_quantized_index()
+    if quantized_index is not None:
+        return quantized_index.query(
+            query, n_results=n_results, companies=companies, doc_types=doc_types
+        )
+    return query_store(
+        query,
+        n_results=n_results,
+        companies=companies,
+        doc_types=doc_types,
+        embedding_function=get_query_embedding_function(),
     )
-    # Build a response that summarizes the results
+
+
+def format_hits(hits: list[dict]) -> str:
+    """
+    Formats retrieved documents for the agent. Documents with a digest (see
+    src/corpus/digests.py) are shown as their digest and id, so the prompt stays
+    small; the agent asks for a full document with the get_document tool. Documents
+    without one are shown in full.
+    """
     response = "Here are some relevant documents from the vector store:\n"
-    for i, doc in enumerate(result["documents"], start=1):
-        response += f"\nDocument {i}:\n{doc}\n------------"
+    for i, hit in enumerate(hits, start=1):
+        digest = (hit["metadata"] or {}).get("digest")
+        if digest:
+            response += f"\nDocument {i} (id: {hit['id']}, digest):\n{digest}\n------------"
+        else:
+            response += f"\nDocument {i} (id: {hit['id']}):\n{hit['document']}\n------------"
     return response
 
 
+def get_agent():
+    """
+    Returns the PydanticAI agent, creating it and its vector store tool on first use.
+    """
+    global _agent
+    with _init_lock:
+        if _agent is not None:
+            return _agent
+
+        from pydantic_ai import Agent, RunContext
+        from pydantic_ai.models.openai import OpenAIModel
+        from pydantic_ai.providers.openai import OpenAIProvider
+
+        configure_logfire()
+
+        # --- Create the PydanticAI agent ---
+        model = OpenAIModel(
+            "gpt-4o", provider=OpenAIProvider(api_key=get_secret("openai-api-key"))
+        )
+
+        agent = Agent(
+            model,
+            result_type=str,
+            system_prompt=(
+                "You are an assistant that can chat with a vector store. "
+                "When a user asks a question, use the 'query_vector_store' tool to retrieve relevant documents. "
+                "Documents marked 'digest' are summaries; when a digest doesn't hold the details "
+                "needed to answer, use the 'get_document' tool with the document's id to read it in full."
+            ),
+        )
+
+        # Define a tool that queries the vector store.
+        @agent.tool
+        async def query_vector_store(
+            ctx: RunContext,
+            query: str,
+            company: Optional[CodeAssistantCompany] = None,
+            doc_type: Optional[Literal["changelog", "blog_post", "docs_page"]] = None,
+        ) -> str:
+            """
+            Query the vector store for documents related to the user's question.
+
+            Args:
+                query: The user input to search against the vector store.
+                company: Only search documents from this company, if the question is about one.
+                doc_type: Only search this kind of document, e.g. 'changelog' for version questions.
+
+            Returns:
+                A formatted string with the retrieved documents.
+            """
+            hits = query_documents(
+                query,
+                n_results=3,
+                companies=[company.value] if company else None,
+                doc_types=[doc_type] if doc_type else None,
+            )
+            # Build a response that summarizes the results
+            return format_hits(hits)
+
+        @agent.tool
+        async def get_document(ctx: RunContext, document_id: str) -> str:
+            """
+            Return the full text of a document from the vector store.
+
+            Args:
+                document_id: The id of a document returned by 'query_vector_store'.
+
+            Returns:
+                The document's full text.
+            """
+            hit = fetch_document(document_id)
+            if hit is None:
+                return f"No document with id {document_id}."
+            return hit["document"]
+
+        _agent = agent
+        return _agent
+
+
 def run_query(query: str):
     """
     Run a query by the agent.
     """
+    collections = stored_collections()
+    example = None
+    for collection in collections:
+        metadatas = collection.peek(limit=1)["metadatas"]
+        if metadatas:
+            example = metadatas[0]
+            break
 
     # Print some basic info from your vector store
     print(
         "Vector store info:\n\n"
-        f"Example metadata: {collection.peek()['metadatas'][0]}\n"
-        f"Document count: {collection.count()}"
+        f"Collections: {len(collections)}\n"
+        f"Example metadata: {example}\n"
+        f"Document count: {sum(collection.count() for collection in collections)}"
         "\n\n"
         "-------------------"
     )
 
     # Run the agent with the query
-    result = agent.run_sync(query)
+    result = get_agent().run_sync(query)
     print(f"Agent response:\n\n{result.data}\n\n-------------------")
+    query_cache = get_query_cache()
+    if query_cache is not None:
+        print("Query cache:", query_cache.stats())
+    if _query_embedder is not None:
+        print("Query embeddings:", _query_embedder.stats())
 
 
 # --- Run the agent with a sample query ---
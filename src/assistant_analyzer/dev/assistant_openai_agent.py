@@ -1,28 +1,17 @@
 # src/assistant_analyzer/dev/assistant_openai_agent.py
 
-import chromadb
-from chromadb.utils import embedding_functions
-from prefect.blocks.system import Secret
 from typing import Any
 import asyncio
 
 # Import the OpenAI Agents SDK
 from agents import Agent, Runner, function_tool, RunContextWrapper
 
-# Initialize OpenAI API key using secret block
-secret_block = Secret.load("openai-api-key")
-openai_api_key = secret_block.get()
+from src.embeddings.factory import embedding_function_for
+from src.vector_store.store import get_collection
 
-# Set up the embedding function with the API key directly
-openai_ef = embedding_functions.OpenAIEmbeddingFunction(
-    api_key=openai_api_key, model_name="text-embedding-3-small"
-)
-
-# Create a persistent client and get the collection
-client = chromadb.PersistentClient(path="./data")
-collection = client.get_collection(
-    name="coding_assistant_document_dump", embedding_function=openai_ef
-)
+# Get the collection with the embedding function of the backend it was built with
+collection = get_collection()
+collection = get_collection(embedding_function=embedding_function_for(collection))
 
 
 # --- Create the tool for querying the vector store ---
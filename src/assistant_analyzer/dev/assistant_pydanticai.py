@@ -1,13 +1,14 @@
 # src/assistant_analyzer/dev/assistant_pydanticai.py
 
-import chromadb
-from chromadb.utils import embedding_functions
 from pydantic_ai import Agent, RunContext
 from pydantic_ai.models.openai import OpenAIModel
 from pydantic_ai.providers.openai import OpenAIProvider
 from prefect.blocks.system import Secret
 import logfire
 
+from src.embeddings.factory import embedding_function_for
+from src.vector_store.store import get_collection
+
 # configure logfire
 logfire_secret_block = Secret.load("logfire-write-token")
 logfire.configure(token=logfire_secret_block.get())
@@ -17,16 +18,9 @@ logfire.instrument_openai()
 secret_block = Secret.load("openai-api-key")
 openai_api_key = secret_block.get()
 
-# Set up the embedding function
-openai_ef = embedding_functions.OpenAIEmbeddingFunction(
-    api_key=openai_api_key, model_name="text-embedding-3-small"
-)
-
-# Create a persistent client and get the collection
-client = chromadb.PersistentClient(path="./data")
-collection = client.get_collection(
-    name="coding_assistant_document_dump", embedding_function=openai_ef
-)
+# Get the collection with the embedding function of the backend it was built with
+collection = get_collection()
+collection = get_collection(embedding_function=embedding_function_for(collection))
 
 # --- Create the PydanticAI agent ---
 model = OpenAIModel("gpt-4o", provider=OpenAIProvider(api_key=openai_api_key))
@@ -1,20 +1,10 @@
-from prefect.blocks.system import Secret
-import chromadb
-from chromadb.utils import embedding_functions
+from src.embeddings.factory import embedding_function_for
+from src.vector_store.store import get_collection
 
-# Load your OpenAI API key from Prefect Secret
-openai_api_key = Secret.load("openai-api-key").get()
-
-# Initialize embedding function
-openai_ef = embedding_functions.OpenAIEmbeddingFunction(
-    api_key=openai_api_key, model_name="text-embedding-3-small"
-)
-
-# Connect to Chroma collection
-client = chromadb.PersistentClient(path="./data")
-collection = client.get_collection(
-    name="coding_assistant_document_dump", embedding_function=openai_ef
-)
+# Connect to Chroma collection, with the embedding function of the backend it was
+# built with
+collection = get_collection()
+collection = get_collection(embedding_function=embedding_function_for(collection))
 
 # How can we query the collection?
 
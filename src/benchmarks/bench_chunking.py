@@ -0,0 +1,40 @@
+# src/benchmarks/bench_chunking.py
+
+import argparse
+import time
+
+from src.corpus.chunking import chunk_record
+
+
+def synthetic_page(i: int, sections: int) -> str:
+    lines = []
+    for s in range(sections):
+        lines.append(f"Section {s} of page {i}")
+        for p in range(4):
+            lines.append(
+                " ".join(f"word{(i + s * 31 + p * 7 + w) % 5003}" for w in range(60)) + "."
+            )
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure chunking throughput.")
+    parser.add_argument("--pages", type=int, default=10_000)
+    parser.add_argument("--sections", type=int, default=8)
+    args = parser.parse_args()
+
+    pages = [synthetic_page(i, args.sections) for i in range(args.pages)]
+    start = time.perf_counter()
+    chunks = 0
+    for i, page in enumerate(pages):
+        for _ in chunk_record(f"page_{i}", page, {"doc_type": "docs_page"}):
+            chunks += 1
+    elapsed = time.perf_counter() - start
+    megabytes = sum(len(page) for page in pages) / 1e6
+    print(
+        f"Chunked {args.pages} pages ({megabytes:.1f} MB) into {chunks} chunks in "
+        f"{elapsed:.2f}s ({megabytes / elapsed:.1f} MB/s)"
+    )
+
+# to run
+# python -m src.benchmarks.bench_chunking --pages 10000
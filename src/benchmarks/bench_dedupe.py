@@ -0,0 +1,57 @@
+# src/benchmarks/bench_dedupe.py
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from src.corpus.dedupe import DedupeIndex
+
+
+def synthetic_doc(i: int, words: int = 300) -> str:
+    rng = random.Random(i)
+    return " ".join(f"word{rng.randrange(50_000)}" for _ in range(words))
+
+
+def near_copy(text: str, i: int, edits: int = 5) -> str:
+    """
+    Returns the text with a few words replaced, like a republished announcement or
+    a locale page that only differs in its navigation.
+    """
+    rng = random.Random(-i)
+    words = text.split()
+    for _ in range(edits):
+        words[rng.randrange(len(words))] = f"edit{rng.randrange(1000)}"
+    return " ".join(words)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Measure near-duplicate detection time as the corpus grows."
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 5_000, 20_000])
+    parser.add_argument("--duplicate-rate", type=float, default=0.2)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        originals = int(size * (1 - args.duplicate_rate))
+        docs = [(f"doc_{i}", synthetic_doc(i)) for i in range(originals)]
+        docs += [
+            (f"copy_{i}", near_copy(docs[i % originals][1], i))
+            for i in range(size - originals)
+        ]
+        with tempfile.TemporaryDirectory() as tmp:
+            index = DedupeIndex(os.path.join(tmp, "dedupe.sqlite3"))
+            start = time.perf_counter()
+            representatives, aliases = index.assign(docs)
+            elapsed = time.perf_counter() - start
+        found = sum(1 for alias in aliases if alias.startswith("copy_"))
+        print(
+            f"{size} docs: {len(representatives)} representatives, {len(aliases)} aliases "
+            f"({found}/{size - originals} planted copies found) in {elapsed:.2f}s "
+            f"({elapsed / size * 1e6:.0f} us/doc)"
+        )
+
+# to run
+# python -m src.benchmarks.bench_dedupe --sizes 1000 5000 20000
@@ -0,0 +1,90 @@
+# src/benchmarks/bench_digests.py
+
+import argparse
+import json
+import os
+import random
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from src.assistant_analyzer.assistant import format_hits
+from src.benchmarks.synthetic_corpus import synthetic_records
+from src.corpus.digests import DIGEST_WORKERS, SUMMARIZERS, get_summarizer
+from src.embeddings.tokens import count_tokens
+from src.refresh_pipeline.ingest import build_record
+
+
+def prompt_tokens(hits: list[dict], use_digests: bool) -> int:
+    """
+    Tokens of the query_vector_store tool response for the hits, with or without
+    digests, as formatted by assistant.format_hits.
+    """
+    if not use_digests:
+        hits = [{**hit, "metadata": {}} for hit in hits]
+    return count_tokens(format_hits(hits))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Measure digest throughput and the prompt tokens digests save."
+    )
+    parser.add_argument("--n", type=int, default=2_000)
+    parser.add_argument("--summarizer", choices=list(SUMMARIZERS), default="extractive")
+    parser.add_argument("--workers", type=int, default=DIGEST_WORKERS)
+    parser.add_argument("--queries", type=int, default=500, help="Simulated retrievals")
+    parser.add_argument("--n-results", type=int, default=3)
+    parser.add_argument("--report", default="./reports/digests_benchmark.json")
+    args = parser.parse_args()
+
+    records = [build_record(record) for record in synthetic_records(args.n)]
+    summarizer = get_summarizer(args.summarizer)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        digests = list(
+            executor.map(lambda record: summarizer(record[1], record[2]), records)
+        )
+    digest_s = time.perf_counter() - start
+
+    hits = [
+        {"id": id_, "document": document, "metadata": {**metadata, "digest": digest}}
+        for (id_, document, metadata), digest in zip(records, digests)
+    ]
+    rng = random.Random(0)
+    full, digested = [], []
+    for _ in range(args.queries):
+        sample = rng.sample(hits, args.n_results)
+        full.append(prompt_tokens(sample, use_digests=False))
+        digested.append(prompt_tokens(sample, use_digests=True))
+
+    result = {
+        "created_at": datetime.now().isoformat(),
+        "n": args.n,
+        "summarizer": args.summarizer,
+        "workers": args.workers,
+        "digest_s": round(digest_s, 2),
+        "digests_per_s": round(args.n / digest_s, 1),
+        "document_chars_mean": round(statistics.mean(len(d) for _, d, _ in records)),
+        "digest_chars_mean": round(statistics.mean(len(d) for d in digests)),
+        "n_results": args.n_results,
+        "prompt_tokens_full_mean": round(statistics.mean(full), 1),
+        "prompt_tokens_digest_mean": round(statistics.mean(digested), 1),
+        "prompt_token_reduction": round(1 - sum(digested) / sum(full), 3),
+    }
+    print(
+        f"Digested {args.n} documents with {args.summarizer} in {digest_s:.2f}s "
+        f"({result['digests_per_s']:.0f}/s). Tool response for {args.n_results} hits: "
+        f"{result['prompt_tokens_full_mean']:.0f} tokens in full, "
+        f"{result['prompt_tokens_digest_mean']:.0f} as digests "
+        f"({result['prompt_token_reduction']:.0%} fewer)."
+    )
+
+    os.makedirs(os.path.dirname(args.report), exist_ok=True)
+    with open(args.report, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"Wrote report to {args.report}")
+
+# to run
+# python -m src.benchmarks.bench_digests --n 2000 --summarizer extractive
@@ -0,0 +1,122 @@
+# src/benchmarks/bench_dimensions.py
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from datetime import datetime
+
+import chromadb
+import numpy as np
+
+from src.benchmarks.bench_hnsw import exact_neighbours, load_vectors, make_queries
+from src.benchmarks.bench_scale import dir_size_mb, percentile_ms
+from src.embeddings.dimensions import reduce_embeddings
+
+
+def synthetic_vectors(n: int, dim: int, decay: float) -> np.ndarray:
+    """
+    Returns random unit vectors whose variance falls off with the dimension index
+    like (1 + i) ** -decay. Matryoshka-trained embeddings such as text-embedding-3
+    put most of their information in the leading dimensions; plain isotropic random
+    vectors (decay=0) would make any truncation look far worse than it is.
+    """
+    rng = np.random.default_rng(0)
+    scale = (1 + np.arange(dim, dtype=np.float32)) ** -decay
+    vectors = rng.standard_normal((n, dim), dtype=np.float32) * scale
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def bench_dim(data_path: str, vectors, queries, truth, k: int, dim: int) -> dict:
+    """
+    Stores the vectors reduced to dim dimensions in a fresh collection, runs every
+    (equally reduced) query and returns recall@k against exact full-size search,
+    the size of the collection on disk, build time and query latencies.
+    """
+    client = chromadb.PersistentClient(path=data_path)
+    collection = client.create_collection(f"bench_dim_{dim}", embedding_function=None)
+    reduced = reduce_embeddings(vectors, dim)
+
+    start = time.perf_counter()
+    batch_size = client.get_max_batch_size()
+    for offset in range(0, len(reduced), batch_size):
+        chunk = reduced[offset : offset + batch_size]
+        collection.add(
+            ids=[str(i) for i in range(offset, offset + len(chunk))], embeddings=chunk
+        )
+    build_s = time.perf_counter() - start
+
+    latencies = []
+    hits = 0
+    for query, expected in zip(reduce_embeddings(queries, dim), truth):
+        start = time.perf_counter()
+        result = collection.query(query_embeddings=[query], n_results=k, include=[])
+        latencies.append(time.perf_counter() - start)
+        hits += len({int(i) for i in result["ids"][0]} & set(expected.tolist()))
+
+    return {
+        "dim": dim,
+        f"recall@{k}": round(hits / truth.size, 4),
+        "vectors_mb": round(reduced.nbytes / 1e6, 1),
+        "disk_mb": round(dir_size_mb(data_path), 1),
+        "build_s": round(build_s, 2),
+        "p50_ms": round(percentile_ms(latencies, 50), 2),
+        "p99_ms": round(percentile_ms(latencies, 99), 2),
+        "qps": round(len(latencies) / sum(latencies), 1),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare recall, index size and query latency across embedding dimensions."
+    )
+    parser.add_argument("--n", type=int, default=50_000)
+    parser.add_argument("--dim", type=int, default=1536, help="Full dimension of synthetic vectors")
+    parser.add_argument("--from-collection", help="Benchmark an existing collection's embeddings")
+    parser.add_argument("--decay", type=float, default=0.5, help="Variance decay of synthetic vectors")
+    parser.add_argument("--dims", type=int, nargs="+", default=[256, 512, 1024, 1536])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--report", default="./reports/dimensions_benchmark.json")
+    args = parser.parse_args()
+
+    if args.from_collection:
+        vectors = load_vectors(args)
+    else:
+        vectors = synthetic_vectors(args.n, args.dim, args.decay)
+    queries = make_queries(vectors, args.queries)
+    # Ground truth is exact search over the full-size vectors, so recall measures
+    # what reducing the dimension (plus HNSW) loses against the unreduced model.
+    truth = exact_neighbours(vectors, queries, args.k)
+
+    rows = []
+    for dim in sorted(d for d in args.dims if d <= vectors.shape[1]):
+        with tempfile.TemporaryDirectory() as data_path:
+            row = bench_dim(data_path, vectors, queries, truth, args.k, dim)
+        rows.append(row)
+        print(
+            f"dim={dim:<5} recall@{args.k}={row[f'recall@{args.k}']:.3f} "
+            f"vectors={row['vectors_mb']:.0f}MB disk={row['disk_mb']:.0f}MB "
+            f"p50={row['p50_ms']:.2f}ms p99={row['p99_ms']:.2f}ms build={row['build_s']:.1f}s"
+        )
+
+    os.makedirs(os.path.dirname(args.report), exist_ok=True)
+    with open(args.report, "w") as f:
+        json.dump(
+            {
+                "created_at": datetime.now().isoformat(),
+                "n": len(vectors),
+                "full_dim": vectors.shape[1],
+                "source": args.from_collection or f"synthetic (decay={args.decay})",
+                "k": args.k,
+                "queries": args.queries,
+                "results": rows,
+            },
+            f,
+            indent=2,
+        )
+    print(f"Wrote report to {args.report}")
+
+# to run
+# python -m src.benchmarks.bench_dimensions --n 100000 --dims 256 512 1024 1536
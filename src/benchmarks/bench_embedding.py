@@ -0,0 +1,49 @@
+# src/benchmarks/bench_embedding.py
+
+import argparse
+import time
+
+from chromadb.utils import embedding_functions
+
+from src.benchmarks.stub_embedding_server import start_stub_server
+from src.embeddings.batching import embed_in_batches
+
+
+def synthetic_documents(n: int, words: int) -> list[str]:
+    return [
+        f"Changelog entry {i}: " + " ".join(f"feature{(i * 7 + j) % 997}" for j in range(words))
+        for i in range(n)
+    ]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark batched, parallel embedding against the stub server."
+    )
+    parser.add_argument("--n", type=int, default=20_000)
+    parser.add_argument("--words", type=int, default=200)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    server = start_stub_server()
+    embedding_function = embedding_functions.OpenAIEmbeddingFunction(
+        api_key="stub",
+        api_base=f"http://localhost:{server.server_port}/v1",
+        model_name="text-embedding-3-small",
+    )
+    documents = synthetic_documents(args.n, args.words)
+
+    for workers in args.workers:
+        server.stats.update(requests=0, inputs=0, max_batch=0)
+        start = time.perf_counter()
+        embeddings = embed_in_batches(embedding_function, documents, max_workers=workers)
+        elapsed = time.perf_counter() - start
+        assert len(embeddings) == len(documents)
+        print(
+            f"workers={workers:<2} {elapsed:6.2f}s {len(documents) / elapsed:8.0f} docs/s "
+            f"requests={server.stats['requests']} max_batch={server.stats['max_batch']}"
+        )
+    server.shutdown()
+
+# to run
+# python -m src.benchmarks.bench_embedding --n 20000 --workers 1 4 8
@@ -0,0 +1,88 @@
+# src/benchmarks/bench_embedding_backends.py
+
+import argparse
+import json
+import os
+import time
+from datetime import datetime
+
+from chromadb.utils import embedding_functions
+
+from src.benchmarks.bench_embedding import synthetic_documents
+from src.benchmarks.stub_embedding_server import start_stub_server
+from src.embeddings.batching import embed_in_batches
+from src.embeddings.local import LOCAL_BATCH_SIZE, LOCAL_MODEL_PATH, LocalEmbeddingFunction
+
+
+def throughput(embed, documents: list[str]) -> dict:
+    start = time.perf_counter()
+    embeddings = embed(documents)
+    elapsed = time.perf_counter() - start
+    assert len(embeddings) == len(documents)
+    return {"seconds": round(elapsed, 2), "docs_per_s": round(len(documents) / elapsed, 1)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare the local CPU embedding backend with the remote one on a stub server."
+    )
+    parser.add_argument("--n", type=int, default=5_000)
+    parser.add_argument("--words", type=int, default=200)
+    parser.add_argument("--model-path", default=LOCAL_MODEL_PATH)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--batch-size", type=int, default=LOCAL_BATCH_SIZE)
+    parser.add_argument("--stub-latency", type=float, default=0.05, help="Seconds per stub request")
+    parser.add_argument("--report", default="./reports/embedding_backends.json")
+    args = parser.parse_args()
+
+    documents = synthetic_documents(args.n, args.words)
+    rows = []
+
+    # Remote: batched, parallel requests to an OpenAI-compatible stub with a
+    # simulated round trip, as in a refresh.
+    server = start_stub_server(base_latency=args.stub_latency)
+    remote = embedding_functions.OpenAIEmbeddingFunction(
+        api_key="stub",
+        api_base=f"http://localhost:{server.server_port}/v1",
+        model_name="text-embedding-3-small",
+    )
+    for workers in args.workers:
+        result = throughput(
+            lambda docs: embed_in_batches(remote, docs, max_workers=workers), documents
+        )
+        rows.append({"backend": "remote (stub)", "workers": workers, **result})
+    server.shutdown()
+
+    # Local: the model on this machine's CPU, with the inputs spread over workers.
+    if os.path.isdir(args.model_path):
+        for workers in args.workers:
+            local = LocalEmbeddingFunction(args.model_path, workers, args.batch_size)
+            local(documents[:8])  # load the model outside the timed run
+            rows.append({"backend": "local", "workers": workers, **throughput(local, documents)})
+    else:
+        print(f"No model at {args.model_path}; skipping the local backend (see --model-path).")
+
+    for row in rows:
+        print(
+            f"{row['backend']:<14} workers={row['workers']:<2} "
+            f"{row['seconds']:7.2f}s {row['docs_per_s']:8.1f} docs/s"
+        )
+
+    os.makedirs(os.path.dirname(args.report), exist_ok=True)
+    with open(args.report, "w") as f:
+        json.dump(
+            {
+                "created_at": datetime.now().isoformat(),
+                "n": args.n,
+                "words": args.words,
+                "model_path": args.model_path,
+                "stub_latency_s": args.stub_latency,
+                "results": rows,
+            },
+            f,
+            indent=2,
+        )
+    print(f"Wrote report to {args.report}")
+
+# to run
+# python -m src.benchmarks.bench_embedding_backends --model-path ./models/embedding --workers 1 2 4
@@ -0,0 +1,150 @@
+# src/benchmarks/bench_hnsw.py
+
+import argparse
+import itertools
+import json
+import os
+import tempfile
+import time
+from datetime import datetime
+
+import chromadb
+import numpy as np
+
+from src.vector_store.hnsw import hnsw_metadata
+
+
+def load_vectors(args) -> np.ndarray:
+    """
+    Returns the corpus vectors: the embeddings of an existing collection when
+    --from-collection is given, otherwise random unit vectors.
+    """
+    if args.from_collection:
+        from src.vector_store.store import get_client
+
+        collection = get_client().get_collection(args.from_collection)
+        return np.asarray(collection.get(include=["embeddings"])["embeddings"], dtype=np.float32)
+
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((args.n, args.dim), dtype=np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def make_queries(vectors: np.ndarray, n_queries: int, noise: float = 0.05) -> np.ndarray:
+    """
+    Builds queries by perturbing randomly chosen corpus vectors, so each query has
+    a meaningful neighbourhood like a real question about an indexed document.
+    """
+    rng = np.random.default_rng(1)
+    picks = vectors[rng.choice(len(vectors), size=n_queries, replace=False)]
+    queries = picks + noise * rng.standard_normal(picks.shape, dtype=np.float32)
+    return queries / np.linalg.norm(queries, axis=1, keepdims=True)
+
+
+def exact_neighbours(vectors: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    """
+    Returns the indices of the k nearest corpus vectors (squared L2) for each query.
+    """
+    distances = (
+        (queries**2).sum(axis=1, keepdims=True)
+        - 2 * queries @ vectors.T
+        + (vectors**2).sum(axis=1)
+    )
+    return np.argsort(distances, axis=1)[:, :k]
+
+
+def bench_settings(
+    client, vectors, queries, truth, k: int, M: int, construction_ef: int, search_ef: int
+) -> dict:
+    """
+    Builds a collection with the given HNSW settings, runs every query and returns
+    build time, recall@k against exact search and per-query latency percentiles.
+    """
+    name = f"bench_m{M}_c{construction_ef}_s{search_ef}"
+    collection = client.create_collection(
+        name=name,
+        metadata=hnsw_metadata(M, construction_ef, search_ef, space="l2"),
+        embedding_function=None,
+    )
+
+    start = time.perf_counter()
+    batch_size = client.get_max_batch_size()
+    for offset in range(0, len(vectors), batch_size):
+        chunk = vectors[offset : offset + batch_size]
+        collection.add(
+            ids=[str(i) for i in range(offset, offset + len(chunk))], embeddings=chunk
+        )
+    build_seconds = time.perf_counter() - start
+
+    latencies = []
+    hits = 0
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        result = collection.query(query_embeddings=[query], n_results=k, include=[])
+        latencies.append(time.perf_counter() - start)
+        hits += len({int(i) for i in result["ids"][0]} & set(expected.tolist()))
+
+    client.delete_collection(name)
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        "M": M,
+        "construction_ef": construction_ef,
+        "search_ef": search_ef,
+        "build_s": build_seconds,
+        f"recall@{k}": hits / truth.size,
+        "p50_ms": float(np.percentile(latencies_ms, 50)),
+        "p99_ms": float(np.percentile(latencies_ms, 99)),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sweep HNSW parameters.")
+    parser.add_argument("--n", type=int, default=50_000)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--from-collection", help="Benchmark an existing collection's embeddings")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--M", type=int, nargs="+", default=[8, 16, 32, 48])
+    parser.add_argument("--construction-ef", type=int, nargs="+", default=[100, 200])
+    parser.add_argument("--search-ef", type=int, nargs="+", default=[10, 32, 64, 128])
+    parser.add_argument("--report", default="./reports/hnsw_benchmark.json")
+    args = parser.parse_args()
+
+    vectors = load_vectors(args)
+    queries = make_queries(vectors, args.queries)
+    truth = exact_neighbours(vectors, queries, args.k)
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        client = chromadb.PersistentClient(path=tmp)
+        for M, construction_ef, search_ef in itertools.product(
+            args.M, args.construction_ef, args.search_ef
+        ):
+            row = bench_settings(
+                client, vectors, queries, truth, args.k, M, construction_ef, search_ef
+            )
+            rows.append(row)
+            print(
+                f"M={M:<3} construction_ef={construction_ef:<4} search_ef={search_ef:<4} "
+                f"recall@{args.k}={row[f'recall@{args.k}']:.3f} "
+                f"p50={row['p50_ms']:.2f}ms p99={row['p99_ms']:.2f}ms build={row['build_s']:.1f}s"
+            )
+
+    os.makedirs(os.path.dirname(args.report), exist_ok=True)
+    with open(args.report, "w") as f:
+        json.dump(
+            {
+                "created_at": datetime.now().isoformat(),
+                "n": len(vectors),
+                "dim": vectors.shape[1],
+                "k": args.k,
+                "queries": args.queries,
+                "results": rows,
+            },
+            f,
+            indent=2,
+        )
+    print(f"Wrote report to {args.report}")
+
+# to run
+# python -m src.benchmarks.bench_hnsw --n 100000 --M 16 32 --search-ef 32 64 128
@@ -0,0 +1,151 @@
+# src/benchmarks/bench_quantized.py
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+from src.refresh_pipeline.metrics import percentile
+
+
+def percentile_ms(latencies: list[float], q: float) -> float:
+    return percentile(latencies, q) * 1000
+
+
+def summarize(latencies: list[float], hits: int, truth: np.ndarray, k: int) -> dict:
+    return {
+        f"recall@{k}": round(hits / truth.size, 4),
+        "p50_ms": round(percentile_ms(latencies, 50), 2),
+        "p99_ms": round(percentile_ms(latencies, 99), 2),
+    }
+
+
+def bench_chroma(collection, queries, truth, k: int) -> dict:
+    """
+    Plain Chroma (HNSW over float32 vectors) search.
+    """
+    latencies = []
+    hits = 0
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        result = collection.query(query_embeddings=[query], n_results=k, include=[])
+        latencies.append(time.perf_counter() - start)
+        hits += len(set(result["ids"][0]) & {str(i) for i in expected})
+    return summarize(latencies, hits, truth, k)
+
+
+def bench_index(index, queries, truth, k: int) -> dict:
+    """
+    Quantized coarse search plus full-precision rescoring. candidate_recall@k is
+    the share of true neighbours among the candidates, i.e. the best recall the
+    rescoring step can reach with this rescore factor.
+    """
+    latencies = []
+    coarse_latencies = []
+    hits = 0
+    candidate_hits = 0
+    for query, expected in zip(queries, truth):
+        expected = {str(i) for i in expected}
+        start = time.perf_counter()
+        rows = index.search_coarse(query, k * index.rescore_factor)
+        coarse_done = time.perf_counter()
+        result = index.rescore(query, rows, k)
+        latencies.append(time.perf_counter() - start)
+        coarse_latencies.append(coarse_done - start)
+        hits += len({hit["id"] for hit in result} & expected)
+        candidate_hits += len(set(index.ids_of(rows)) & expected)
+    return {
+        **summarize(latencies, hits, truth, k),
+        f"candidate_recall@{k}": round(candidate_hits / truth.size, 4),
+        "coarse_p50_ms": round(percentile_ms(coarse_latencies, 50), 2),
+        "index_mb": round(index.nbytes() / 1e6, 1),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare quantized sidecar search with plain Chroma search."
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 50_000, 100_000])
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--decay", type=float, default=0.5, help="Variance decay of synthetic vectors")
+    parser.add_argument("--modes", nargs="+", choices=["int8", "binary"], default=["int8", "binary"])
+    parser.add_argument("--rescore", type=int, default=10, help="Candidates per result to rescore")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--report", default="./reports/quantized_benchmark.json")
+    args = parser.parse_args()
+
+    rows = []
+    with tempfile.TemporaryDirectory() as data_path:
+        # The store reads its settings at import time, and bench_scale imports it
+        # through the refresh pipeline.
+        os.environ["CHROMA_DATA_PATH"] = data_path
+        from src.benchmarks.bench_dimensions import synthetic_vectors
+        from src.benchmarks.bench_hnsw import exact_neighbours, make_queries
+        from src.benchmarks.bench_scale import dir_size_mb
+        from src.vector_store.quantized import QuantizedIndex
+        from src.vector_store.store import get_client, get_collection
+
+        vectors = synthetic_vectors(max(args.sizes), args.dim, args.decay)
+
+        collection = get_collection(create=True)
+        batch_size = get_client().get_max_batch_size()
+        size = 0
+        for target in sorted(args.sizes):
+            for offset in range(size, target, batch_size):
+                end = min(offset + batch_size, target)
+                collection.add(
+                    ids=[str(i) for i in range(offset, end)], embeddings=vectors[offset:end]
+                )
+            size = target
+
+            corpus = vectors[:size]
+            queries = make_queries(corpus, args.queries)
+            truth = exact_neighbours(corpus, queries, args.k)
+            row = {
+                "size": size,
+                "float32_mb": round(corpus.nbytes / 1e6, 1),
+                "chroma_disk_mb": round(dir_size_mb(data_path), 1),
+                "chroma": bench_chroma(collection, queries, truth, args.k),
+            }
+            for mode in args.modes:
+                index = QuantizedIndex(
+                    None, mode=mode, rescore_factor=args.rescore, index_dir=None
+                )
+                index.load()
+                row[mode] = bench_index(index, queries, truth, args.k)
+            rows.append(row)
+
+            print(f"{size} records, float32 vectors {row['float32_mb']:.0f} MB:")
+            for name in ["chroma", *args.modes]:
+                result = row[name]
+                memory = f" index={result['index_mb']:.1f}MB" if "index_mb" in result else ""
+                print(
+                    f"  {name:<7} recall@{args.k}={result[f'recall@{args.k}']:.3f} "
+                    f"p50={result['p50_ms']:.2f}ms p99={result['p99_ms']:.2f}ms{memory}"
+                )
+
+    os.makedirs(os.path.dirname(args.report), exist_ok=True)
+    with open(args.report, "w") as f:
+        json.dump(
+            {
+                "created_at": datetime.now().isoformat(),
+                "dim": args.dim,
+                "decay": args.decay,
+                "rescore": args.rescore,
+                "k": args.k,
+                "queries": args.queries,
+                "results": rows,
+            },
+            f,
+            indent=2,
+        )
+    print(f"Wrote report to {args.report}")
+
+# to run
+# python -m src.benchmarks.bench_quantized --sizes 10000 100000 --modes int8 binary
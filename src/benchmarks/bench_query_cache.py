@@ -0,0 +1,156 @@
+# src/benchmarks/bench_query_cache.py
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from datetime import datetime
+
+from src.benchmarks.stub_embedding_server import start_stub_server
+from src.benchmarks.synthetic_corpus import FEATURES, VERBS
+from src.refresh_pipeline.metrics import percentile
+
+
+def make_questions(n: int, rng: random.Random) -> list[str]:
+    """
+    Returns n distinct questions about the synthetic corpus.
+    """
+    companies = ["Cursor", "Codeium", "Windsurf"]
+    questions = set()
+    while len(questions) < n:
+        questions.add(
+            f"When was {rng.choice(FEATURES).replace('-', ' ')} "
+            f"{rng.choice(VERBS).replace('-', ' ')} in {rng.choice(companies)}"
+        )
+    return sorted(questions)
+
+
+def workload(questions: list[str], n: int, skew: float, rng: random.Random) -> list[str]:
+    """
+    Samples n requests from the questions with Zipf-like popularity, each written
+    with varying case, spacing and punctuation like real users type it.
+    """
+    weights = [1 / (rank + 1) ** skew for rank in range(len(questions))]
+    requests = []
+    for question in rng.choices(questions, weights, k=n):
+        if rng.random() < 0.3:
+            question = question.capitalize()
+        if rng.random() < 0.3:
+            question = question.replace(" ", "  ", 1)
+        requests.append(question + rng.choice(["", "?", " ?"]))
+    return requests
+
+
+def run(requests: list[str], search, query_cache=None, on_halfway=None) -> dict:
+    latencies = []
+    for i, query in enumerate(requests):
+        if i == len(requests) // 2 and on_halfway is not None:
+            on_halfway()
+        start = time.perf_counter()
+        if query_cache is None:
+            search(query, 3, None, None)
+        else:
+            query_cache.get_or_compute(
+                query, 3, None, None, lambda: search(query, 3, None, None)
+            )
+        latencies.append(time.perf_counter() - start)
+    return {
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Replay a skewed question workload with and without the query result cache."
+    )
+    parser.add_argument("--docs", type=int, default=20_000)
+    parser.add_argument("--questions", type=int, default=300, help="Distinct questions")
+    parser.add_argument("--requests", type=int, default=3_000)
+    parser.add_argument("--skew", type=float, default=1.1, help="Zipf exponent of question popularity")
+    parser.add_argument("--max-entries", type=int, default=128)
+    parser.add_argument("--ttl", type=float, default=600)
+    parser.add_argument("--stub-latency", type=float, default=0.1, help="Seconds per embedding request")
+    parser.add_argument("--report", default="./reports/query_cache_benchmark.json")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    requests = workload(make_questions(args.questions, rng), args.requests, args.skew, rng)
+    server = start_stub_server(base_latency=args.stub_latency)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        # Settings are read at import time, so they are set before the store,
+        # embedding, refresh and assistant modules are imported. Query embeddings
+        # go to the stub server, with the embedding cache in the temporary directory.
+        os.environ.update(
+            CHROMA_DATA_PATH=os.path.join(workdir, "data"),
+            EMBEDDING_CACHE_PATH=os.path.join(workdir, "embeddings.sqlite3"),
+            EMBEDDING_BACKEND="openai",
+            EMBEDDING_API_BASE=f"http://localhost:{server.server_port}/v1",
+            OPENAI_API_KEY="stub",
+        )
+        from src.assistant_analyzer.assistant import search_documents
+        from src.benchmarks.bench_scale import ingest
+        from src.embeddings.factory import collection_metadata
+        from src.vector_store.query_cache import QueryCache
+        from src.vector_store.store import bump_last_update_date, get_client, get_collection
+
+        collection = get_collection(
+            metadata={"last_update_date": datetime.now().isoformat(), **collection_metadata()},
+            create=True,
+        )
+        ingest(collection, 0, args.docs, get_client().get_max_batch_size(), 1536)
+
+        def refresh():
+            # A refresh halfway through invalidates the cache.
+            bump_last_update_date(collection)
+
+        # Every distinct question is embedded once up front, so both runs find its
+        # vector in the embedding cache and the first run isn't charged for the
+        # stub round trips alone.
+        for question in set(requests):
+            search_documents(question, 3, None, None)
+
+        uncached = run(requests, search_documents)
+        query_cache = QueryCache(max_entries=args.max_entries, ttl=args.ttl, check_interval=0)
+        cached = run(requests, search_documents, query_cache, on_halfway=refresh)
+        stats = query_cache.stats()
+    server.shutdown()
+
+    print(
+        f"{args.requests} requests over {args.questions} questions (skew {args.skew}): "
+        f"hit rate {stats['hit_rate']:.1%}, {stats['evictions']} evictions, "
+        f"{stats['invalidations']} invalidations"
+    )
+    for name, result in (("uncached", uncached), ("cached", cached)):
+        print(
+            f"  {name:<9} p50={result['p50_ms']:.2f}ms p99={result['p99_ms']:.2f}ms "
+            f"mean={result['mean_ms']:.2f}ms"
+        )
+
+    os.makedirs(os.path.dirname(args.report), exist_ok=True)
+    with open(args.report, "w") as f:
+        json.dump(
+            {
+                "created_at": datetime.now().isoformat(),
+                "docs": args.docs,
+                "questions": args.questions,
+                "requests": args.requests,
+                "skew": args.skew,
+                "max_entries": args.max_entries,
+                "ttl": args.ttl,
+                "stub_latency_s": args.stub_latency,
+                "uncached": uncached,
+                "cached": cached,
+                "cache": stats,
+            },
+            f,
+            indent=2,
+        )
+    print(f"Wrote report to {args.report}")
+
+# to run
+# python -m src.benchmarks.bench_query_cache --requests 3000 --max-entries 128
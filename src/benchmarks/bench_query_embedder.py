@@ -0,0 +1,116 @@
+# src/benchmarks/bench_query_embedder.py
+
+import argparse
+import json
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from chromadb.utils import embedding_functions
+
+from src.benchmarks.bench_query_cache import make_questions, workload
+from src.benchmarks.stub_embedding_server import start_stub_server
+from src.embeddings.query_embedder import QueryEmbedder, latency_histogram
+from src.refresh_pipeline.metrics import percentile
+
+
+def replay(embed, requests: list[str], clients: int) -> tuple[list[float], float]:
+    """
+    Embeds every request from a pool of concurrent clients, one query per call as
+    the assistant does. Returns the latency of each call and the wall time.
+    """
+
+    def call(query):
+        start = time.perf_counter()
+        embed([query])
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as executor:
+        latencies = list(executor.map(call, requests))
+    return latencies, time.perf_counter() - start
+
+
+def summarize(latencies: list[float], wall_s: float, server, requests_before: int) -> dict:
+    return {
+        "wall_s": round(wall_s, 2),
+        "queries_per_s": round(len(latencies) / wall_s, 1),
+        "embedding_requests": server.stats["requests"] - requests_before,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "latency_ms": latency_histogram(latencies),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare one embedding request per query with the caching, batching query embedder."
+    )
+    parser.add_argument("--questions", type=int, default=500, help="Distinct questions")
+    parser.add_argument("--requests", type=int, default=2_000)
+    parser.add_argument("--skew", type=float, default=1.1, help="Zipf exponent of question popularity")
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--window-ms", type=float, default=5)
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--stub-latency", type=float, default=0.1, help="Seconds per embedding request")
+    parser.add_argument("--report", default="./reports/query_embedder_benchmark.json")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    requests = workload(make_questions(args.questions, rng), args.requests, args.skew, rng)
+    server = start_stub_server(base_latency=args.stub_latency)
+    # Straight to the stub, without the on-disk cache, so every request the
+    # embedder doesn't save is a round trip.
+    remote = embedding_functions.OpenAIEmbeddingFunction(
+        api_key="stub",
+        api_base=f"http://localhost:{server.server_port}/v1",
+        model_name="text-embedding-3-small",
+    )
+
+    rows = []
+    for clients in args.clients:
+        before = server.stats["requests"]
+        direct = summarize(*replay(remote, requests, clients), server, before)
+
+        embedder = QueryEmbedder(remote, window_ms=args.window_ms, max_batch=args.max_batch)
+        before = server.stats["requests"]
+        batched = summarize(*replay(embedder, requests, clients), server, before)
+        stats = embedder.stats()
+        batched.update(
+            hit_rate=round(stats["hit_rate"], 3),
+            coalesced=stats["coalesced"],
+            mean_batch_size=round(stats["mean_batch_size"], 2),
+            batch_sizes=stats["batch_sizes"],
+        )
+        rows.append({"clients": clients, "direct": direct, "query_embedder": batched})
+        print(
+            f"clients={clients:<3} direct: {direct['embedding_requests']:>5} requests "
+            f"p50={direct['p50_ms']:.1f}ms p99={direct['p99_ms']:.1f}ms | "
+            f"query embedder: {batched['embedding_requests']:>5} requests "
+            f"(mean batch {batched['mean_batch_size']:.1f}, hit rate {batched['hit_rate']:.0%}) "
+            f"p50={batched['p50_ms']:.1f}ms p99={batched['p99_ms']:.1f}ms"
+        )
+    server.shutdown()
+
+    os.makedirs(os.path.dirname(args.report), exist_ok=True)
+    with open(args.report, "w") as f:
+        json.dump(
+            {
+                "created_at": datetime.now().isoformat(),
+                "questions": args.questions,
+                "requests": args.requests,
+                "skew": args.skew,
+                "window_ms": args.window_ms,
+                "max_batch": args.max_batch,
+                "stub_latency_s": args.stub_latency,
+                "results": rows,
+            },
+            f,
+            indent=2,
+        )
+    print(f"Wrote report to {args.report}")
+
+# to run
+# python -m src.benchmarks.bench_query_embedder --clients 1 8 32 --window-ms 5
@@ -0,0 +1,101 @@
+# src/benchmarks/bench_refresh_offline.py
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+# The refresh modules read their paths and backends from the environment when they
+# are imported, so everything is configured here first and imported in main().
+FLOWS = ["refresh_changelog", "refresh_all"]
+
+
+def configure_offline(workdir: str, fixtures_dir: str) -> None:
+    """
+    Points every part of the refresh at workdir or at local stand-ins: recorded
+    fixtures instead of the sites, the fake embedding function instead of OpenAI,
+    estimated token counts instead of tiktoken's downloaded encoding, and a fresh
+    embedded Chroma directory.
+    """
+    os.environ.update(
+        REFRESH_FIXTURES_DIR=fixtures_dir,
+        REFRESH_FIXTURES_MODE="replay",
+        EMBEDDING_BACKEND="fake",
+        TOKENIZER="estimate",
+        CHROMA_DATA_PATH=os.path.join(workdir, "chroma"),
+        EMBEDDING_CACHE_PATH=os.path.join(workdir, "cache", "embeddings.sqlite3"),
+        REFRESH_CHECKPOINT_PATH=os.path.join(workdir, "cache", "refresh_checkpoints.sqlite3"),
+        DEDUPE_INDEX_PATH=os.path.join(workdir, "cache", "dedupe.sqlite3"),
+        EMBEDDING_BACKLOG_PATH=os.path.join(workdir, "cache", "embedding_backlog.sqlite3"),
+        REFRESH_REPORT_DIR=os.path.join(workdir, "reports"),
+    )
+    os.environ.pop("CHROMA_SERVER_HOST", None)
+
+
+def throughput(report: dict, elapsed: float) -> str:
+    stages = report["stages"]
+    pages = sum(stages.get(s, {}).get("calls", 0) for s in ("sitemap", "fetch", "render"))
+    records = stages.get("parse", {}).get("items", 0)
+    embedded = stages.get("embed", {}).get("items", 0)
+    tokens = stages.get("embed", {}).get("tokens", 0)
+    return (
+        f"{elapsed:.2f}s end to end: {pages / elapsed:.1f} pages/s, "
+        f"{records / elapsed:.1f} records/s, {embedded} documents embedded "
+        f"({tokens} tokens, {tokens / elapsed:.0f} tokens/s)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run a refresh flow end to end with no network, API key or paid calls."
+    )
+    parser.add_argument("--flow", choices=FLOWS, default="refresh_all")
+    parser.add_argument(
+        "--fixtures",
+        help="Directory of recorded pages (see REFRESH_FIXTURES_MODE=record). "
+        "Synthetic pages are generated when omitted.",
+    )
+    parser.add_argument("--pages", type=int, default=100, help="Synthetic pages per source.")
+    parser.add_argument("--changelog-entries", type=int, default=200)
+    parser.add_argument(
+        "--runs",
+        type=int,
+        default=2,
+        help="Runs against the same store; runs after the first measure a no-op refresh.",
+    )
+    parser.add_argument("--keep", action="store_true", help="Keep the temporary directory.")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="refresh-bench-")
+    fixtures_dir = args.fixtures or os.path.join(workdir, "fixtures")
+    configure_offline(workdir, fixtures_dir)
+
+    from src.benchmarks.fixtures import synthetic_pages, write_fixtures
+    from src.refresh_pipeline.refresh_all import refresh_all
+    from src.refresh_pipeline.refresh_changelog import refresh_changelog
+
+    if not args.fixtures:
+        write_fixtures(fixtures_dir, synthetic_pages(args.pages, args.changelog_entries))
+    flow = {"refresh_changelog": refresh_changelog, "refresh_all": refresh_all}[args.flow]
+
+    results = []
+    try:
+        for run in range(args.runs):
+            start = time.perf_counter()
+            report = flow(resume=False)
+            results.append((run, report, time.perf_counter() - start))
+    finally:
+        for run, report, elapsed in results:
+            print(f"Run {run + 1} ({'cold' if run == 0 else 'no-op'}): {throughput(report, elapsed)}")
+        if args.keep:
+            print(f"Kept {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
+
+# to run
+# python -m src.benchmarks.bench_refresh_offline --flow refresh_all --pages 100
@@ -0,0 +1,205 @@
+# src/benchmarks/bench_scale.py
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import resource
+import tempfile
+import time
+from datetime import datetime
+
+import chromadb
+
+from src.benchmarks.synthetic_corpus import synthetic_records
+from src.embeddings.fake import fake_embedding
+from src.refresh_pipeline.ingest import build_record, diff_items
+from src.vector_store.store import COLLECTION_NAME
+
+
+def rss_mb() -> float:
+    """
+    Returns the current resident set size of the process in MB (Linux).
+    """
+    with open("/proc/self/statm") as f:
+        pages = int(f.read().split()[1])
+    return pages * os.sysconf("SC_PAGE_SIZE") / 1e6
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3
+
+
+def dir_size_mb(path: str) -> float:
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(path)
+        for name in names
+    ) / 1e6
+
+
+def percentile_ms(latencies: list[float], q: float) -> float:
+    ordered = sorted(latencies)
+    return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))] * 1000
+
+
+def ingest(collection, start: int, end: int, batch_size: int, dim: int) -> dict:
+    """
+    Adds records start..end-1 of the synthetic corpus, timing collection.add only
+    (building records and fake embeddings is excluded).
+    """
+    add_s = 0.0
+    records = synthetic_records(end, start=start)
+    while True:
+        batch = [build_record(record) for _, record in zip(range(batch_size), records)]
+        if not batch:
+            break
+        embeddings = [fake_embedding(document, dim) for _, document, _ in batch]
+        t = time.perf_counter()
+        collection.add(
+            ids=[id_ for id_, _, _ in batch],
+            documents=[document for _, document, _ in batch],
+            metadatas=[metadata for _, _, metadata in batch],
+            embeddings=embeddings,
+        )
+        add_s += time.perf_counter() - t
+    return {"added": end - start, "add_s": round(add_s, 3), "add_docs_per_s": round((end - start) / add_s, 1)}
+
+
+def diff(collection, size: int, existing: int = 1_000, new: int = 100) -> dict:
+    """
+    Times diff_items, the refresh's diff, on a refresh-sized batch: existing records
+    plus new ones. Deletions are not considered, as for a partial loader.
+    """
+    rng = random.Random(size)
+    picks = sorted(rng.sample(range(size), min(existing, size)))
+    records = [next(synthetic_records(i + 1, start=i)) for i in picks]
+    records += list(synthetic_records(size + new, start=size))
+    t = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        new_items, changed_items, _ = diff_items(collection, records, allow_delete=False)
+    elapsed = time.perf_counter() - t
+    assert len(new_items) == new and not changed_items
+    return {"diff_records": len(records), "diff_ms": round(elapsed * 1000, 1)}
+
+
+def query(collection, n_queries: int, dim: int, where: dict | None = None) -> dict:
+    """
+    Runs n_queries single queries and returns their latency percentiles.
+    """
+    latencies = []
+    for i in range(n_queries):
+        embedding = fake_embedding(f"synthetic query {i}", dim)
+        t = time.perf_counter()
+        collection.query(query_embeddings=[embedding], n_results=3, where=where)
+        latencies.append(time.perf_counter() - t)
+    return {
+        "p50_ms": round(percentile_ms(latencies, 50), 2),
+        "p99_ms": round(percentile_ms(latencies, 99), 2),
+        "qps": round(n_queries / sum(latencies), 1),
+    }
+
+
+def plot(results: list[dict], path: str) -> None:
+    try:
+        import matplotlib
+
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+    except ImportError:
+        print("matplotlib is not installed; skipping the plot.")
+        return
+
+    sizes = [r["size"] for r in results]
+    fig, axes = plt.subplots(2, 2, figsize=(11, 8))
+    panels = [
+        ("Ingest throughput (docs/s)", [("collection.add", [r["add_docs_per_s"] for r in results])]),
+        ("diff_items latency (ms)", [("1.1k records", [r["diff_ms"] for r in results])]),
+        (
+            "Query latency (ms)",
+            [
+                ("p50", [r["query"]["p50_ms"] for r in results]),
+                ("p99", [r["query"]["p99_ms"] for r in results]),
+                ("p50 filtered", [r["query_filtered"]["p50_ms"] for r in results]),
+                ("p99 filtered", [r["query_filtered"]["p99_ms"] for r in results]),
+            ],
+        ),
+        (
+            "Memory (MB)",
+            [
+                ("peak RSS", [r["peak_rss_mb"] for r in results]),
+                ("on disk", [r["disk_mb"] for r in results]),
+            ],
+        ),
+    ]
+    for ax, (title, series) in zip(axes.flat, panels):
+        for label, values in series:
+            ax.plot(sizes, values, marker="o", label=label)
+        ax.set_xscale("log")
+        ax.set_xlabel("corpus size (documents)")
+        ax.set_title(title)
+        ax.legend()
+    fig.tight_layout()
+    fig.savefig(path)
+    print(f"Wrote {path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Grow a synthetic corpus and measure ingest, diff and query at each size."
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--batch-size", type=int, default=5_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--output", default="./reports/scale_benchmark.json")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as data_path:
+        client = chromadb.PersistentClient(path=data_path)
+        collection = client.create_collection(COLLECTION_NAME)
+        batch_size = min(args.batch_size, client.get_max_batch_size())
+
+        size = 0
+        for target in sorted(args.sizes):
+            result = {"size": target}
+            result.update(ingest(collection, size, target, batch_size, args.dim))
+            size = target
+            result.update(diff(collection, size))
+            result["query"] = query(collection, args.queries, args.dim)
+            result["query_filtered"] = query(
+                collection,
+                args.queries,
+                args.dim,
+                where={"$and": [{"company": "Cursor_Enterprise"}, {"doc_type": "changelog"}]},
+            )
+            result.update(
+                rss_mb=round(rss_mb(), 1),
+                peak_rss_mb=round(peak_rss_mb(), 1),
+                disk_mb=round(dir_size_mb(data_path), 1),
+            )
+            results.append(result)
+            print(
+                f"{target:>9} docs: add {result['add_docs_per_s']:>8.0f} docs/s, "
+                f"diff {result['diff_ms']:>7.1f} ms, query p50/p99 "
+                f"{result['query']['p50_ms']:.1f}/{result['query']['p99_ms']:.1f} ms "
+                f"(filtered {result['query_filtered']['p50_ms']:.1f}/"
+                f"{result['query_filtered']['p99_ms']:.1f} ms), "
+                f"RSS {result['rss_mb']:.0f} MB, disk {result['disk_mb']:.0f} MB"
+            )
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(
+            {"created_at": datetime.now().isoformat(), "dim": args.dim, "results": results},
+            f,
+            indent=2,
+        )
+    print(f"Wrote {args.output}")
+    plot(results, os.path.splitext(args.output)[0] + ".png")
+
+# to run
+# python -m src.benchmarks.bench_scale --sizes 10000 100000 1000000 --dim 1536
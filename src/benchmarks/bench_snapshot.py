@@ -0,0 +1,78 @@
+# src/benchmarks/bench_snapshot.py
+
+import argparse
+import os
+import tempfile
+import time
+
+import chromadb
+import numpy as np
+
+from src.vector_store.snapshot import export_snapshot, import_snapshot
+
+
+def populate_collection(client, name: str, n: int, dim: int, seed: int = 0):
+    """
+    Creates a collection with n random unit vectors and short documents.
+    """
+    rng = np.random.default_rng(seed)
+    collection = client.create_collection(name=name, embedding_function=None)
+    batch_size = client.get_max_batch_size()
+    for start in range(0, n, batch_size):
+        size = min(batch_size, n - start)
+        vectors = rng.standard_normal((size, dim), dtype=np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        collection.add(
+            ids=[f"doc_{i}" for i in range(start, start + size)],
+            documents=[f"synthetic document {i}" for i in range(start, start + size)],
+            metadatas=[{"company": "Cursor_Enterprise", "index": i} for i in range(start, start + size)],
+            embeddings=vectors,
+        )
+    return collection
+
+
+def bench_cold_start(n: int, dim: int) -> dict:
+    """
+    Times exporting a collection of n vectors to a snapshot and importing it into an
+    empty data directory, which is what a new assistant node does on cold start.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        source = chromadb.PersistentClient(path=os.path.join(tmp, "source"))
+        collection = populate_collection(source, "bench", n, dim)
+        snapshot_path = os.path.join(tmp, "bench.arrow")
+
+        start = time.perf_counter()
+        export_snapshot(collection, snapshot_path)
+        export_seconds = time.perf_counter() - start
+
+        target = chromadb.PersistentClient(path=os.path.join(tmp, "target"))
+        start = time.perf_counter()
+        import_snapshot(target, snapshot_path)
+        import_seconds = time.perf_counter() - start
+
+        return {
+            "n": n,
+            "dim": dim,
+            "snapshot_mb": os.path.getsize(snapshot_path) / 1e6,
+            "export_s": export_seconds,
+            "import_s": import_seconds,
+            "import_vectors_per_s": n / import_seconds,
+        }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark snapshot cold start.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--dim", type=int, default=1536)
+    args = parser.parse_args()
+
+    print(f"{'n':>10} {'dim':>5} {'snapshot MB':>12} {'export s':>9} {'import s':>9} {'vectors/s':>10}")
+    for n in args.sizes:
+        r = bench_cold_start(n, args.dim)
+        print(
+            f"{r['n']:>10} {r['dim']:>5} {r['snapshot_mb']:>12.1f} "
+            f"{r['export_s']:>9.2f} {r['import_s']:>9.2f} {r['import_vectors_per_s']:>10.0f}"
+        )
+
+# to run
+# python -m src.benchmarks.bench_snapshot --sizes 10000 100000 --dim 1536
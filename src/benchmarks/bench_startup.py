@@ -0,0 +1,74 @@
+# src/benchmarks/bench_startup.py
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+# What starting the CLI imports now, and the heavy modules that used to be imported
+# when the assistant or refresh modules were imported and are now deferred.
+PROJECT_MODULES = [
+    "src.main",
+    "src.assistant_analyzer.assistant",
+    "src.refresh_pipeline.refresh_all",
+]
+DEFERRED_MODULES = [
+    "prefect",
+    "chromadb",
+    "pydantic_ai",
+    "playwright.sync_api",
+    "logfire",
+    "tiktoken",
+]
+
+
+def import_time_ms(module: str) -> float | None:
+    """
+    Returns the cumulative import time of a module in a fresh interpreter, as
+    reported by `python -X importtime`, or None if it can't be imported.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        return None
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        parts = [part.strip() for part in line.split("|")]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1]) / 1000
+    return None
+
+
+def command_time_ms(args: list[str], runs: int) -> float:
+    """
+    Returns the median wall time of running a command in a fresh interpreter.
+    """
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, *args], capture_output=True)
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure CLI and module start-up time.")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    print("Cumulative import time (python -X importtime):")
+    for module in PROJECT_MODULES + DEFERRED_MODULES:
+        ms = import_time_ms(module)
+        deferred = " (deferred until first use)" if module in DEFERRED_MODULES else ""
+        print(f"  {module:<36} {'not importable' if ms is None else f'{ms:8.1f} ms'}{deferred}")
+
+    print(f"Wall time, median of {args.runs} runs:")
+    for command in (["-c", "pass"], ["-m", "src.main", "--help"], ["-m", "src.main", "query", "--help"]):
+        print(f"  python {' '.join(command):<34} {command_time_ms(command, args.runs):8.1f} ms")
+
+# to run
+# python -m src.benchmarks.bench_startup
@@ -0,0 +1,98 @@
+# src/benchmarks/bench_tiered.py
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+
+def percentiles(latencies: list[float]) -> str:
+    ms = np.array(latencies) * 1000
+    return f"p50={np.percentile(ms, 50):.2f}ms p99={np.percentile(ms, 99):.2f}ms"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare tiered and full-index queries.")
+    parser.add_argument("--n", type=int, default=200_000)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--hot", type=int, default=2_000, help="Hot records per company")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--recent-share", type=float, default=0.8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_path:
+        # The store reads its settings at import time.
+        os.environ["CHROMA_DATA_PATH"] = data_path
+        from src.vector_store.routing import query_store
+        from src.vector_store.store import get_client, get_collection
+        from src.vector_store.tiered import TieredIndex
+
+        rng = np.random.default_rng(0)
+        companies = ["Codeium_Enterprise", "Cursor_Enterprise"]
+        collection = get_collection(create=True)
+        vectors = np.empty((args.n, args.dim), dtype=np.float32)
+        batch_size = get_client().get_max_batch_size()
+        start = time.perf_counter()
+        for offset in range(0, args.n, batch_size):
+            size = min(batch_size, args.n - offset)
+            chunk = rng.standard_normal((size, args.dim), dtype=np.float32)
+            chunk /= np.linalg.norm(chunk, axis=1, keepdims=True)
+            vectors[offset : offset + size] = chunk
+            collection.add(
+                ids=[str(i) for i in range(offset, offset + size)],
+                documents=[f"entry {i}" for i in range(offset, offset + size)],
+                metadatas=[
+                    {
+                        "company": companies[i % 2],
+                        "doc_type": "changelog",
+                        "index": i // 2,
+                    }
+                    for i in range(offset, offset + size)
+                ],
+                embeddings=chunk,
+            )
+        print(f"Built {args.n} x {args.dim} corpus in {time.perf_counter() - start:.1f}s")
+
+        # Recent questions target the newest entries (highest index), the rest
+        # target the archive.
+        hot_floor = args.n - 2 * args.hot
+        targets = np.where(
+            rng.random(args.queries) < args.recent_share,
+            rng.integers(hot_floor, args.n, args.queries),
+            rng.integers(0, hot_floor, args.queries),
+        )
+        queries = vectors[targets] + 0.02 * rng.standard_normal(
+            (args.queries, args.dim), dtype=np.float32
+        )
+        query_vectors = {f"q{i}": q for i, q in enumerate(queries)}
+
+        def embedding_function(texts):
+            return [query_vectors[text] for text in texts]
+
+        full_latencies = []
+        for text in query_vectors:
+            start = time.perf_counter()
+            query_store(text, n_results=3, embedding_function=embedding_function)
+            full_latencies.append(time.perf_counter() - start)
+
+        index = TieredIndex(embedding_function, window_days=0, window_entries=args.hot)
+        start = time.perf_counter()
+        index.load()
+        print(f"Loaded hot tier in {time.perf_counter() - start:.2f}s")
+
+        tiered_latencies = []
+        for text in query_vectors:
+            start = time.perf_counter()
+            index.query(text, n_results=3)
+            tiered_latencies.append(time.perf_counter() - start)
+
+    print(f"Full index:  {percentiles(full_latencies)}")
+    print(f"Tiered:      {percentiles(tiered_latencies)}")
+    print(
+        f"Hot-only answers: {index.stats['hot_only']}, fanned out: {index.stats['fan_out']}"
+    )
+
+# to run
+# python -m src.benchmarks.bench_tiered --n 200000 --hot 2000
@@ -0,0 +1,126 @@
+# src/benchmarks/fixtures.py
+
+import json
+import os
+import random
+
+from src.loaders.codeium.load_codeium_blog_posts import SITEMAP_URL as CODEIUM_SITEMAP_URL
+from src.loaders.codeium.load_codeium_changelog import CODEIUM_CHANGELOG_URL
+from src.loaders.codeium.load_codeium_docs import SITEMAP_URL as CODEIUM_DOCS_SITEMAP_URL
+from src.loaders.cursor.load_cursor_blog_posts import SITEMAP_URL as CURSOR_SITEMAP_URL
+from src.loaders.cursor.load_cursor_changelog import CURSOR_CHANGELOG_URL
+from src.loaders.cursor.load_cursor_docs import SITEMAP_URL as CURSOR_DOCS_SITEMAP_URL
+from src.utils.network import fixture_path
+
+WORDS = (
+    "agent autocomplete cascade chat codebase completion context diff editor "
+    "embedding extension fix index inline latency model prompt refactor repository "
+    "rules search suggestion terminal test tokens workspace improved faster support "
+    "new added removed users enterprise team settings files changes"
+).split()
+
+
+def _sentence(rng: random.Random, words: int = 14) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def _sections(rng: random.Random, sections: int) -> str:
+    return "".join(
+        f"<h2>Section {s}</h2>"
+        + "".join(f"<p>{' '.join(_sentence(rng) for _ in range(4))}</p>" for _ in range(3))
+        for s in range(sections)
+    )
+
+
+def _sitemap(urls: list[str]) -> str:
+    locs = "".join(f"<url><loc>{url}</loc></url>" for url in urls)
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        f'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{locs}</urlset>'
+    )
+
+
+def codeium_blog_page(rng: random.Random, i: int) -> str:
+    date = json.dumps({"datePublished": f"2025-{i % 12 + 1:02d}-{i % 28 + 1:02d}"})
+    return (
+        f'<html><head><script type="application/ld+json">{date}</script></head><body>'
+        f'<h1>Codeium post {i}</h1><div class="prose">{_sections(rng, 4)}</div></body></html>'
+    )
+
+
+def cursor_blog_page(rng: random.Random, i: int) -> str:
+    return (
+        f'<html><head><meta property="og:title" content="Cursor post {i}"></head><body>'
+        f'<nav>Blog</nav><article><time datetime="2025-{i % 12 + 1:02d}-01">'
+        f"</time>{_sections(rng, 4)}</article></body></html>"
+    )
+
+
+def docs_page(rng: random.Random, title: str) -> str:
+    return (
+        f"<html><head><title>{title}</title></head><body><h1>{title}</h1>"
+        f"<div data-mdx-content>{_sections(rng, 3)}</div></body></html>"
+    )
+
+
+def codeium_changelog_page(rng: random.Random, entries: int) -> str:
+    items = "".join(
+        '<div aria-label="changelog-layout">'
+        '<header class="mb-5 flex flex-col gap-2 md:hidden">'
+        f"<div>v 1.{entries - i}.0</div><div>January {i % 28 + 1}, 2025</div></header>"
+        f'<article><div class="prose"><h2>Patch notes</h2><h2>Release {entries - i}</h2>'
+        f"<ul>{''.join(f'<li>{_sentence(rng)}</li>' for _ in range(6))}</ul>"
+        f"<p>{_sentence(rng, 30)}</p></div></article></div>"
+        for i in range(entries)
+    )
+    return f"<html><body>{items}</body></html>"
+
+
+def cursor_changelog_page(rng: random.Random, entries: int) -> str:
+    items = "".join(
+        f"<article><p>0.{entries - i}.x</p><h2>Release {entries - i}</h2>"
+        f"<ul>{''.join(f'<li>{_sentence(rng)}</li>' for _ in range(6))}</ul></article>"
+        for i in range(entries)
+    )
+    return f"<html><body>{items}</body></html>"
+
+
+def synthetic_pages(pages: int = 50, changelog_entries: int = 100, seed: int = 0) -> dict[str, str]:
+    """
+    Returns synthetic {url: html} pages for every source, shaped like the real sites
+    so the loaders' parsers accept them: a sitemap and `pages` pages per blog and
+    docs source, and changelog pages with `changelog_entries` entries each.
+    """
+    rng = random.Random(seed)
+    codeium_blog = [f"https://codeium.com/blog/post-{i}" for i in range(pages)]
+    cursor_blog = [f"https://www.cursor.com/en/blog/post-{i}" for i in range(pages)]
+    codeium_docs = [f"https://docs.codeium.com/page-{i}" for i in range(pages)]
+    cursor_docs = [f"https://docs.cursor.com/page-{i}" for i in range(pages)]
+
+    site = {
+        CODEIUM_SITEMAP_URL: _sitemap(codeium_blog),
+        CURSOR_SITEMAP_URL: _sitemap(cursor_blog),
+        CODEIUM_DOCS_SITEMAP_URL: _sitemap(codeium_docs),
+        CURSOR_DOCS_SITEMAP_URL: _sitemap(cursor_docs),
+        CODEIUM_CHANGELOG_URL: codeium_changelog_page(rng, changelog_entries),
+        CURSOR_CHANGELOG_URL: cursor_changelog_page(rng, changelog_entries),
+    }
+    for i, url in enumerate(codeium_blog):
+        site[url] = codeium_blog_page(rng, i)
+    for i, url in enumerate(cursor_blog):
+        site[url] = cursor_blog_page(rng, i)
+    for i, url in enumerate(codeium_docs):
+        site[url] = docs_page(rng, f"Codeium docs page {i}")
+    for i, url in enumerate(cursor_docs):
+        site[url] = docs_page(rng, f"Cursor docs page {i}")
+    return site
+
+
+def write_fixtures(fixtures_dir: str, site: dict[str, str]) -> None:
+    """
+    Writes {url: html} pages where fetch and fetch_rendered look for recorded pages.
+    """
+    os.makedirs(fixtures_dir, exist_ok=True)
+    for url, html in site.items():
+        with open(fixture_path(url, fixtures_dir), "w", encoding="utf-8") as f:
+            f.write(html)
@@ -0,0 +1,137 @@
+# src/benchmarks/stress_concurrent_access.py
+
+import argparse
+import multiprocessing as mp
+import os
+import socket
+import subprocess
+import tempfile
+import time
+
+import numpy as np
+
+DIM = 64
+
+
+def _wait_for_port(host: str, port: int, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with socket.socket() as sock:
+            if sock.connect_ex((host, port)) == 0:
+                return
+        time.sleep(0.2)
+    raise TimeoutError(f"Chroma server did not start on {host}:{port}")
+
+
+def writer(duration: float, results) -> None:
+    """
+    Upserts batches of random vectors under the store's write lock, like a refresh.
+    """
+    from src.vector_store.store import get_collection, write_lock
+
+    collection = get_collection(create=True)
+    rng = np.random.default_rng(0)
+    ops = errors = written = 0
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        try:
+            with write_lock():
+                collection.upsert(
+                    ids=[f"doc_{written + i}" for i in range(100)],
+                    documents=[f"document {written + i}" for i in range(100)],
+                    embeddings=rng.standard_normal((100, DIM), dtype=np.float32),
+                )
+            written += 100
+            ops += 1
+        except Exception as e:
+            errors += 1
+            print(f"writer error: {e!r}")
+    results.put(("writer", ops, errors, written))
+
+
+def reader(duration: float, seed: int, results) -> None:
+    """
+    Issues nearest-neighbour queries as fast as possible, like the assistant.
+    """
+    from src.vector_store.store import get_collection
+
+    collection = get_collection(create=True)
+    rng = np.random.default_rng(seed)
+    ops = errors = 0
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        try:
+            if collection.count():
+                collection.query(
+                    query_embeddings=rng.standard_normal((1, DIM), dtype=np.float32),
+                    n_results=3,
+                )
+            ops += 1
+        except Exception as e:
+            errors += 1
+            print(f"reader error: {e!r}")
+    results.put(("reader", ops, errors, 0))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Hammer the store with one refresh-like writer and many readers."
+    )
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument(
+        "--embedded", action="store_true", help="Use PersistentClient instead of a server"
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_path:
+        os.environ["CHROMA_DATA_PATH"] = data_path
+        server = None
+        if not args.embedded:
+            os.environ["CHROMA_SERVER_HOST"] = "localhost"
+            os.environ["CHROMA_SERVER_PORT"] = str(args.port)
+            server = subprocess.Popen(
+                ["chroma", "run", "--path", data_path, "--port", str(args.port)],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+            _wait_for_port("localhost", args.port)
+
+        try:
+            ctx = mp.get_context("spawn")
+            results = ctx.Queue()
+            processes = [ctx.Process(target=writer, args=(args.duration, results))]
+            processes += [
+                ctx.Process(target=reader, args=(args.duration, seed, results))
+                for seed in range(args.readers)
+            ]
+            for process in processes:
+                process.start()
+            for process in processes:
+                process.join()
+
+            totals = [results.get() for _ in processes]
+            written = sum(w for _, _, _, w in totals)
+            errors = sum(e for _, _, e, _ in totals)
+            read_ops = sum(o for role, o, _, _ in totals if role == "reader")
+            write_ops = sum(o for role, o, _, _ in totals if role == "writer")
+
+            from src.vector_store.store import get_collection
+
+            final_count = get_collection().count()
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait()
+
+    mode = "embedded" if args.embedded else "server"
+    print(f"Mode: {mode}, readers: {args.readers}, duration: {args.duration}s")
+    print(f"Write batches: {write_ops} ({written} vectors), queries: {read_ops}")
+    print(f"Queries/s: {read_ops / args.duration:.0f}, errors: {errors}")
+    print(f"Final count: {final_count} (expected {written})")
+    if errors or final_count != written:
+        raise SystemExit(1)
+
+# to run
+# python -m src.benchmarks.stress_concurrent_access --readers 8 --duration 30
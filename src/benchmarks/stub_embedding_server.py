@@ -0,0 +1,106 @@
+# src/benchmarks/stub_embedding_server.py
+
+import argparse
+import base64
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from src.embeddings.fake import DEFAULT_DIM, fake_embedding
+from src.embeddings.tokens import MAX_REQUEST_INPUTS, MAX_REQUEST_TOKENS, count_tokens
+
+
+class StubEmbeddingHandler(BaseHTTPRequestHandler):
+    """
+    Serves POST /embeddings like the OpenAI API, returning deterministic fake
+    vectors after a simulated latency and rejecting requests over the input and
+    token limits with a 400, like the real endpoint.
+    """
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/embeddings"):
+            self.send_error(404)
+            return
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        inputs = body["input"] if isinstance(body["input"], list) else [body["input"]]
+        tokens = sum(count_tokens(text) for text in inputs)
+
+        server = self.server
+        with server.stats_lock:
+            server.stats["requests"] += 1
+            server.stats["inputs"] += len(inputs)
+            server.stats["max_batch"] = max(server.stats["max_batch"], len(inputs))
+        if len(inputs) > MAX_REQUEST_INPUTS or tokens > MAX_REQUEST_TOKENS:
+            self._send_json(
+                400, {"error": {"message": f"{len(inputs)} inputs, {tokens} tokens"}}
+            )
+            return
+
+        time.sleep(server.base_latency + server.per_input_latency * len(inputs))
+        dim = body.get("dimensions") or server.dim
+        data = []
+        for i, text in enumerate(inputs):
+            vector = fake_embedding(text, dim)
+            if body.get("encoding_format") == "base64":
+                embedding = base64.b64encode(vector.astype(np.float32).tobytes()).decode()
+            else:
+                embedding = vector.tolist()
+            data.append({"object": "embedding", "index": i, "embedding": embedding})
+        self._send_json(
+            200,
+            {
+                "object": "list",
+                "data": data,
+                "model": body.get("model"),
+                "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+            },
+        )
+
+    def _send_json(self, status: int, payload: dict):
+        encoded = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(encoded)))
+        self.end_headers()
+        self.wfile.write(encoded)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server(
+    port: int = 0,
+    dim: int = DEFAULT_DIM,
+    base_latency: float = 0.05,
+    per_input_latency: float = 0.0002,
+) -> ThreadingHTTPServer:
+    """
+    Starts the stub server on a background thread and returns it. Its base URL is
+    f"http://localhost:{server.server_port}/v1" and its request counters are in
+    server.stats. Call server.shutdown() to stop it.
+    """
+    server = ThreadingHTTPServer(("localhost", port), StubEmbeddingHandler)
+    server.dim = dim
+    server.base_latency = base_latency
+    server.per_input_latency = per_input_latency
+    server.stats = {"requests": 0, "inputs": 0, "max_batch": 0}
+    server.stats_lock = threading.Lock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a local stub OpenAI embeddings API.")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--dim", type=int, default=DEFAULT_DIM)
+    args = parser.parse_args()
+
+    server = start_stub_server(args.port, args.dim)
+    print(f"Stub embedding server on http://localhost:{server.server_port}/v1")
+    threading.Event().wait()
+
+# to run
+# python -m src.benchmarks.stub_embedding_server --port 8099
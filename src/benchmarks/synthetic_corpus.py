@@ -0,0 +1,106 @@
+# src/benchmarks/synthetic_corpus.py
+
+import random
+from typing import Iterator
+
+from src.loaders.models.models import BlogPost, ChangeLog, CodeAssistantCompany, DocsPage
+
+# Share of each document type in the generated corpus, roughly that of the real one.
+DOC_TYPE_MIX = {"changelog": 0.4, "blog_post": 0.2, "docs_page": 0.4}
+
+FEATURES = (
+    "autocomplete chat agent cascade composer inline-edit terminal-commands "
+    "codebase-indexing mcp-servers rules memories web-search lint-fixes "
+    "multi-file-edits tab-completion model-picker workspace-context"
+).split()
+VERBS = "added improved fixed removed reworked sped-up enabled deprecated".split()
+WORDS = (
+    "the a for in with to of and when now users can our model faster context files "
+    "editor support large repositories settings enterprise teams latency tokens "
+    "suggestions results request response languages python typescript rust go"
+).split()
+COMPANIES = [CodeAssistantCompany.CODEIUM_ENTERPRISE, CodeAssistantCompany.CURSOR_ENTERPRISE]
+
+
+def _sentence(rng: random.Random) -> str:
+    words = [rng.choice(WORDS) for _ in range(rng.randint(8, 20))]
+    words.insert(rng.randrange(len(words)), rng.choice(FEATURES))
+    return " ".join(words).capitalize() + "."
+
+
+def _paragraphs(rng: random.Random, sections: int) -> str:
+    lines = []
+    for _ in range(sections):
+        lines.append(f"{rng.choice(FEATURES).replace('-', ' ').title()}")
+        lines.extend(" ".join(_sentence(rng) for _ in range(4)) for _ in range(rng.randint(1, 3)))
+    return "\n".join(lines)
+
+
+def _date(rng: random.Random) -> str:
+    return f"{rng.randint(2022, 2025)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+
+
+def synthetic_changelog(i: int, rng: random.Random) -> ChangeLog:
+    company = COMPANIES[i % len(COMPANIES)]
+    version = f"{i // 1000}.{i // 10 % 100}.{i % 10}"
+    title = f"{rng.choice(VERBS).replace('-', ' ').capitalize()} {rng.choice(FEATURES)}"
+    changes = "\n".join(
+        f"{rng.choice(VERBS).replace('-', ' ').capitalize()} {_sentence(rng)}"
+        for _ in range(rng.randint(3, 12))
+    )
+    return ChangeLog(
+        version=version,
+        index=i,
+        title=title,
+        date=_date(rng),
+        changes=f"{title}\n{changes}",
+        company=company,
+        unique_id=f"{company.value}_{version}_synthetic_{i}",
+    )
+
+
+def synthetic_blog_post(i: int, rng: random.Random) -> BlogPost:
+    company = COMPANIES[i % len(COMPANIES)]
+    url = f"https://example.com/{company.value.lower()}/blog/post-{i}"
+    return BlogPost(
+        url=url,
+        title=f"How {rng.choice(FEATURES)} works, part {i}",
+        date=_date(rng),
+        content=_paragraphs(rng, rng.randint(4, 10)),
+        company=company,
+        unique_id=f"{company.value}_{url}",
+    )
+
+
+def synthetic_docs_page(i: int, rng: random.Random) -> DocsPage:
+    company = COMPANIES[i % len(COMPANIES)]
+    url = f"https://docs.example.com/{company.value.lower()}/page-{i}"
+    title = f"{rng.choice(FEATURES).replace('-', ' ').title()} reference {i}"
+    return DocsPage(
+        url=url,
+        title=title,
+        company=company,
+        content=_paragraphs(rng, rng.randint(2, 6)),
+        unique_id=url,
+    )
+
+
+GENERATORS = {
+    "changelog": synthetic_changelog,
+    "blog_post": synthetic_blog_post,
+    "docs_page": synthetic_docs_page,
+}
+
+
+def synthetic_records(n: int, start: int = 0, seed: int = 0) -> Iterator:
+    """
+    Yields records start..n-1 of a deterministic synthetic corpus of ChangeLog,
+    BlogPost and DocsPage records mixed per DOC_TYPE_MIX. Record i is the same for
+    a given seed however the corpus is sliced, so a corpus can be grown in steps.
+    """
+    doc_types = list(DOC_TYPE_MIX)
+    weights = list(DOC_TYPE_MIX.values())
+    for i in range(start, n):
+        rng = random.Random(seed * 1_000_003 + i)
+        doc_type = rng.choices(doc_types, weights)[0]
+        yield GENERATORS[doc_type](i, rng)
@@ -0,0 +1,168 @@
+# src/corpus/chunking.py
+
+import os
+import re
+from typing import Iterator
+
+from src.embeddings.tokens import EMBEDDING_MODEL, get_encoding
+
+# Chunking settings. When enabled, blog posts, docs pages and changelogs are stored
+# as token-bounded chunks instead of one document each.
+CHUNKING_ENABLED = os.environ.get("CHUNKING", "0") == "1"
+CHUNK_MAX_TOKENS = int(os.environ.get("CHUNK_MAX_TOKENS", "512"))
+CHUNK_OVERLAP_TOKENS = int(os.environ.get("CHUNK_OVERLAP_TOKENS", "64"))
+
+# How many chunk hits to fetch per requested result, so that collapsing several
+# chunks of the same parent still leaves enough distinct documents.
+CHUNK_OVERSAMPLE = 4
+
+# The loaders flatten HTML with get_text(separator="\n"), so headings end up as short
+# lines without closing punctuation. Those are preferred places to start a chunk.
+HEADING_REGEX = re.compile(r"^[^\n]{1,80}(?<![.,;:!?])$")
+
+
+def chunk_id(parent_id: str, index: int) -> str:
+    """
+    Returns the stable id of a parent's index-th chunk.
+    """
+    return f"{parent_id}#chunk-{index}"
+
+
+def parent_id_of(id_: str) -> str:
+    """
+    Returns the id of the record a stored id belongs to (the id itself if it is not
+    a chunk).
+    """
+    return id_.split("#chunk-")[0]
+
+
+def _split_long_line(line: str, max_tokens: int, model_name: str) -> list[tuple[str, int]]:
+    encoding = get_encoding(model_name)
+    tokens = encoding.encode(line, disallowed_special=())
+    return [
+        (encoding.decode(tokens[start : start + max_tokens]), len(tokens[start : start + max_tokens]))
+        for start in range(0, len(tokens), max_tokens)
+    ]
+
+
+def chunk_text(
+    text: str,
+    max_tokens: int = CHUNK_MAX_TOKENS,
+    overlap_tokens: int = CHUNK_OVERLAP_TOKENS,
+    model_name: str = EMBEDDING_MODEL,
+) -> Iterator[str]:
+    """
+    Splits text into chunks of at most max_tokens tokens, yielding them lazily.
+
+    Chunks are built from whole lines (paragraphs and headings). A new chunk is
+    started early at a heading once the current chunk is at least half full, and
+    the last lines of each chunk, up to overlap_tokens, are repeated at the start
+    of the next one. Lines longer than max_tokens are split on token boundaries.
+    The newlines joining a chunk's lines count towards its size. Text that is
+    empty after stripping yields no chunks.
+    """
+    encoding = get_encoding(model_name)
+    separator_tokens = len(encoding.encode("\n"))
+    units = []
+    for line in text.split("\n"):
+        line = line.strip()
+        if not line:
+            continue
+        tokens = len(encoding.encode(line, disallowed_special=()))
+        if tokens > max_tokens:
+            units.extend(_split_long_line(line, max_tokens, model_name))
+        else:
+            units.append((line, tokens))
+
+    chunk, chunk_tokens = [], 0
+    for line, tokens in units:
+        full = chunk_tokens + separator_tokens + tokens > max_tokens
+        at_heading = chunk_tokens >= max_tokens // 2 and HEADING_REGEX.match(line)
+        if chunk and (full or at_heading):
+            yield "\n".join(unit_text for unit_text, _ in chunk)
+            # Carry the tail of the finished chunk over as overlap.
+            overlap, overlap_size = [], 0
+            for unit in reversed(chunk):
+                size = unit[1] + (separator_tokens if overlap else 0)
+                if overlap_size + size > overlap_tokens:
+                    break
+                overlap.insert(0, unit)
+                overlap_size += size
+            if overlap and overlap_size + separator_tokens + tokens > max_tokens:
+                overlap, overlap_size = [], 0
+            chunk, chunk_tokens = overlap, overlap_size
+        chunk_tokens += tokens + (separator_tokens if chunk else 0)
+        chunk.append((line, tokens))
+    if chunk:
+        yield "\n".join(unit_text for unit_text, _ in chunk)
+
+
+def chunk_record(parent_id: str, document: str, metadata: dict, **chunk_kwargs):
+    """
+    Yields the (id, document, metadata) triples of a record's chunks. Each chunk
+    keeps its parent's metadata plus 'parent_id' and 'chunk_index'.
+    """
+    for index, text in enumerate(chunk_text(document, **chunk_kwargs)):
+        yield (
+            chunk_id(parent_id, index),
+            text,
+            {**metadata, "parent_id": parent_id, "chunk_index": index},
+        )
+
+
+def join_chunks(chunks: list[str]) -> str:
+    """
+    Rebuilds a document from its chunks in order, dropping the lines each chunk
+    repeats from the end of the previous one as overlap.
+    """
+    lines = []
+    for chunk in chunks:
+        chunk_lines = chunk.split("\n")
+        overlap = 0
+        for size in range(min(len(lines), len(chunk_lines)), 0, -1):
+            if lines[-size:] == chunk_lines[:size]:
+                overlap = size
+                break
+        lines += chunk_lines[overlap:]
+    return "\n".join(lines)
+
+
+def chunking_signature() -> str:
+    """
+    Returns a string describing the chunking settings. It is folded into each
+    record's content hash, so changing the settings re-chunks the corpus.
+    """
+    return f"{CHUNK_MAX_TOKENS}/{CHUNK_OVERLAP_TOKENS}"
+
+
+def collapse_chunks(hits: list[dict], n_results: int) -> list[dict]:
+    """
+    Collapses chunk hits into one hit per parent document, ranked by the parent's
+    closest chunk. The parent's matched chunks are joined in document order, so the
+    agent sees the relevant passages instead of the whole document. Hits without a
+    parent_id are returned unchanged.
+    """
+    parents = {}
+    for hit in sorted(hits, key=lambda hit: hit["distance"]):
+        metadata = hit["metadata"] or {}
+        parent_id = metadata.get("parent_id", hit["id"])
+        parents.setdefault(parent_id, []).append(hit)
+
+    collapsed = []
+    for parent_id, group in list(parents.items())[:n_results]:
+        if len(group) == 1 and "parent_id" not in (group[0]["metadata"] or {}):
+            collapsed.append(group[0])
+            continue
+        ordered = sorted(group, key=lambda hit: hit["metadata"].get("chunk_index", 0))
+        metadata = {
+            k: v for k, v in group[0]["metadata"].items() if k not in ("parent_id", "chunk_index")
+        }
+        collapsed.append(
+            {
+                "id": parent_id,
+                "document": "\n...\n".join(hit["document"] for hit in ordered),
+                "metadata": metadata,
+                "distance": group[0]["distance"],
+            }
+        )
+    return collapsed
@@ -0,0 +1,304 @@
+# src/corpus/dedupe.py
+
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+
+import numpy as np
+
+from src.corpus.records import document_text
+from src.refresh_pipeline.metrics import measure
+from src.utils.logs import sample_ids
+
+DEDUPE_ENABLED = os.environ.get("DEDUPE", "0") == "1"
+DEFAULT_DEDUPE_PATH = os.environ.get("DEDUPE_INDEX_PATH", "./cache/dedupe.sqlite3")
+
+# MinHash/LSH parameters. With b bands of r rows, a pair with Jaccard similarity s
+# shares a bucket with probability 1 - (1 - s^r)^b. 32 bands of 4 rows give 99.98%
+# at s = 0.7 and ~100% at the 0.8 DUPLICATE_THRESHOLD (16 x 8 only gave 61% and
+# 95%); candidates are then checked against DUPLICATE_THRESHOLD with their full
+# signatures.
+NUM_PERM = 128
+BANDS = 32
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 5
+DUPLICATE_THRESHOLD = float(os.environ.get("DEDUPE_THRESHOLD", "0.8"))
+# Texts with fewer words have too few shingles for a meaningful similarity (below
+# SHINGLE_SIZE words a text is a single shingle), so they are never deduplicated.
+MIN_WORDS = int(os.environ.get("DEDUPE_MIN_WORDS", "20"))
+
+_PRIME = np.uint64((1 << 31) - 1)
+_rng = np.random.default_rng(42)
+_A = _rng.integers(1, _PRIME, NUM_PERM, dtype=np.uint64)
+_B = _rng.integers(0, _PRIME, NUM_PERM, dtype=np.uint64)
+_WORD_REGEX = re.compile(r"\w+")
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> np.ndarray:
+    """
+    Returns the crc32 hashes of the text's lowercased word n-grams.
+    """
+    words = _WORD_REGEX.findall(text.lower())
+    if len(words) < size:
+        grams = [" ".join(words)]
+    else:
+        grams = [" ".join(words[i : i + size]) for i in range(len(words) - size + 1)]
+    return np.unique(
+        np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64)
+    )
+
+
+def minhash(text: str) -> np.ndarray:
+    """
+    Returns the NUM_PERM-value MinHash signature of a text. The hash family is
+    (a * x + b) mod (2^31 - 1) over 32-bit shingle hashes, which stays within
+    uint64 without overflow.
+    """
+    hashes = shingles(text)
+    return ((np.outer(_A, hashes) + _B[:, None]) % _PRIME).min(axis=1).astype(np.uint32)
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """
+    Estimates the Jaccard similarity of two texts from their signatures.
+    """
+    return float((a == b).mean())
+
+
+def band_keys(signature: np.ndarray) -> list[str]:
+    """
+    Returns the LSH bucket key of each band of a signature.
+    """
+    return [
+        signature[band * ROWS : (band + 1) * ROWS].tobytes().hex() for band in range(BANDS)
+    ]
+
+
+class DedupeIndex:
+    """
+    Persistent MinHash/LSH index of the representatives stored in the collection,
+    plus the aliases that were folded into them.
+
+    Finding duplicates only compares records that share an LSH bucket, so the cost
+    grows with the number of near-duplicates rather than quadratically with the
+    corpus.
+    """
+
+    def __init__(self, path: str = DEFAULT_DEDUPE_PATH):
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS signatures (id TEXT PRIMARY KEY, signature BLOB NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS buckets (band INTEGER, key TEXT, id TEXT,"
+            " PRIMARY KEY (band, key, id))"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS aliases (alias_id TEXT PRIMARY KEY, representative_id TEXT)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS aliases_representative ON aliases (representative_id)"
+        )
+        self._conn.execute("CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value)")
+        self._conn.commit()
+        self._rebuild_buckets_if_needed()
+
+    def _rebuild_buckets_if_needed(self) -> None:
+        """
+        Re-buckets the stored signatures if the index was built with another number
+        of bands, so representatives stored before a change are still found.
+        """
+        row = self._conn.execute("SELECT value FROM settings WHERE key = 'bands'").fetchone()
+        if row is not None and row[0] == BANDS:
+            return
+        signatures = self._conn.execute("SELECT id, signature FROM signatures").fetchall()
+        self._conn.execute("DELETE FROM buckets")
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO buckets (band, key, id) VALUES (?, ?, ?)",
+            [
+                (band, key, id_)
+                for id_, blob in signatures
+                for band, key in enumerate(band_keys(np.frombuffer(blob, dtype=np.uint32)))
+            ],
+        )
+        self._conn.execute(
+            "INSERT OR REPLACE INTO settings (key, value) VALUES ('bands', ?)", (BANDS,)
+        )
+        self._conn.commit()
+
+    def _delete(self, ids: list[str], columns: list[tuple[str, str]]) -> None:
+        for start in range(0, len(ids), 500):
+            chunk = ids[start : start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            for table, column in columns:
+                self._conn.execute(f"DELETE FROM {table} WHERE {column} IN ({placeholders})", chunk)
+
+    def _stored_candidates(self, signature: np.ndarray) -> dict[str, np.ndarray]:
+        ids = set()
+        for band, key in enumerate(band_keys(signature)):
+            rows = self._conn.execute(
+                "SELECT id FROM buckets WHERE band = ? AND key = ?", (band, key)
+            ).fetchall()
+            ids.update(id_ for (id_,) in rows)
+        if not ids:
+            return {}
+        placeholders = ",".join("?" * len(ids))
+        rows = self._conn.execute(
+            f"SELECT id, signature FROM signatures WHERE id IN ({placeholders})", list(ids)
+        ).fetchall()
+        return {id_: np.frombuffer(blob, dtype=np.uint32) for id_, blob in rows}
+
+    def assign(self, items: list[tuple[str, str]]) -> tuple[list[str], dict[str, str]]:
+        """
+        Groups (id, text) items with their near-duplicates and returns
+        (representative_ids, aliases), where aliases maps each folded id to the id of
+        its representative.
+
+        Items that are near-duplicates of a representative already in the index are
+        folded into it, which keeps representatives stable across refreshes. Within
+        the batch, the longest text of each group becomes its representative. Items
+        shorter than MIN_WORDS words are returned as representatives without being
+        compared or indexed.
+        """
+        short = [id_ for id_, text in items if len(_WORD_REGEX.findall(text)) < MIN_WORDS]
+        items = [(id_, text) for id_, text in items if len(_WORD_REGEX.findall(text)) >= MIN_WORDS]
+        signatures = {id_: minhash(text) for id_, text in items}
+        lengths = {id_: len(text) for id_, text in items}
+
+        # Group the batch with an in-memory LSH pass and union-find.
+        parent = {id_: id_ for id_ in signatures}
+
+        def find(id_):
+            while parent[id_] != id_:
+                parent[id_] = parent[parent[id_]]
+                id_ = parent[id_]
+            return id_
+
+        buckets = {}
+        for id_, signature in signatures.items():
+            for band, key in enumerate(band_keys(signature)):
+                buckets.setdefault((band, key), []).append(id_)
+        for members in buckets.values():
+            for other in members[1:]:
+                if similarity(signatures[members[0]], signatures[other]) >= DUPLICATE_THRESHOLD:
+                    parent[find(other)] = find(members[0])
+
+        groups = {}
+        for id_ in signatures:
+            groups.setdefault(find(id_), []).append(id_)
+
+        representatives, aliases = list(short), {}
+        with self._lock:
+            for members in groups.values():
+                members.sort(key=lambda id_: (-lengths[id_], id_))
+                representative = members[0]
+
+                # Fold the group into an existing representative if there is one.
+                stored = self._stored_candidates(signatures[representative])
+                stored.pop(representative, None)
+                for stored_id, stored_signature in stored.items():
+                    if stored_id in signatures:
+                        continue
+                    if similarity(signatures[representative], stored_signature) >= DUPLICATE_THRESHOLD:
+                        representative = stored_id
+                        break
+                else:
+                    representatives.append(representative)
+                    self._delete([representative], [("buckets", "id"), ("aliases", "alias_id")])
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO signatures (id, signature) VALUES (?, ?)",
+                        (representative, signatures[representative].tobytes()),
+                    )
+                    self._conn.executemany(
+                        "INSERT OR IGNORE INTO buckets (band, key, id) VALUES (?, ?, ?)",
+                        [
+                            (band, key, representative)
+                            for band, key in enumerate(band_keys(signatures[representative]))
+                        ],
+                    )
+
+                for member in members:
+                    if member != representative:
+                        aliases[member] = representative
+            # Ids that became aliases stop being representatives.
+            self._delete(list(aliases), [("signatures", "id"), ("buckets", "id")])
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO aliases (alias_id, representative_id) VALUES (?, ?)",
+                list(aliases.items()),
+            )
+            self._conn.commit()
+        return representatives, aliases
+
+    def forget(self, ids: list[str]) -> None:
+        """
+        Removes representatives (e.g. records deleted upstream) and their aliases, so
+        the next refresh picks a new representative for any remaining duplicates.
+        """
+        with self._lock:
+            self._delete(
+                ids,
+                [
+                    ("signatures", "id"),
+                    ("buckets", "id"),
+                    ("aliases", "representative_id"),
+                    ("aliases", "alias_id"),
+                ],
+            )
+            self._conn.commit()
+
+    def aliases_of(self, representative_id: str) -> list[str]:
+        """
+        Returns the ids folded into a representative.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT alias_id FROM aliases WHERE representative_id = ?",
+                (representative_id,),
+            ).fetchall()
+        return [alias_id for (alias_id,) in rows]
+
+
+_default_index = None
+_default_index_lock = threading.Lock()
+
+
+def default_index() -> DedupeIndex:
+    """
+    Returns the process-wide index, so concurrent syncs share one connection.
+    """
+    global _default_index
+    with _default_index_lock:
+        if _default_index is None:
+            _default_index = DedupeIndex()
+        return _default_index
+
+
+def dedupe_records(records, index: DedupeIndex | None = None) -> tuple[list, dict[str, str]]:
+    """
+    Drops the near-duplicates from a list of BlogPost, ChangeLog or DocsPage records
+    and returns (representatives, aliases). Only the representatives need to be
+    embedded and stored; aliases maps each dropped record's unique_id to the id of
+    the record it duplicates.
+    """
+    by_id = {record.unique_id: record for record in records if record.unique_id}
+    start = time.perf_counter()
+    index = index or default_index()
+    with measure("dedupe", items=len(by_id)) as sample:
+        items = [(unique_id, document_text(record)) for unique_id, record in by_id.items()]
+        sample.bytes = sum(len(text.encode("utf-8")) for _, text in items)
+        _, aliases = index.assign(items)
+    print(
+        f"Deduplicated {len(by_id)} records in {(time.perf_counter() - start) * 1000:.1f} ms: "
+        f"{len(aliases)} near-duplicates folded into {len(by_id) - len(aliases)} records."
+    )
+    if aliases:
+        pairs = (f"{alias} -> {representative}" for alias, representative in aliases.items())
+        print(f"Near-duplicates: {sample_ids(pairs)}")
+    return [record for record in records if record.unique_id not in aliases], aliases
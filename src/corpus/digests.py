@@ -0,0 +1,269 @@
+# src/corpus/digests.py
+
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.corpus.chunking import join_chunks
+from src.refresh_pipeline.metrics import measure
+from src.vector_store.store import bump_last_update_date, write_lock
+
+# Refresh-time digests. With DIGESTS=1 the refresh writes a compact digest of every
+# new or changed document (key features, versions and dates) into its metadata,
+# and the assistant shows the LLM digests instead of whole documents. The
+# summarizer is pluggable: 'extractive' is rule-based and runs offline, 'openai'
+# asks DIGEST_MODEL for the digest.
+DIGESTS_ENABLED = os.environ.get("DIGESTS", "0") == "1"
+DIGEST_SUMMARIZER = os.environ.get("DIGEST_SUMMARIZER", "extractive")
+DIGEST_MODEL = os.environ.get("DIGEST_MODEL", "gpt-4o-mini")
+DIGEST_WORKERS = int(os.environ.get("DIGEST_WORKERS", "4"))
+DIGEST_MAX_CHARS = int(os.environ.get("DIGEST_MAX_CHARS", "800"))
+
+# Metadata keys of the digest and of the content_hash of the document it was made
+# from. A record whose 'digest_of' differs from its 'content_hash' needs a new one.
+DIGEST_KEY = "digest"
+DIGEST_OF_KEY = "digest_of"
+
+MAX_KEY_POINTS = 6
+MAX_POINT_CHARS = 160
+_VERSION_REGEX = re.compile(r"\bv?\d+\.\d+(?:\.\d+)?\b")
+_DATE_REGEX = re.compile(
+    r"\b(?:\d{4}-\d{2}-\d{2}"
+    r"|(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\.? \d{1,2},? \d{4})\b"
+)
+_SENTENCE_REGEX = re.compile(r"(?<=[.!?])\s+")
+
+# One digest pass at a time, so sources of the same company finishing close
+# together don't summarize the same documents twice.
+_digest_lock = threading.Lock()
+
+
+def _unique(values) -> list:
+    return list(dict.fromkeys(values))
+
+
+def extractive_digest(document: str, metadata: dict) -> str:
+    """
+    Builds a digest from the document itself: its title, dates and versions, and
+    the first sentence of its leading paragraphs as key points. Deterministic and
+    free, so it is the summarizer of offline runs and benchmarks.
+    """
+    lines = [line.strip() for line in document.split("\n") if line.strip()]
+    title = metadata.get("title") or (lines[0] if lines else "")
+    header = f"{title} ({metadata.get('company', '')}, {metadata.get('doc_type', 'changelog')})"
+
+    dates = _unique(
+        ([str(metadata["date"])] if metadata.get("date") else []) + _DATE_REGEX.findall(document)
+    )[:3]
+    versions = _unique(
+        ([str(metadata["version"])] if metadata.get("version") else [])
+        + _VERSION_REGEX.findall(document)
+    )[:5]
+
+    points = []
+    for line in lines:
+        if line == title or len(line) < 20:
+            continue
+        sentence = _SENTENCE_REGEX.split(line, maxsplit=1)[0]
+        if len(sentence) > MAX_POINT_CHARS:
+            sentence = sentence[: MAX_POINT_CHARS - 3].rstrip() + "..."
+        if sentence not in points:
+            points.append(sentence)
+        if len(points) == MAX_KEY_POINTS:
+            break
+
+    parts = [header]
+    if dates:
+        parts.append(f"Dates: {', '.join(dates)}")
+    if versions:
+        parts.append(f"Versions: {', '.join(versions)}")
+    parts += [f"- {point}" for point in points]
+    return "\n".join(parts)[:DIGEST_MAX_CHARS]
+
+
+def openai_digest(document: str, metadata: dict) -> str:
+    """
+    Asks DIGEST_MODEL for the digest. The client is created on first use.
+    """
+    from src.embeddings.tokens import truncate_to_tokens
+
+    response = _openai_client().chat.completions.create(
+        model=DIGEST_MODEL,
+        temperature=0,
+        max_tokens=250,
+        messages=[
+            {
+                "role": "system",
+                "content": (
+                    "Write a compact digest of the document for a retrieval index: one "
+                    "line saying what it is, then short bullet points with its key "
+                    "features, versions and dates. At most 100 words, no preamble."
+                ),
+            },
+            {
+                "role": "user",
+                "content": (
+                    f"{metadata.get('company', '')} {metadata.get('doc_type', 'changelog')}: "
+                    f"{metadata.get('title', '')}\n\n{truncate_to_tokens(document, 6000)}"
+                ),
+            },
+        ],
+    )
+    return response.choices[0].message.content.strip()[:DIGEST_MAX_CHARS]
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def _openai_client():
+    global _client
+    with _client_lock:
+        if _client is None:
+            from openai import OpenAI
+
+            from src.utils.secrets import get_secret
+
+            _client = OpenAI(api_key=get_secret("openai-api-key"))
+        return _client
+
+
+# Each summarizer is called as summarizer(document, metadata) and returns the digest.
+SUMMARIZERS = {
+    "extractive": extractive_digest,
+    "openai": openai_digest,
+}
+
+
+def get_summarizer(name: str = DIGEST_SUMMARIZER):
+    if name not in SUMMARIZERS:
+        raise ValueError(f"Unknown summarizer {name!r}, expected one of {list(SUMMARIZERS)}")
+    return SUMMARIZERS[name]
+
+
+def pending_digests(collection, scopes: set[tuple[str, str]] | None = None) -> dict:
+    """
+    Returns {parent_id: [stored ids]} for the documents of the given (company,
+    doc_type) scopes (all of them when omitted) whose digest is missing or was
+    made from an older version of the document. Every chunk of such a document is
+    listed, so the whole document is digested again.
+    """
+    where = (
+        {"company": {"$in": sorted({company for company, _ in scopes})}} if scopes else None
+    )
+    stored = collection.get(where=where, include=["metadatas"])
+    ids_by_parent = {}
+    pending = set()
+    for id_, metadata in zip(stored["ids"], stored["metadatas"]):
+        metadata = metadata or {}
+        if scopes and (metadata.get("company"), metadata.get("doc_type", "changelog")) not in scopes:
+            continue
+        parent_id = metadata.get("parent_id", id_)
+        ids_by_parent.setdefault(parent_id, []).append(id_)
+        if metadata.get(DIGEST_OF_KEY) != metadata.get("content_hash"):
+            pending.add(parent_id)
+    return {parent_id: ids_by_parent[parent_id] for parent_id in pending}
+
+
+def _load_documents(collection, pending: dict) -> list[tuple[str, list[str], str, dict]]:
+    """
+    Fetches the pending documents, returning (parent_id, ids, document, metadata)
+    with chunked documents joined back together.
+    """
+    ids = [id_ for chunk_ids in pending.values() for id_ in chunk_ids]
+    documents, metadatas = {}, {}
+    for start in range(0, len(ids), 500):
+        page = collection.get(ids=ids[start : start + 500], include=["documents", "metadatas"])
+        for id_, document, metadata in zip(page["ids"], page["documents"], page["metadatas"]):
+            documents[id_] = document
+            metadatas[id_] = metadata or {}
+
+    loaded = []
+    for parent_id, chunk_ids in pending.items():
+        chunk_ids = sorted(
+            (id_ for id_ in chunk_ids if id_ in documents),
+            key=lambda id_: metadatas[id_].get("chunk_index", 0),
+        )
+        if chunk_ids:
+            document = join_chunks([documents[id_] for id_ in chunk_ids])
+            loaded.append((parent_id, chunk_ids, document, metadatas[chunk_ids[0]]))
+    return loaded
+
+
+def digest_collection(
+    collection,
+    scopes: set[tuple[str, str]] | None = None,
+    summarizer=None,
+    max_workers: int = DIGEST_WORKERS,
+) -> dict:
+    """
+    Writes a digest into the metadata of every document of the collection (within
+    scopes) that doesn't have an up-to-date one, summarizing up to max_workers
+    documents at a time. Each document's digest is written to all of its chunks.
+
+    A document that changes while its digest is being made gets a digest stamped
+    with the old content_hash, so the next pass makes it again. Returns the number
+    of documents digested and failed.
+    """
+    summarizer = summarizer or get_summarizer()
+    with _digest_lock:
+        pending = pending_digests(collection, scopes)
+        if not pending:
+            return {"digested": 0, "failed": 0}
+        documents = _load_documents(collection, pending)
+
+        def digest(item):
+            parent_id, ids, document, metadata = item
+            # Each document is measured as one call of the 'digest' refresh stage.
+            with measure("digest") as sample:
+                sample.bytes = len(document.encode("utf-8"))
+                try:
+                    return ids, summarizer(document, metadata), metadata.get("content_hash")
+                except Exception as e:
+                    print(f"Digest of {parent_id} failed: {e!r}")
+                    return ids, None, None
+
+        start = time.perf_counter()
+        digested = failed = 0
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for ids, digest_text, content_hash in executor.map(digest, documents):
+                if digest_text is None:
+                    failed += 1
+                    continue
+                # Updating metadata merges the given keys into what is stored.
+                with write_lock():
+                    collection.update(
+                        ids=ids,
+                        metadatas=[{DIGEST_KEY: digest_text, DIGEST_OF_KEY: content_hash}]
+                        * len(ids),
+                    )
+                digested += 1
+        if digested:
+            with write_lock():
+                bump_last_update_date(collection)
+        print(
+            f"{collection.name}: digested {digested} documents in "
+            f"{time.perf_counter() - start:.1f}s ({failed} failed)."
+        )
+        return {"digested": digested, "failed": failed}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from src.vector_store.routing import stored_collections
+
+    parser = argparse.ArgumentParser(description="Digest every stored document that lacks one.")
+    parser.add_argument("--summarizer", choices=list(SUMMARIZERS), default=DIGEST_SUMMARIZER)
+    parser.add_argument("--workers", type=int, default=DIGEST_WORKERS)
+    args = parser.parse_args()
+
+    for collection in stored_collections():
+        digest_collection(
+            collection, summarizer=get_summarizer(args.summarizer), max_workers=args.workers
+        )
+
+# to run
+# python -m src.corpus.digests --summarizer openai
@@ -0,0 +1,243 @@
+# src/corpus/parquet_store.py
+
+import time
+from typing import Iterator, Optional
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+from dateutil import parser as date_parser
+
+from src.corpus.records import MODEL_BY_DOC_TYPE, doc_type_of, document_text
+
+DEFAULT_EXPORT_PATH = "./exports/corpus"
+PARTITION_COLUMNS = ["company", "doc_type"]
+
+# Columns shared by every record type. Model fields a type doesn't have are null.
+CORPUS_FIELDS = [
+    pa.field("id", pa.string()),
+    pa.field("doc_type", pa.string()),
+    pa.field("company", pa.string()),
+    pa.field("title", pa.string()),
+    pa.field("url", pa.string()),
+    pa.field("version", pa.string()),
+    pa.field("index", pa.int64()),
+    pa.field("date", pa.string()),
+    pa.field("month", pa.string()),
+    pa.field("document", pa.string()),
+    pa.field("content_hash", pa.string()),
+]
+
+
+def corpus_schema(embedding_dim: Optional[int] = None) -> pa.Schema:
+    """
+    Returns the Arrow schema of the exported corpus. When an embedding dimension is
+    given, an 'embedding' column of fixed-size float32 lists is appended.
+    """
+    fields = list(CORPUS_FIELDS)
+    if embedding_dim:
+        fields.append(pa.field("embedding", pa.list_(pa.float32(), embedding_dim)))
+    return pa.schema(fields)
+
+
+def to_month(date: Optional[str]) -> Optional[str]:
+    """
+    Normalizes the free-form dates found on the source pages to 'YYYY-MM' so the
+    corpus can be grouped by month. Returns None for missing or unparseable dates.
+    """
+    if not date:
+        return None
+    try:
+        return date_parser.parse(date).strftime("%Y-%m")
+    except (ValueError, OverflowError):
+        return None
+
+
+def _build_table(rows: dict, embeddings=None) -> pa.Table:
+    """
+    Builds a corpus table from column lists and an optional (n, dim) embedding matrix.
+    """
+    rows["month"] = [to_month(date) for date in rows["date"]]
+    if embeddings is None or len(embeddings) == 0:
+        schema = corpus_schema()
+        return pa.table([rows[field.name] for field in schema], schema=schema)
+
+    matrix = np.ascontiguousarray(embeddings, dtype=np.float32)
+    schema = corpus_schema(matrix.shape[1])
+    embedding_column = pa.FixedSizeListArray.from_arrays(
+        pa.array(matrix.reshape(-1)), matrix.shape[1]
+    )
+    columns = [rows[field.name] for field in schema if field.name != "embedding"]
+    return pa.table(columns + [embedding_column], schema=schema)
+
+
+def records_to_table(records, embeddings=None) -> pa.Table:
+    """
+    Converts a list of BlogPost, ChangeLog and DocsPage models into a corpus table.
+    Embeddings, if given, must be in the same order as the records.
+    """
+    rows = {field.name: [] for field in CORPUS_FIELDS}
+    for record in records:
+        rows["id"].append(record.unique_id)
+        rows["doc_type"].append(doc_type_of(record))
+        rows["company"].append(record.company.value)
+        rows["title"].append(record.title)
+        rows["url"].append(getattr(record, "url", None))
+        rows["version"].append(getattr(record, "version", None))
+        rows["index"].append(getattr(record, "index", None))
+        rows["date"].append(getattr(record, "date", None))
+        rows["document"].append(document_text(record))
+        rows["content_hash"].append(None)
+    return _build_table(rows, embeddings)
+
+
+def collection_to_table(
+    collection, include_embeddings: bool = False, page_size: int = 10_000
+) -> pa.Table:
+    """
+    Pages through a Chroma collection and returns its documents and metadata,
+    optionally with embeddings, as a single corpus table.
+    """
+    include = ["documents", "metadatas"]
+    if include_embeddings:
+        include.append("embeddings")
+
+    tables = []
+    offset = 0
+    while True:
+        page = collection.get(include=include, limit=page_size, offset=offset)
+        if not page["ids"]:
+            break
+
+        rows = {field.name: [] for field in CORPUS_FIELDS}
+        for id_, document, metadata in zip(
+            page["ids"], page["documents"], page["metadatas"]
+        ):
+            metadata = metadata or {}
+            rows["id"].append(id_)
+            # Records written before doc_type was stored are all changelogs.
+            rows["doc_type"].append(metadata.get("doc_type", "changelog"))
+            for name in ["company", "title", "url", "version", "index", "date"]:
+                rows[name].append(metadata.get(name))
+            rows["content_hash"].append(metadata.get("content_hash"))
+            rows["document"].append(document)
+
+        embeddings = page["embeddings"] if include_embeddings else None
+        tables.append(_build_table(rows, embeddings))
+        offset += len(page["ids"])
+
+    if not tables:
+        return corpus_schema().empty_table()
+    return pa.concat_tables(tables)
+
+
+def collections_to_table(collections, include_embeddings: bool = False) -> pa.Table:
+    """
+    Returns the corpus table of several collections, e.g. every shard of a sharded
+    store. Empty collections are skipped, since their tables have no embedding column.
+    """
+    tables = [
+        table
+        for table in (
+            collection_to_table(collection, include_embeddings=include_embeddings)
+            for collection in collections
+        )
+        if table.num_rows
+    ]
+    if not tables:
+        return corpus_schema().empty_table()
+    return pa.concat_tables(tables)
+
+
+def write_corpus(table: pa.Table, path: str = DEFAULT_EXPORT_PATH) -> None:
+    """
+    Writes a corpus table as a Parquet dataset partitioned by company and doc_type
+    (hive layout, e.g. company=Cursor_Enterprise/doc_type=changelog/part-0.parquet).
+    Existing partitions that are rewritten are replaced.
+    """
+    ds.write_dataset(
+        table,
+        path,
+        format="parquet",
+        partitioning=PARTITION_COLUMNS,
+        partitioning_flavor="hive",
+        existing_data_behavior="delete_matching",
+    )
+
+
+def open_corpus(path: str = DEFAULT_EXPORT_PATH) -> ds.Dataset:
+    """
+    Opens an exported corpus as a lazy Arrow dataset. Scans only read the columns
+    and partitions they ask for, e.g.
+
+        open_corpus().to_table(columns=["company", "month"],
+                               filter=ds.field("doc_type") == "changelog")
+    """
+    return ds.dataset(path, format="parquet", partitioning="hive")
+
+
+def embedding_matrix(table: pa.Table) -> np.ndarray:
+    """
+    Returns the 'embedding' column as an (n, dim) float32 numpy array. The array is a
+    view over the Arrow buffer when the column has a single chunk; multi-chunk
+    columns are combined first.
+    """
+    column = table.column("embedding").combine_chunks()
+    dim = column.type.list_size
+    return column.flatten().to_numpy(zero_copy_only=True).reshape(-1, dim)
+
+
+def iter_models(dataset: ds.Dataset, batch_size: int = 10_000) -> Iterator:
+    """
+    Yields BlogPost, ChangeLog and DocsPage models back out of an exported corpus,
+    one record batch at a time.
+    """
+    columns = [field.name for field in CORPUS_FIELDS if field.name != "month"]
+    for batch in dataset.to_batches(columns=columns, batch_size=batch_size):
+        for row in batch.to_pylist():
+            model = MODEL_BY_DOC_TYPE[row["doc_type"]]
+            text_field = "changes" if row["doc_type"] == "changelog" else "content"
+            values = {**row, text_field: row["document"], "unique_id": row["id"]}
+            yield model(
+                **{
+                    k: v
+                    for k, v in values.items()
+                    if k in model.model_fields and v is not None
+                }
+            )
+
+
+def changelogs_per_company_month(dataset: ds.Dataset) -> pa.Table:
+    """
+    Counts changelog entries per company and month.
+    """
+    table = dataset.to_table(
+        columns=["company", "month"], filter=ds.field("doc_type") == "changelog"
+    )
+    table = table.filter(pc.is_valid(table["month"]))
+    return table.group_by(["company", "month"]).aggregate([("month", "count")]).sort_by(
+        [("company", "ascending"), ("month", "ascending")]
+    )
+
+
+if __name__ == "__main__":
+    from src.vector_store.routing import stored_collections
+
+    # Reads through the configured client and layout, so the export covers every
+    # shard of a sharded store, and a remote Chroma server as well as a local one.
+    start = time.perf_counter()
+    table = collections_to_table(stored_collections(), include_embeddings=True)
+    write_corpus(table)
+    print(
+        f"Exported {table.num_rows} records to {DEFAULT_EXPORT_PATH} "
+        f"in {time.perf_counter() - start:.2f}s"
+    )
+
+    start = time.perf_counter()
+    counts = changelogs_per_company_month(open_corpus())
+    print(f"Scanned corpus in {time.perf_counter() - start:.3f}s")
+    print(counts.to_pylist())
+
+# to run
+# python -m src.corpus.parquet_store
@@ -0,0 +1,29 @@
+# src/corpus/records.py
+
+from src.loaders.models.models import BlogPost, ChangeLog, DocsPage
+
+# Maps the 'doc_type' stored in the collection metadata to its model.
+MODEL_BY_DOC_TYPE = {
+    "blog_post": BlogPost,
+    "changelog": ChangeLog,
+    "docs_page": DocsPage,
+}
+
+DOC_TYPE_BY_MODEL = {model: doc_type for doc_type, model in MODEL_BY_DOC_TYPE.items()}
+
+
+def doc_type_of(record) -> str:
+    """
+    Returns the doc_type string for a BlogPost, ChangeLog or DocsPage.
+    """
+    return DOC_TYPE_BY_MODEL[type(record)]
+
+
+def document_text(record) -> str:
+    """
+    Returns the text that is embedded for a record: the 'changes' of a changelog
+    and the 'content' of blog posts and docs pages.
+    """
+    if isinstance(record, ChangeLog):
+        return record.changes
+    return record.content
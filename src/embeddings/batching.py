@@ -0,0 +1,161 @@
+# src/embeddings/batching.py
+
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from src.embeddings.budget import (
+    MAX_RATE_LIMIT_RETRIES,
+    billable_tokens,
+    is_rate_limited,
+    rate_limiter,
+)
+from src.embeddings.tokens import (
+    EMBEDDING_MODEL,
+    MAX_INPUT_TOKENS,
+    MAX_REQUEST_INPUTS,
+    MAX_REQUEST_TOKENS,
+    count_tokens,
+    truncate_to_tokens,
+)
+from src.refresh_pipeline.metrics import measure
+
+DEFAULT_MAX_WORKERS = 4
+
+
+def make_batches(
+    token_counts: list[int],
+    max_inputs: int = MAX_REQUEST_INPUTS,
+    max_tokens: int = MAX_REQUEST_TOKENS,
+) -> list[list[int]]:
+    """
+    Splits inputs into consecutive batches of indices that stay within both the
+    per-request input count and the per-request token total.
+    """
+    batches = []
+    batch, batch_tokens = [], 0
+    for i, tokens in enumerate(token_counts):
+        if batch and (len(batch) >= max_inputs or batch_tokens + tokens > max_tokens):
+            batches.append(batch)
+            batch, batch_tokens = [], 0
+        batch.append(i)
+        batch_tokens += tokens
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def prepare_inputs(
+    documents: list[str],
+    model_name: str = EMBEDDING_MODEL,
+    token_counts: list[int] | None = None,
+) -> tuple[list[str], list[int]]:
+    """
+    Returns the documents truncated to the per-input token limit and their token
+    counts. Documents are only tokenized if their token_counts aren't given.
+    """
+    if token_counts is None:
+        token_counts = [count_tokens(document, model_name) for document in documents]
+    texts, prepared_counts = [], []
+    for document, tokens in zip(documents, token_counts):
+        if tokens > MAX_INPUT_TOKENS:
+            print(f"Truncating document of {tokens} tokens to {MAX_INPUT_TOKENS}.")
+            document = truncate_to_tokens(document, MAX_INPUT_TOKENS, model_name)
+            tokens = MAX_INPUT_TOKENS
+        texts.append(document)
+        prepared_counts.append(tokens)
+    return texts, prepared_counts
+
+
+def embed_in_batches(
+    embedding_function,
+    documents: list[str],
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    on_batch=None,
+    model_name: str = EMBEDDING_MODEL,
+    token_counts: list[int] | None = None,
+) -> list:
+    """
+    Embeds documents in size- and token-bounded batches, running up to max_workers
+    embedding requests at the same time. Returns the embeddings in input order.
+
+    If on_batch is given it is called as on_batch(indices, embeddings) from the
+    calling thread as soon as each batch finishes, so results can be written while
+    later batches are still being embedded. token_counts, if the caller has
+    already counted the documents' tokens, avoids tokenizing them again.
+    """
+    texts, token_counts = prepare_inputs(documents, model_name, token_counts)
+    batches = make_batches(token_counts)
+    embeddings = [None] * len(texts)
+
+    # Requests wait for their billable tokens in the per-minute budget, so a large
+    # backfill is paced instead of running into the API's rate limit.
+    billable = billable_tokens(embedding_function, texts, token_counts)
+    limiter = rate_limiter()
+
+    def embed_batch(batch):
+        limiter.acquire(sum(billable[i] for i in batch))
+        # Each request is measured as one call of the 'embed' refresh stage.
+        with measure("embed", items=len(batch)) as sample:
+            sample.tokens = sum(token_counts[i] for i in batch)
+            for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+                try:
+                    return embedding_function([texts[i] for i in batch])
+                except Exception as e:
+                    if not is_rate_limited(e) or attempt == MAX_RATE_LIMIT_RETRIES:
+                        raise
+                    print(f"Embedding request rate limited, retrying in {2**attempt}s.")
+                    time.sleep(2**attempt)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = {executor.submit(embed_batch, batch): batch for batch in batches}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                batch = pending.pop(future)
+                batch_embeddings = future.result()
+                for i, embedding in zip(batch, batch_embeddings):
+                    embeddings[i] = embedding
+                if on_batch is not None:
+                    on_batch(batch, batch_embeddings)
+
+    print(
+        f"Embedded {len(texts)} documents ({sum(token_counts)} tokens) in "
+        f"{len(batches)} batches in {time.perf_counter() - start:.2f}s."
+    )
+    return embeddings
+
+
+def embed_and_upsert(
+    collection,
+    ids: list[str],
+    documents: list[str],
+    metadatas: list[dict],
+    embedding_function,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    token_counts: list[int] | None = None,
+) -> int:
+    """
+    Embeds documents with embed_in_batches and upserts each batch into the collection
+    as soon as it is embedded, with precomputed embeddings so the collection's own
+    embedding function is never called. Returns the number of records written.
+    """
+
+    def write_batch(batch, batch_embeddings):
+        with measure("write", items=len(batch)) as sample:
+            sample.bytes = sum(len(documents[i].encode("utf-8")) for i in batch)
+            collection.upsert(
+                ids=[ids[i] for i in batch],
+                documents=[documents[i] for i in batch],
+                metadatas=[metadatas[i] for i in batch],
+                embeddings=batch_embeddings,
+            )
+
+    embed_in_batches(
+        embedding_function,
+        documents,
+        max_workers=max_workers,
+        on_batch=write_batch,
+        token_counts=token_counts,
+    )
+    return len(ids)
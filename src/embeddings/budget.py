@@ -0,0 +1,309 @@
+# src/embeddings/budget.py
+
+import os
+import sqlite3
+import threading
+import time
+
+from src.embeddings.tokens import EMBEDDING_MODEL, MAX_INPUT_TOKENS, count_tokens
+
+# Embedding token budgets. The run budget caps the tokens one refresh run sends to
+# the embedding API (0 means unlimited); records that don't fit are deferred to the
+# next run. The per-minute budget paces requests to stay under the API's rate limit.
+RUN_TOKEN_BUDGET = int(os.environ.get("EMBEDDING_RUN_TOKEN_BUDGET", "0"))
+TOKENS_PER_MINUTE = int(os.environ.get("EMBEDDING_TOKENS_PER_MINUTE", "1000000"))
+PRICE_PER_MILLION_TOKENS = float(os.environ.get("EMBEDDING_PRICE_PER_MILLION_TOKENS", "0.02"))
+DEFAULT_BACKLOG_PATH = os.environ.get(
+    "EMBEDDING_BACKLOG_PATH", "./cache/embedding_backlog.sqlite3"
+)
+
+# Retries of a request the API rejected with 429, with exponential backoff.
+MAX_RATE_LIMIT_RETRIES = 5
+
+
+def projected_cost(tokens: int) -> float:
+    """
+    Returns the projected price in USD of embedding the given number of tokens.
+    """
+    return tokens / 1_000_000 * PRICE_PER_MILLION_TOKENS
+
+
+def billable_tokens(embedding_function, texts: list[str], token_counts: list[int]) -> list[int]:
+    """
+    Returns the token counts of texts with 0 for the ones the embedding function
+    serves from its cache, since those are never sent to the API, and for every
+    text if the embedding function doesn't call a paid API at all.
+    """
+    if not getattr(embedding_function, "billable", True):
+        return [0] * len(texts)
+    cached_mask = getattr(embedding_function, "cached_mask", None)
+    if cached_mask is None:
+        return list(token_counts)
+    return [0 if cached else tokens for cached, tokens in zip(cached_mask(texts), token_counts)]
+
+
+def is_rate_limited(error: Exception) -> bool:
+    """
+    Whether an embedding request failed because the API rate limited it (HTTP 429).
+    """
+    return getattr(error, "status_code", None) == 429 or type(error).__name__ == "RateLimitError"
+
+
+class TokenRateLimiter:
+    """
+    Token bucket holding up to tokens_per_minute tokens, refilled continuously.
+    Requests reserve their tokens before they are sent; a request larger than the
+    bucket waits until it is full. tokens_per_minute=0 disables pacing.
+    """
+
+    def __init__(self, tokens_per_minute: int = TOKENS_PER_MINUTE):
+        self.tokens_per_minute = tokens_per_minute
+        self._available = float(tokens_per_minute)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.waited_s = 0.0
+
+    def reserve(self, tokens: int) -> float:
+        """
+        Reserves tokens and returns 0 if they are available; otherwise reserves
+        nothing and returns how many seconds to wait before trying again.
+        """
+        if self.tokens_per_minute <= 0 or tokens <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            rate = self.tokens_per_minute / 60
+            self._available = min(
+                self.tokens_per_minute, self._available + (now - self._updated) * rate
+            )
+            self._updated = now
+            needed = min(tokens, self.tokens_per_minute)
+            if self._available >= needed:
+                self._available -= tokens
+                return 0.0
+            return (needed - self._available) / rate
+
+    def acquire(self, tokens: int) -> None:
+        """
+        Blocks until tokens are reserved.
+        """
+        while (delay := self.reserve(tokens)) > 0:
+            self.waited_s += delay
+            time.sleep(delay)
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def rate_limiter() -> TokenRateLimiter:
+    """
+    Returns the process-wide rate limiter, shared by every embedding request so
+    concurrent syncs stay under one per-minute budget together.
+    """
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = TokenRateLimiter()
+        return _limiter
+
+
+class EmbeddingBacklog:
+    """
+    Records deferred by a run's token budget, stored in SQLite so the next run
+    embeds them before anything else. Each row keeps the (company, doc_type) of its
+    record, so a sync can drop the rows of its scope that it no longer defers.
+    """
+
+    def __init__(self, path: str = DEFAULT_BACKLOG_PATH):
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS deferred ("
+            " id TEXT PRIMARY KEY,"
+            " tokens INTEGER NOT NULL,"
+            " first_deferred_at REAL NOT NULL,"
+            " times_deferred INTEGER NOT NULL,"
+            " company TEXT,"
+            " doc_type TEXT)"
+        )
+        # Backlogs written before scopes were recorded lack these columns.
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(deferred)")}
+        for column in ("company", "doc_type"):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE deferred ADD COLUMN {column} TEXT")
+        self._conn.commit()
+
+    def defer(
+        self,
+        tokens_by_id: dict[str, int],
+        scopes: dict[str, tuple[str, str]] | None = None,
+    ) -> None:
+        scopes = scopes or {}
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO deferred"
+                " (id, tokens, first_deferred_at, times_deferred, company, doc_type)"
+                " VALUES (?, ?, ?, 1, ?, ?) ON CONFLICT (id) DO UPDATE SET"
+                " tokens = excluded.tokens, times_deferred = times_deferred + 1,"
+                " company = COALESCE(excluded.company, company),"
+                " doc_type = COALESCE(excluded.doc_type, doc_type)",
+                [
+                    (id_, tokens, time.time(), *scopes.get(id_, (None, None)))
+                    for id_, tokens in tokens_by_id.items()
+                ],
+            )
+            self._conn.commit()
+
+    def remove(self, ids: list[str]) -> None:
+        with self._lock:
+            self._conn.executemany("DELETE FROM deferred WHERE id = ?", [(id_,) for id_ in ids])
+            self._conn.commit()
+
+    def prune(
+        self,
+        pending: set[str],
+        scopes: set[tuple[str, str]] = frozenset(),
+        seen: set[str] = frozenset(),
+    ) -> int:
+        """
+        Drops the rows a sync no longer defers: every row of the synced (company,
+        doc_type) scopes whose record isn't pending, which covers records deleted
+        upstream, deduplicated away or unchanged again, and every row of the records
+        in seen that isn't pending. Returns the number of rows dropped.
+        """
+        with self._lock:
+            rows = self._conn.execute("SELECT id, company, doc_type FROM deferred").fetchall()
+            stale = [
+                (id_,)
+                for id_, company, doc_type in rows
+                if id_ not in pending and ((company, doc_type) in scopes or id_ in seen)
+            ]
+            self._conn.executemany("DELETE FROM deferred WHERE id = ?", stale)
+            self._conn.commit()
+        return len(stale)
+
+    def ids(self) -> set[str]:
+        with self._lock:
+            rows = self._conn.execute("SELECT id FROM deferred").fetchall()
+        return {id_ for (id_,) in rows}
+
+    def totals(self) -> dict:
+        with self._lock:
+            count, tokens = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(tokens), 0) FROM deferred"
+            ).fetchone()
+        return {"records": count, "tokens": tokens, "cost_usd": round(projected_cost(tokens), 4)}
+
+
+class TokenBudget:
+    """
+    The embedding token budget of one refresh run.
+
+    admit() pre-counts the tokens of the documents about to be embedded, projects
+    their cost and admits whole records while they fit in what is left of the run
+    budget. The rest is deferred to the backlog, and records deferred by earlier
+    runs are admitted first. Concurrent syncs share one budget, so the check
+    against what is left and the update of the totals happen under one lock.
+    """
+
+    def __init__(self, run_budget: int = RUN_TOKEN_BUDGET, backlog: EmbeddingBacklog | None = None):
+        self.run_budget = run_budget
+        self.backlog = backlog or EmbeddingBacklog()
+        self._lock = threading.Lock()
+        self.spent = 0
+        self.deferred = 0
+        self.projected = 0
+
+    def remaining(self) -> float:
+        return self.run_budget - self.spent if self.run_budget > 0 else float("inf")
+
+    def admit(
+        self,
+        groups: dict[str, list[str]],
+        embedding_function=None,
+        model_name: str = EMBEDDING_MODEL,
+        token_counts: dict[str, list[int]] | None = None,
+        scopes: dict[str, tuple[str, str]] | None = None,
+    ) -> tuple[list[str], list[str]]:
+        """
+        Splits groups of documents ({record id: texts of its documents}) into
+        (admitted_ids, deferred_ids). A record's documents are admitted or deferred
+        together, so a record is never stored half re-chunked. token_counts
+        ({record id: token count of each text}) skips counting them again, and
+        scopes ({record id: (company, doc_type)}) is kept with deferred records.
+        """
+        backlog_ids = self.backlog.ids()
+        costs = {}
+        for key, texts in groups.items():
+            if token_counts is None:
+                counts = [count_tokens(text, model_name) for text in texts]
+            else:
+                counts = token_counts[key]
+            counts = [min(count, MAX_INPUT_TOKENS) for count in counts]
+            costs[key] = sum(billable_tokens(embedding_function, texts, counts))
+        total = sum(costs.values())
+
+        admitted, deferred = [], []
+        with self._lock:
+            self.projected += total
+            # Work deferred by earlier runs goes first.
+            for key in sorted(groups, key=lambda key: key not in backlog_ids):
+                if costs[key] <= self.remaining():
+                    admitted.append(key)
+                    self.spent += costs[key]
+                else:
+                    deferred.append(key)
+            self.deferred += len(deferred)
+            spent = self.spent
+
+        deferred_tokens = sum(costs[key] for key in deferred)
+        self.backlog.remove(admitted)
+        if deferred:
+            self.backlog.defer({key: costs[key] for key in deferred}, scopes)
+        print(
+            f"Token budget: {len(groups)} records need {total} tokens "
+            f"(~${projected_cost(total):.4f}); admitted {len(admitted)}, deferred "
+            f"{len(deferred)} ({deferred_tokens} tokens) to the next run. "
+            f"Run total: {spent}/{self.run_budget or 'unlimited'} tokens."
+        )
+        return admitted, deferred
+
+    def summary(self) -> dict:
+        return {
+            "run_budget": self.run_budget,
+            "projected_tokens": self.projected,
+            "admitted_tokens": self.spent,
+            "admitted_cost_usd": round(projected_cost(self.spent), 4),
+            "deferred_records": self.deferred,
+            "backlog": self.backlog.totals(),
+            "rate_limit_wait_s": round(rate_limiter().waited_s, 1),
+        }
+
+
+# The token budget of the refresh run in progress in this process, if any. Like
+# the active checkpoint, this is a plain module global read from worker threads.
+_active = None
+
+
+def activate_budget(budget: TokenBudget | None) -> None:
+    global _active
+    _active = budget
+
+
+def active_budget() -> TokenBudget | None:
+    return _active
+
+
+def start_token_budget(run_budget: int = RUN_TOKEN_BUDGET) -> TokenBudget:
+    """
+    Starts the token budget of a refresh run and makes it the active one.
+    """
+    budget = TokenBudget(run_budget)
+    activate_budget(budget)
+    backlog = budget.backlog.totals()
+    if backlog["records"]:
+        print(f"Embedding backlog from earlier runs: {backlog}")
+    return budget
@@ -0,0 +1,193 @@
+# src/embeddings/cache.py
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
+
+from src.embeddings.dimensions import reduce_embeddings
+
+DEFAULT_CACHE_PATH = os.environ.get("EMBEDDING_CACHE_PATH", "./cache/embeddings.sqlite3")
+DEFAULT_MAX_ENTRIES = int(os.environ.get("EMBEDDING_CACHE_MAX_ENTRIES", "500000"))
+
+
+def text_key(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    On-disk embedding cache in SQLite, keyed by (model_name, sha256(text)).
+
+    Vectors are stored as raw float32 blobs. Each read bumps the entry's last-used
+    time, and once the cache holds more than max_entries vectors the least
+    recently used ones are evicted. The number of entries is counted once when the
+    cache is opened and then kept up to date by put_many.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " model TEXT NOT NULL,"
+            " key TEXT NOT NULL,"
+            " vector BLOB NOT NULL,"
+            " last_used REAL NOT NULL,"
+            " PRIMARY KEY (model, key))"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)"
+        )
+        self._conn.commit()
+        (self._count,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+
+    def _existing_keys(self, model_name: str, keys: list[str]) -> set[str]:
+        found = set()
+        # Stay well under SQLite's limit on bound parameters per statement.
+        for start in range(0, len(keys), 500):
+            chunk = keys[start : start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self._conn.execute(
+                f"SELECT key FROM embeddings WHERE model = ? AND key IN ({placeholders})",
+                [model_name, *chunk],
+            ).fetchall()
+            found.update(key for (key,) in rows)
+        return found
+
+    def get_many(self, model_name: str, keys: list[str]) -> dict[str, np.ndarray]:
+        """
+        Returns the cached vectors for the given keys; missing keys are left out.
+        """
+        found = {}
+        now = time.time()
+        with self._lock:
+            # Stay well under SQLite's limit on bound parameters per statement.
+            for start in range(0, len(keys), 500):
+                chunk = keys[start : start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE model = ? AND key IN ({placeholders})",
+                    [model_name, *chunk],
+                ).fetchall()
+                for key, vector in rows:
+                    found[key] = np.frombuffer(vector, dtype=np.float32)
+            self._conn.executemany(
+                "UPDATE embeddings SET last_used = ? WHERE model = ? AND key = ?",
+                [(now, model_name, key) for key in found],
+            )
+            self._conn.commit()
+            self.hits += len(found)
+            self.misses += len(set(keys)) - len(found)
+        return found
+
+    def contains_many(self, model_name: str, keys: list[str]) -> set[str]:
+        """
+        Returns the keys that are cached, without counting a lookup or bumping
+        their last-used time.
+        """
+        with self._lock:
+            return self._existing_keys(model_name, keys)
+
+    def put_many(self, model_name: str, items: dict[str, np.ndarray]) -> None:
+        """
+        Stores vectors by key and evicts the least recently used entries if the
+        cache is over max_entries.
+        """
+        now = time.time()
+        with self._lock:
+            self._count += len(set(items) - self._existing_keys(model_name, list(items)))
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, key, vector, last_used) VALUES (?, ?, ?, ?)",
+                [
+                    (model_name, key, np.asarray(vector, dtype=np.float32).tobytes(), now)
+                    for key, vector in items.items()
+                ],
+            )
+            if self._count > self.max_entries:
+                evicted = self._conn.execute(
+                    "DELETE FROM embeddings WHERE rowid IN ("
+                    " SELECT rowid FROM embeddings ORDER BY last_used LIMIT ?)",
+                    (self._count - self.max_entries,),
+                ).rowcount
+                self._count -= evicted
+                self.evictions += evicted
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+        }
+
+
+class CachedEmbeddingFunction(EmbeddingFunction[Documents]):
+    """
+    Chroma embedding function that serves vectors from an EmbeddingCache and only
+    sends texts it hasn't seen before to the wrapped embedding function.
+
+    With dim set, the returned vectors are reduced to that many dimensions (see
+    src/embeddings/dimensions.py). The cache always holds full-size vectors, so
+    changing the dimension never requires re-embedding cached text.
+    """
+
+    def __init__(
+        self,
+        embedding_function,
+        model_name: str,
+        cache: EmbeddingCache | None = None,
+        dim: int | None = None,
+    ):
+        self.embedding_function = embedding_function
+        self.model_name = model_name
+        self.cache = cache or EmbeddingCache()
+        self.dim = dim
+
+    def __call__(self, input: Documents) -> Embeddings:
+        keys = [text_key(text) for text in input]
+        cached = self.cache.get_many(self.model_name, keys)
+
+        missing = {}
+        for key, text in zip(keys, input):
+            if key not in cached:
+                missing.setdefault(key, text)
+        if missing:
+            embedded = self.embedding_function(list(missing.values()))
+            fresh = dict(zip(missing, embedded))
+            self.cache.put_many(self.model_name, fresh)
+            cached.update(
+                {key: np.asarray(vector, dtype=np.float32) for key, vector in fresh.items()}
+            )
+        if self.dim is not None:
+            return list(reduce_embeddings([cached[key] for key in keys], self.dim))
+        return [cached[key] for key in keys]
+
+    @property
+    def billable(self) -> bool:
+        """
+        Whether the wrapped embedding function calls a paid, rate-limited API.
+        """
+        return getattr(self.embedding_function, "billable", True)
+
+    def cached_mask(self, texts: list[str]) -> list[bool]:
+        """
+        Returns whether each text is already cached, i.e. costs no embedding tokens.
+        """
+        keys = [text_key(text) for text in texts]
+        cached = self.cache.contains_many(self.model_name, keys)
+        return [key in cached for key in keys]
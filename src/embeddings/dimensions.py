@@ -0,0 +1,51 @@
+# src/embeddings/dimensions.py
+
+import os
+
+import numpy as np
+
+# text-embedding-3 models are trained so that a prefix of an embedding is itself a
+# usable embedding. Storing the first EMBEDDING_DIM dimensions (renormalized to unit
+# length) shrinks the index and speeds up queries for a small loss of recall; see
+# src/benchmarks/bench_dimensions.py for the trade-off on this corpus.
+FULL_DIM = 1536  # text-embedding-3-small
+EMBEDDING_DIM = int(os.environ.get("EMBEDDING_DIM", str(FULL_DIM)))
+
+# Collection metadata key recording the dimension of the vectors it holds.
+# Collections created before it existed hold full-size vectors.
+DIM_METADATA_KEY = "embedding_dim"
+
+
+def reduce_embeddings(vectors, dim: int = EMBEDDING_DIM) -> np.ndarray:
+    """
+    Truncates vectors to their first dim dimensions and rescales each to unit
+    length. Documents and queries must go through the same reduction for their
+    distances to be comparable. Vectors already of size dim are only renormalized.
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if dim > vectors.shape[-1]:
+        raise ValueError(f"Can't reduce {vectors.shape[-1]}-dimensional vectors to {dim}")
+    reduced = vectors[..., :dim]
+    norms = np.linalg.norm(reduced, axis=-1, keepdims=True)
+    return reduced / np.where(norms == 0, 1, norms)
+
+
+def collection_dim(collection) -> int:
+    """
+    Returns the dimension of the vectors stored in a collection.
+    """
+    return int((collection.metadata or {}).get(DIM_METADATA_KEY, FULL_DIM))
+
+
+def check_collection_dim(collection, dim: int = EMBEDDING_DIM) -> None:
+    """
+    Raises a ValueError if a collection holds vectors of another dimension than the
+    configured one. Chroma keeps a collection's metadata from when it was created,
+    so changing EMBEDDING_DIM requires migrating the stored vectors first.
+    """
+    stored = collection_dim(collection)
+    if stored != dim:
+        raise ValueError(
+            f"{collection.name} holds {stored}-dimensional vectors but EMBEDDING_DIM is "
+            f"{dim}. Run `python -m src.vector_store.dimensions --dim {dim}` to migrate it."
+        )
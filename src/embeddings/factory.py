@@ -0,0 +1,173 @@
+# src/embeddings/factory.py
+
+import os
+import threading
+
+from src.embeddings.tokens import EMBEDDING_MODEL
+
+# Embedding backends. Documents and queries are embedded with OpenAI by default,
+# with a deterministic fake when EMBEDDING_BACKEND=fake, which needs no Secret block,
+# API key or network (see src/benchmarks/bench_refresh_offline.py), or with a
+# sentence-transformers model on the CPU when EMBEDDING_BACKEND=local (see
+# src/embeddings/local.py). EMBEDDING_API_BASE points the openai backend at another
+# OpenAI-compatible endpoint.
+EMBEDDING_BACKEND = os.environ.get("EMBEDDING_BACKEND", "openai")
+EMBEDDING_API_BASE = os.environ.get("EMBEDDING_API_BASE")
+
+# Collection metadata key recording the backend a collection was embedded with.
+# Collections created before it existed were embedded with OpenAI.
+BACKEND_METADATA_KEY = "embedding_backend"
+# Backends producing text-embedding-3-style vectors that can be reduced to
+# EMBEDDING_DIM dimensions (see src/embeddings/dimensions.py).
+REDUCIBLE_BACKENDS = {"openai", "fake"}
+
+_backends = {}
+_embedding_functions = {}
+_cache = None
+_embedding_functions_lock = threading.Lock()
+
+
+def _openai_backend():
+    from chromadb.utils import embedding_functions
+
+    from src.utils.secrets import get_secret
+
+    embedding_function = embedding_functions.OpenAIEmbeddingFunction(
+        api_key=get_secret("openai-api-key"),
+        model_name=EMBEDDING_MODEL,
+        api_base=EMBEDDING_API_BASE,
+    )
+    return embedding_function, EMBEDDING_MODEL
+
+
+def _fake_backend():
+    from src.embeddings.dimensions import FULL_DIM
+    from src.embeddings.fake import FakeEmbeddingFunction
+
+    return FakeEmbeddingFunction(FULL_DIM), "fake"
+
+
+def _local_backend():
+    from src.embeddings.local import LocalEmbeddingFunction
+
+    embedding_function = LocalEmbeddingFunction()
+    return embedding_function, embedding_function.model_name
+
+
+# Each backend returns (embedding function, model name the cache files vectors under).
+BACKENDS = {
+    "openai": _openai_backend,
+    "fake": _fake_backend,
+    "local": _local_backend,
+}
+
+
+def get_embedding_function(backend: str = EMBEDDING_BACKEND, dim: int | None = None):
+    """
+    Returns the process-wide embedding function of a backend, behind the on-disk
+    embedding cache so text that was embedded before is never re-embedded. It is
+    created on first use, which is when the API key or model is loaded and chromadb
+    is imported.
+
+    Vectors of reducible backends are reduced to dim dimensions, EMBEDDING_DIM by
+    default. There is one function per (backend, dim), all sharing the backend's
+    model or client and one embedding cache.
+    """
+    global _cache
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown embedding backend {backend!r}, expected one of {list(BACKENDS)}")
+    from src.embeddings.dimensions import EMBEDDING_DIM, FULL_DIM
+
+    if backend not in REDUCIBLE_BACKENDS:
+        dim = None
+    elif dim is None:
+        dim = EMBEDDING_DIM
+    with _embedding_functions_lock:
+        if (backend, dim) not in _embedding_functions:
+            from src.embeddings.cache import CachedEmbeddingFunction, EmbeddingCache
+
+            if _cache is None:
+                _cache = EmbeddingCache()
+            if backend not in _backends:
+                _backends[backend] = BACKENDS[backend]()
+            embedding_function, model_name = _backends[backend]
+            _embedding_functions[(backend, dim)] = CachedEmbeddingFunction(
+                embedding_function,
+                model_name=model_name,
+                cache=_cache,
+                dim=None if dim == FULL_DIM else dim,
+            )
+        return _embedding_functions[(backend, dim)]
+
+
+def collection_backend(collection) -> str:
+    """
+    Returns the backend the documents of a collection were embedded with.
+    """
+    return (collection.metadata or {}).get(BACKEND_METADATA_KEY, "openai")
+
+
+def embedding_function_for(collection):
+    """
+    Returns the embedding function to query a collection with. Each collection keeps
+    the backend and dimension it was created or migrated with, whatever
+    EMBEDDING_BACKEND and EMBEDDING_DIM are set to in this process.
+    """
+    from src.embeddings.dimensions import collection_dim
+
+    return get_embedding_function(collection_backend(collection), collection_dim(collection))
+
+
+def query_embedding_function(collections):
+    """
+    Returns the embedding function to query the stored collections with, or the
+    EMBEDDING_BACKEND one if there are none yet. One query vector is compared with
+    every collection, so a ValueError is raised if they don't all hold vectors of
+    the same backend and dimension.
+    """
+    if not collections:
+        return get_embedding_function()
+    from src.embeddings.dimensions import check_collection_dim, collection_dim
+
+    backend, dim = collection_backend(collections[0]), collection_dim(collections[0])
+    for collection in collections[1:]:
+        stored = collection_backend(collection)
+        if stored != backend:
+            raise ValueError(
+                f"{collection.name} was embedded with the {stored!r} backend but "
+                f"{collections[0].name} with {backend!r}, so they can't be queried together."
+            )
+        if backend in REDUCIBLE_BACKENDS:
+            check_collection_dim(collection, dim)
+    return get_embedding_function(backend, dim)
+
+
+def collection_metadata(backend: str = EMBEDDING_BACKEND) -> dict:
+    """
+    Returns the metadata recording a backend (and, for backends that support it,
+    the embedding dimension) on the collections it creates.
+    """
+    metadata = {BACKEND_METADATA_KEY: backend}
+    if backend in REDUCIBLE_BACKENDS:
+        from src.embeddings.dimensions import DIM_METADATA_KEY, EMBEDDING_DIM
+
+        metadata[DIM_METADATA_KEY] = EMBEDDING_DIM
+    return metadata
+
+
+def check_collection(collection, backend: str = EMBEDDING_BACKEND) -> None:
+    """
+    Raises a ValueError if a collection holds vectors that documents embedded with
+    the backend can't be mixed with: another backend's, or another dimension's.
+    """
+    stored = collection_backend(collection)
+    if stored != backend:
+        raise ValueError(
+            f"{collection.name} was embedded with the {stored!r} backend but "
+            f"EMBEDDING_BACKEND is {backend!r}. Vectors of different models can't be "
+            "mixed; refresh into another store (CHROMA_DATA_PATH) to switch backends."
+        )
+    if backend in REDUCIBLE_BACKENDS:
+        from src.embeddings.dimensions import check_collection_dim
+
+        check_collection_dim(collection)
@@ -0,0 +1,31 @@
+# src/embeddings/fake.py
+
+import hashlib
+
+import numpy as np
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
+
+DEFAULT_DIM = 1536
+
+
+def fake_embedding(text: str, dim: int = DEFAULT_DIM) -> np.ndarray:
+    """
+    Returns a deterministic unit vector for a text, seeded by its sha256. The same
+    text always maps to the same vector, different texts to unrelated ones.
+    """
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+    vector = np.random.default_rng(seed).standard_normal(dim, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+class FakeEmbeddingFunction(EmbeddingFunction[Documents]):
+    """
+    Chroma embedding function returning fake_embedding vectors. It needs no API key
+    or network, which makes it the embedding function of offline benchmarks.
+    """
+
+    def __init__(self, dim: int = DEFAULT_DIM):
+        self.dim = dim
+
+    def __call__(self, input: Documents) -> Embeddings:
+        return [fake_embedding(text, self.dim) for text in input]
@@ -0,0 +1,128 @@
+# src/embeddings/local.py
+
+import hashlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+import numpy as np
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
+
+# Local CPU embedding backend (EMBEDDING_BACKEND=local). The model is a
+# sentence-transformers model directory on disk, e.g. one saved with
+# `SentenceTransformer("all-MiniLM-L6-v2").save("./models/embedding")`; nothing is
+# downloaded at run time.
+LOCAL_MODEL_PATH = os.environ.get("LOCAL_EMBEDDING_MODEL_PATH", "./models/embedding")
+LOCAL_WORKERS = int(os.environ.get("LOCAL_EMBEDDING_WORKERS", str(min(4, os.cpu_count() or 1))))
+LOCAL_BATCH_SIZE = int(os.environ.get("LOCAL_EMBEDDING_BATCH_SIZE", "64"))
+
+
+@lru_cache(maxsize=None)
+def model_fingerprint(model_path: str) -> str:
+    """
+    Returns a sha256 over the relative paths and contents of every file of a model
+    directory (config, tokenizer, pooling and weights), so it changes whenever the
+    model saved there is replaced.
+    """
+    digest = hashlib.sha256()
+    for root, dirs, files in os.walk(model_path):
+        dirs.sort()
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            digest.update(os.path.relpath(path, model_path).encode("utf-8"))
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(block)
+    return digest.hexdigest()
+
+
+class LocalEmbeddingFunction(EmbeddingFunction[Documents]):
+    """
+    Chroma embedding function running a sentence-transformers model on the CPU.
+
+    Inputs are split into batches of batch_size that a pool of workers encodes in
+    parallel, each worker with an equal share of the CPU's torch threads. The model
+    is loaded on the first call. Vectors are normalized to unit length like OpenAI
+    embeddings, so squared L2 distances keep their meaning.
+    """
+
+    # Local inference costs no API tokens and isn't rate limited.
+    billable = False
+
+    def __init__(
+        self,
+        model_path: str = LOCAL_MODEL_PATH,
+        workers: int = LOCAL_WORKERS,
+        batch_size: int = LOCAL_BATCH_SIZE,
+    ):
+        self.model_path = model_path
+        self.workers = max(1, workers)
+        self.batch_size = batch_size
+        self._model = None
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def model_name(self) -> str:
+        """
+        Name the embedding cache files this model's vectors under. It includes the
+        model's fingerprint, so replacing the model in model_path never serves the
+        old model's vectors from the cache.
+        """
+        name = os.path.basename(os.path.normpath(self.model_path))
+        if not os.path.isdir(self.model_path):
+            return f"local:{name}"
+        return f"local:{name}:{model_fingerprint(os.path.abspath(self.model_path))[:16]}"
+
+    def _load(self):
+        with self._lock:
+            if self._model is None:
+                if not os.path.isdir(self.model_path):
+                    raise FileNotFoundError(
+                        f"No local embedding model at {self.model_path}; set "
+                        "LOCAL_EMBEDDING_MODEL_PATH to a sentence-transformers model directory."
+                    )
+                try:
+                    import torch
+                    from sentence_transformers import SentenceTransformer
+                except ImportError as e:
+                    raise ImportError(
+                        "EMBEDDING_BACKEND=local needs sentence-transformers: "
+                        "`uv sync --extra local`"
+                    ) from e
+
+                torch.set_num_threads(max(1, (os.cpu_count() or 1) // self.workers))
+                self._model = SentenceTransformer(
+                    self.model_path, device="cpu", local_files_only=True
+                )
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="local-embedding"
+                )
+        return self._model
+
+    @property
+    def dim(self) -> int:
+        return self._load().get_sentence_embedding_dimension()
+
+    def _encode(self, texts: list[str]) -> np.ndarray:
+        return self._model.encode(
+            texts,
+            batch_size=self.batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False,
+        ).astype(np.float32)
+
+    def __call__(self, input: Documents) -> Embeddings:
+        self._load()
+        if not input:
+            return []
+        batches = [
+            list(input[start : start + self.batch_size])
+            for start in range(0, len(input), self.batch_size)
+        ]
+        # torch releases the GIL while encoding, so the workers run in parallel.
+        return [
+            vector for vectors in self._executor.map(self._encode, batches) for vector in vectors
+        ]
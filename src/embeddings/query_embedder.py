@@ -0,0 +1,213 @@
+# src/embeddings/query_embedder.py
+
+import bisect
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
+
+from src.refresh_pipeline.metrics import percentile
+
+# Query embedding settings. With QUERY_BATCHING=1 the assistant embeds queries
+# through a QueryEmbedder: vectors of recent query strings are kept in memory, and
+# queries arriving within QUERY_BATCH_WINDOW_MS of each other (concurrent tool
+# calls, or several users at once) are sent to the embedding function as one batch
+# of at most QUERY_BATCH_MAX_SIZE.
+QUERY_BATCHING_ENABLED = os.environ.get("QUERY_BATCHING", "0") == "1"
+QUERY_BATCH_WINDOW_MS = float(os.environ.get("QUERY_BATCH_WINDOW_MS", "5"))
+QUERY_BATCH_MAX_SIZE = int(os.environ.get("QUERY_BATCH_MAX_SIZE", "64"))
+QUERY_EMBEDDING_CACHE_ENTRIES = int(os.environ.get("QUERY_EMBEDDING_CACHE_ENTRIES", "4096"))
+# Latency percentiles are computed over this many of the most recent calls and
+# batches, so a long-running assistant keeps a bounded window of samples.
+QUERY_LATENCY_SAMPLES = int(os.environ.get("QUERY_LATENCY_SAMPLES", "10000"))
+
+# Upper bounds (ms) of the latency histogram buckets; slower calls go in a last one.
+LATENCY_BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000]
+
+
+class _Batch:
+    """
+    The queries collected during one batching window, by text.
+    """
+
+    def __init__(self):
+        self.futures = {}
+        self.full = threading.Event()
+
+
+class QueryEmbedder(EmbeddingFunction[Documents]):
+    """
+    Chroma embedding function for queries that caches vectors in memory and
+    coalesces concurrent requests into batched calls to the wrapped function.
+
+    The first caller that finds no open batch opens one and leads it: it waits up
+    to window_ms (less if the batch fills up), then embeds every text collected in
+    the meantime with a single call and hands each caller its vector. A text that
+    is already being embedded is waited for rather than embedded again.
+
+    The wrapped function is normally the CachedEmbeddingFunction of the stored
+    collections' backend, so texts missing from memory may still be served from
+    the on-disk cache.
+    """
+
+    def __init__(
+        self,
+        embedding_function,
+        window_ms: float = QUERY_BATCH_WINDOW_MS,
+        max_batch: int = QUERY_BATCH_MAX_SIZE,
+        max_entries: int = QUERY_EMBEDDING_CACHE_ENTRIES,
+        latency_samples: int = QUERY_LATENCY_SAMPLES,
+    ):
+        self.embedding_function = embedding_function
+        self.window_ms = window_ms
+        self.max_batch = max_batch
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.calls = 0
+        self._vectors = OrderedDict()
+        self._inflight = {}
+        self._batch = None
+        self._lock = threading.Lock()
+        self._batch_sizes = {}
+        self._latency_counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self._batch_latencies = deque(maxlen=latency_samples)
+        self._latencies = deque(maxlen=latency_samples)
+
+    def __call__(self, input: Documents) -> Embeddings:
+        start = time.perf_counter()
+        results = {}
+        waiting = {}
+        led = []
+        with self._lock:
+            for text in dict.fromkeys(input):
+                vector = self._vectors.get(text)
+                if vector is not None:
+                    self._vectors.move_to_end(text)
+                    self.hits += 1
+                    results[text] = vector
+                    continue
+                self.misses += 1
+                if text in self._inflight:
+                    self.coalesced += 1
+                    waiting[text] = self._inflight[text]
+                    continue
+                if self._batch is None:
+                    self._batch = _Batch()
+                    led.append(self._batch)
+                future = Future()
+                self._batch.futures[text] = future
+                self._inflight[text] = future
+                waiting[text] = future
+                if len(self._batch.futures) >= self.max_batch:
+                    self._batch.full.set()
+                    self._batch = None
+
+        for batch in led:
+            batch.full.wait(self.window_ms / 1000)
+            with self._lock:
+                if self._batch is batch:
+                    self._batch = None
+            self._embed(batch)
+
+        for text, future in waiting.items():
+            results[text] = future.result()
+        latency = time.perf_counter() - start
+        with self._lock:
+            self.calls += 1
+            self._latency_counts[latency_bucket(latency)] += 1
+            self._latencies.append(latency)
+        return [results[text] for text in input]
+
+    def _embed(self, batch: _Batch) -> None:
+        """
+        Embeds the texts of a closed batch with one call and resolves their futures.
+        """
+        texts = list(batch.futures)
+        start = time.perf_counter()
+        try:
+            vectors = self.embedding_function(texts)
+        except Exception as e:
+            with self._lock:
+                for text in texts:
+                    self._inflight.pop(text, None)
+            for future in batch.futures.values():
+                future.set_exception(e)
+            return
+
+        with self._lock:
+            for text, vector in zip(texts, vectors):
+                self._vectors[text] = vector
+                self._inflight.pop(text, None)
+            while len(self._vectors) > self.max_entries:
+                self._vectors.popitem(last=False)
+            self._batch_sizes[len(texts)] = self._batch_sizes.get(len(texts), 0) + 1
+            self._batch_latencies.append(time.perf_counter() - start)
+        for text, vector in zip(texts, vectors):
+            batch.futures[text].set_result(vector)
+
+    def stats(self) -> dict:
+        """
+        Returns cache counters, the histogram of batch sizes sent to the wrapped
+        function, the histogram of the latency of every call, and latency
+        percentiles over the most recent calls and batches.
+        """
+        with self._lock:
+            latencies = list(self._latencies)
+            batch_latencies = list(self._batch_latencies)
+            latency_counts = list(self._latency_counts)
+            batch_sizes = dict(sorted(self._batch_sizes.items()))
+            lookups = self.hits + self.misses
+            counters = {
+                "entries": len(self._vectors),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "coalesced": self.coalesced,
+                "calls": self.calls,
+            }
+        batches = sum(batch_sizes.values())
+        return {
+            **counters,
+            "batches": batches,
+            "mean_batch_size": (
+                sum(size * count for size, count in batch_sizes.items()) / batches
+                if batches
+                else 0.0
+            ),
+            "batch_sizes": batch_sizes,
+            "latency_ms": dict(zip(latency_labels(), latency_counts)),
+            "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+            "batch_p50_ms": round(percentile(batch_latencies, 50) * 1000, 2),
+            "batch_p99_ms": round(percentile(batch_latencies, 99) * 1000, 2),
+        }
+
+
+def latency_bucket(latency: float) -> int:
+    """
+    Returns the index of the LATENCY_BUCKETS_MS bucket of a latency in seconds.
+    """
+    return bisect.bisect_left(LATENCY_BUCKETS_MS, latency * 1000)
+
+
+def latency_labels() -> list[str]:
+    """
+    Returns the labels of the latency buckets, their upper bounds, e.g. '<=5'.
+    """
+    return [f"<={bound}" for bound in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}"]
+
+
+def latency_histogram(latencies: list[float]) -> dict:
+    """
+    Counts latencies (in seconds) into LATENCY_BUCKETS_MS buckets, labelled by
+    their upper bound, e.g. {'<=5': 3, ..., '>2000': 0}.
+    """
+    counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+    for latency in latencies:
+        counts[latency_bucket(latency)] += 1
+    return dict(zip(latency_labels(), counts))
@@ -0,0 +1,66 @@
+# src/embeddings/tokens.py
+
+import os
+import re
+from functools import lru_cache
+
+EMBEDDING_MODEL = "text-embedding-3-small"
+
+# Tokenizer used to count and split tokens. "tiktoken" is exact, but downloads the
+# model's encoding file on first use. "estimate" approximates it with a regex and
+# needs no network, which makes it the tokenizer of offline benchmarks.
+TOKENIZER = os.environ.get("TOKENIZER", "tiktoken")
+
+# OpenAI embedding request limits.
+MAX_INPUT_TOKENS = 8191
+MAX_REQUEST_TOKENS = 300_000
+MAX_REQUEST_INPUTS = 2048
+
+
+class EstimatedEncoding:
+    """
+    Offline stand-in for a tiktoken encoding. Tokens are short runs of letters,
+    digits or punctuation with their leading space, which lands close to
+    cl100k_base's counts on English text and code. decode(encode(text)) == text.
+    """
+
+    _TOKEN_REGEX = re.compile(r" ?[^\W\d_]{1,10}| ?\d{1,3}| ?[^\s\w]{1,4}|\s+|.", re.S)
+
+    def encode(self, text: str, disallowed_special=()) -> list[str]:
+        return self._TOKEN_REGEX.findall(text)
+
+    def decode(self, tokens: list[str]) -> str:
+        return "".join(tokens)
+
+
+@lru_cache(maxsize=None)
+def get_encoding(model_name: str = EMBEDDING_MODEL):
+    """
+    Returns the tiktoken encoding used by an OpenAI model, or an EstimatedEncoding
+    with TOKENIZER=estimate.
+    """
+    if TOKENIZER == "estimate":
+        return EstimatedEncoding()
+    import tiktoken
+
+    return tiktoken.encoding_for_model(model_name)
+
+
+def count_tokens(text: str, model_name: str = EMBEDDING_MODEL) -> int:
+    """
+    Counts the tokens a text costs when embedded with the given model.
+    """
+    return len(get_encoding(model_name).encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(
+    text: str, max_tokens: int = MAX_INPUT_TOKENS, model_name: str = EMBEDDING_MODEL
+) -> str:
+    """
+    Truncates a text to at most max_tokens tokens.
+    """
+    encoding = get_encoding(model_name)
+    tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[:max_tokens])
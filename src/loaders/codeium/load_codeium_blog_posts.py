@@ -3,8 +3,10 @@
 from bs4 import BeautifulSoup
 import json
 from src.loaders.models.models import BlogPost, CodeAssistantCompany
+from src.refresh_pipeline.metrics import measured
 from src.utils.network import fetch, fetch_rendered
 from prefect import flow, task
+from prefect.task_runners import ThreadPoolTaskRunner
 
 BASE_URL = "https://codeium.com"
 SITEMAP_URL = f"{BASE_URL}/sitemap.xml"
@@ -15,7 +17,7 @@ def get_blog_post_urls_from_sitemap() -> list:
     Parses the sitemap XML and extracts all URLs that include '/blog/'.
     Returns a list of blog post URLs.
     """
-    sitemap_xml = fetch(SITEMAP_URL)
+    sitemap_xml = fetch(SITEMAP_URL, stage="sitemap")
     soup = BeautifulSoup(sitemap_xml, "xml")
     urls = []
     for loc in soup.find_all("loc"):
@@ -102,6 +104,7 @@ def extract_content(soup: BeautifulSoup) -> str:
 
 
 @task
+@measured("parse")
 def parse_blog_post(html: str, url: str) -> BlogPost:
     """
     Parses the blog post HTML to extract the title, publication date, and content.
@@ -126,13 +129,16 @@ def parse_blog_post(html: str, url: str) -> BlogPost:
     return blog_post
 
 
-@flow(log_prints=True)
-def fetch_and_parse_codeium_blog_posts(limit: int = 5) -> None:
+@flow(log_prints=True, task_runner=ThreadPoolTaskRunner(max_workers=4))
+def fetch_and_parse_codeium_blog_posts(limit: int | None = 5) -> list[BlogPost]:
     """
     Fetches blog post URLs from the sitemap, then for each URL:
       - Fetches the raw HTML.
       - Parses the HTML to extract the title and publication date.
       - Prints the extracted information as JSON.
+
+    Pages are fetched and parsed concurrently, up to the flow's task runner
+    max_workers at a time.
     """
     urls = get_blog_post_urls_from_sitemap()
     print(f"Found {len(urls)} blog post URLs in sitemap.")
@@ -140,12 +146,9 @@ def fetch_and_parse_codeium_blog_posts(limit: int = 5) -> None:
     if limit is None:
         limit = len(urls)
 
-    blog_posts = []
-
-    for url in list(reversed(urls))[:limit]:
-        html = fetch_rendered(url)
-        blog_post = parse_blog_post(html, url)
-        blog_posts.append(blog_post)
+    selected_urls = list(reversed(urls))[:limit]
+    html_futures = fetch_rendered.map(selected_urls)
+    blog_posts = parse_blog_post.map(html_futures, selected_urls).result()
 
     for blog_post in blog_posts:
         blog_post.unique_id = f"{blog_post.company.value}_{blog_post.url}"
@@ -1,5 +1,6 @@
 # src/loaders/codeium/load_codeium_changelog.py
 
+from src.refresh_pipeline.metrics import measured
 from src.utils.network import fetch_rendered, fetch
 from src.loaders.models.models import ChangeLog, CodeAssistantCompany
 from prefect import task, flow
@@ -10,6 +11,7 @@ CODEIUM_CHANGELOG_URL = "https://codeium.com/changelog"
 
 
 @task
+@measured("parse")
 def parse_changelog(html: str) -> list[ChangeLog]:
     """
     Parse the HTML from the Codeium changelog page into a list of ChangeLog models.
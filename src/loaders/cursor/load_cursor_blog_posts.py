@@ -3,6 +3,8 @@
 from bs4 import BeautifulSoup
 import json
 from prefect import flow, task
+from prefect.task_runners import ThreadPoolTaskRunner
+from src.refresh_pipeline.metrics import measured
 from src.utils.network import fetch, fetch_rendered
 from src.loaders.models.models import BlogPost, CodeAssistantCompany
 
@@ -17,7 +19,7 @@ def get_blog_post_urls_from_sitemap() -> list:
     For Cursor, we filter for URLs that include '/en/blog/' to avoid duplicates.
     Returns a list of blog post URLs.
     """
-    sitemap_xml = fetch(SITEMAP_URL)
+    sitemap_xml = fetch(SITEMAP_URL, stage="sitemap")
     soup = BeautifulSoup(sitemap_xml, "xml")
     urls = []
     for loc in soup.find_all("loc"):
@@ -32,6 +34,7 @@ def get_blog_post_urls_from_sitemap() -> list:
 
 
 @task
+@measured("parse")
 def parse_blog_post(html: str, url: str) -> BlogPost:
     """
     Parses the blog post HTML to extract the title, publication date, and content.
@@ -99,14 +102,17 @@ def parse_blog_post(html: str, url: str) -> BlogPost:
     return blog_post
 
 
-@flow(log_prints=True)
-def fetch_and_parse_cursor_blog_posts(limit: int = 5) -> list[BlogPost]:
+@flow(log_prints=True, task_runner=ThreadPoolTaskRunner(max_workers=4))
+def fetch_and_parse_cursor_blog_posts(limit: int | None = 5) -> list[BlogPost]:
     """
     Fetches blog post URLs from the sitemap, then for each URL:
       - Fetches the raw HTML.
       - Parses the HTML to extract the title and publication date.
       - Prints the extracted information as JSON.
 
+    Pages are fetched and parsed concurrently, up to the flow's task runner
+    max_workers at a time.
+
     Returns:
         A list of BlogPost objects.
     """
@@ -117,13 +123,9 @@ def fetch_and_parse_cursor_blog_posts(limit: int = 5) -> list[BlogPost]:
     if limit is None:
         limit = len(urls)
 
-    blog_posts = []
-
-    for url in list(reversed(urls))[:limit]:
-        print(f"Processing: {url}")
-        html = fetch_rendered(url)
-        blog_post = parse_blog_post(html, url)
-        blog_posts.append(blog_post)
+    selected_urls = list(reversed(urls))[:limit]
+    html_futures = fetch_rendered.map(selected_urls)
+    blog_posts = parse_blog_post.map(html_futures, selected_urls).result()
 
     # Add unique identifiers
     for blog_post in blog_posts:
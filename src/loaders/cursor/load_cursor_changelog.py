@@ -2,6 +2,7 @@
 
 from bs4 import BeautifulSoup
 from src.loaders.models.models import ChangeLog, CodeAssistantCompany
+from src.refresh_pipeline.metrics import measured
 from src.utils.network import fetch, fetch_rendered
 import re
 from typing import List
@@ -13,6 +14,7 @@ CURSOR_CHANGELOG_URL = "https://www.cursor.com/en/changelog"
 
 
 @task
+@measured("parse")
 def parse_changelog(html: str) -> list[ChangeLog]:
     """
     Parse the HTML from the Cursor changelog page into a list of ChangeLog models.
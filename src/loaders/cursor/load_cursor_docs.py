@@ -1,10 +1,19 @@
 # src/loaders/cursor/load_cursor_docs.py
-from bs4 import BeautifulSoup
+from prefect import flow
+from prefect.task_runners import ThreadPoolTaskRunner
 
-from src.loaders.models.models import CodeAssistantCompany, DocsPage
-from src.utils.network import fetch
+from src.loaders.docs_site import fetch_and_parse_docs_site
+from src.loaders.models.models import CodeAssistantCompany
 
 BASE_URL = "https://docs.cursor.com"
 SITEMAP_URL = f"{BASE_URL}/sitemap.xml"
 
-# TODO: Implement cursor docs parsing and load functions
+
+@flow(log_prints=True, task_runner=ThreadPoolTaskRunner(max_workers=8))
+def fetch_and_parse_cursor_docs():
+    # Pages are fetched concurrently, up to the task runner's max_workers at a time.
+    return fetch_and_parse_docs_site(SITEMAP_URL, CodeAssistantCompany.CURSOR_ENTERPRISE)
+
+
+if __name__ == "__main__":
+    fetch_and_parse_cursor_docs()
@@ -0,0 +1,77 @@
+# src/loaders/docs_site.py
+from bs4 import BeautifulSoup
+
+from src.loaders.models.models import CodeAssistantCompany, DocsPage
+from src.refresh_pipeline.metrics import measured
+from src.utils.network import fetch
+
+
+def get_doc_pages_from_sitemap(sitemap_url: str) -> list[str]:
+    sitemap_xml = fetch(sitemap_url, stage="sitemap")
+    soup = BeautifulSoup(sitemap_xml, "xml")
+    return [loc.get_text() for loc in soup.find_all("loc")]
+
+
+@measured("parse")
+def parse_docs_page(html: str, url: str, company: CodeAssistantCompany) -> DocsPage:
+    soup = BeautifulSoup(html, "html.parser")
+
+    # Extract the title: Prefer an <h1> tag; if missing, use the <title> element.
+    h1 = soup.find("h1")
+    if h1:
+        title = h1.get_text(strip=True)
+    elif soup.title:
+        title = soup.title.get_text(strip=True)
+    else:
+        title = "Untitled Document"
+
+    # Try to extract just the main content.
+    # Option 1: Look for a container that holds the MDX content.
+    content_container = soup.find(attrs={"data-mdx-content": True})
+    if content_container:
+        content = content_container.get_text(separator="\n", strip=True)
+    else:
+        # Option 2: If no MDX container, try to extract content from <main>.
+        main = soup.find("main")
+        if main:
+            # Remove navigation elements if they exist.
+            navbar = main.find(id="navbar")
+            if navbar:
+                navbar.decompose()
+            content = main.get_text(separator="\n", strip=True)
+        else:
+            # Fallback: use the entire document body.
+            content = soup.get_text(separator="\n", strip=True)
+
+    # A page is identified by its URL alone, so editing its title changes its
+    # content hash rather than making it a new record.
+    return DocsPage(
+        url=url,
+        title=title,
+        company=company,
+        content=content,
+        unique_id=url,
+    )
+
+
+def fetch_and_parse_docs_site(
+    sitemap_url: str, company: CodeAssistantCompany
+) -> list[DocsPage]:
+    """
+    Fetches and parses every page listed in a docs site's sitemap. Runs inside a
+    loader flow, whose task runner bounds how many pages are fetched at a time.
+    """
+    urls = get_doc_pages_from_sitemap(sitemap_url)
+    print(f"Found {len(urls)} doc file URLs in sitemap.")
+
+    html_futures = fetch.map(urls)
+    docs_files = [
+        parse_docs_page(future.result(), url, company)
+        for future, url in zip(html_futures, urls)
+    ]
+
+    for docs_file in docs_files[:10]:
+        print(docs_file.model_dump_json(indent=2))
+        print("\n")
+
+    return docs_files
@@ -0,0 +1,116 @@
+# src/main.py
+
+import argparse
+import os
+import runpy
+import sys
+
+# Only the standard library is imported at module level, so `--help` and argument
+# errors return immediately. Each command imports what it needs when it runs.
+
+BENCHMARKS_DIR = os.path.join(os.path.dirname(__file__), "benchmarks")
+DOC_TYPES = ["changelog", "blog_post", "docs_page"]
+
+
+def list_benchmarks() -> list[str]:
+    """
+    Returns the names of the runnable scripts in src/benchmarks.
+    """
+    return sorted(
+        name[: -len(".py")]
+        for name in os.listdir(BENCHMARKS_DIR)
+        if name.startswith(("bench_", "stress_")) and name.endswith(".py")
+    )
+
+
+def run_refresh(args):
+    if args.flow == "changelog":
+        from src.refresh_pipeline.refresh_changelog import refresh_changelog
+
+        refresh_changelog(resume=not args.no_resume)
+    else:
+        from src.refresh_pipeline.refresh_all import refresh_all
+
+        refresh_all(sources=args.sources, resume=not args.no_resume)
+
+
+def run_query(args):
+    if args.retrieve_only:
+        # Print the retrieved documents without running the agent.
+        from src.assistant_analyzer.assistant import query_documents
+
+        hits = query_documents(
+            args.query,
+            n_results=args.n_results,
+            companies=args.company,
+            doc_types=args.doc_type,
+        )
+        for i, hit in enumerate(hits, start=1):
+            print(f"Document {i} ({hit['id']}, distance {hit['distance']:.4f}):\n{hit['document']}\n")
+    else:
+        from src.assistant_analyzer.assistant import run_query
+
+        run_query(args.query)
+
+
+def run_bench(args):
+    # Run the benchmark as if it was started with `python -m`, with its own arguments.
+    sys.argv = [f"src.benchmarks.{args.name}", *args.args]
+    runpy.run_module(f"src.benchmarks.{args.name}", run_name="__main__", alter_sys=True)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m src.main",
+        description="Refresh and query the coding assistant document store.",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    refresh = commands.add_parser("refresh", help="Refresh the store from the sources.")
+    refresh.add_argument(
+        "--flow",
+        choices=["all", "changelog"],
+        default="all",
+        help="Refresh every source (default) or only the changelogs.",
+    )
+    refresh.add_argument("--sources", nargs="+", help="Only refresh these sources (with --flow all).")
+    refresh.add_argument(
+        "--no-resume", action="store_true", help="Start a new run instead of resuming an unfinished one."
+    )
+    refresh.set_defaults(handler=run_refresh)
+
+    query = commands.add_parser("query", help="Ask the assistant a question.")
+    query.add_argument("query")
+    query.add_argument(
+        "--retrieve-only",
+        action="store_true",
+        help="Print the retrieved documents instead of running the agent.",
+    )
+    query.add_argument("--n-results", type=int, default=3)
+    query.add_argument("--company", nargs="+", help="Only retrieve documents from these companies.")
+    query.add_argument("--doc-type", nargs="+", choices=DOC_TYPES)
+    query.set_defaults(handler=run_query)
+
+    bench = commands.add_parser(
+        "bench",
+        help="Run a benchmark from src/benchmarks.",
+        description="Run a benchmark from src/benchmarks. Arguments after the name are passed to it.",
+    )
+    bench.add_argument("name", choices=list_benchmarks())
+    bench.add_argument("args", nargs=argparse.REMAINDER)
+    bench.set_defaults(handler=run_bench)
+    return parser
+
+
+def main(argv: list[str] | None = None):
+    args = build_parser().parse_args(argv)
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
+
+# to run
+# python -m src.main query "Which version of Cursor added MCP support?"
+# python -m src.main refresh --flow changelog
+# python -m src.main bench bench_refresh_offline --pages 50
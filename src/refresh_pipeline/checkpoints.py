@@ -0,0 +1,262 @@
+# src/refresh_pipeline/checkpoints.py
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+
+from src.corpus.records import MODEL_BY_DOC_TYPE, doc_type_of
+
+DEFAULT_CHECKPOINT_PATH = os.environ.get(
+    "REFRESH_CHECKPOINT_PATH", "./cache/refresh_checkpoints.sqlite3"
+)
+# Open runs older than this many seconds are closed rather than resumed. Their
+# fetched pages and parsed records would be stale, and syncing stale records
+# deletes what was added upstream since and rolls edited records back.
+RESUME_MAX_AGE = float(os.environ.get("REFRESH_RESUME_MAX_AGE", "21600"))
+
+# Per-item stages, in the order an item goes through them.
+#   fetched: raw HTML of a page, keyed by URL
+#   parsed:  every record a source's loader returned, keyed by source name
+#   synced:  a source whose records were all diffed and written, keyed by source name
+# Embedded and written records need no checkpoint: their content hashes are in the
+# store, so a resumed run's diff skips them.
+STAGES = ["fetched", "parsed", "synced"]
+
+
+class CheckpointStore:
+    """
+    Durable per-stage checkpoints for refresh runs, stored in SQLite.
+
+    A run stays open until finish_run is called. Starting a flow while an earlier
+    run of the same flow is still open resumes that run, so stages that were
+    completed before a crash are not redone, unless it started more than
+    max_resume_age seconds ago.
+    """
+
+    def __init__(
+        self, path: str = DEFAULT_CHECKPOINT_PATH, max_resume_age: float = RESUME_MAX_AGE
+    ):
+        self.path = path
+        self.max_resume_age = max_resume_age
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS runs ("
+            " run_id TEXT PRIMARY KEY,"
+            " flow TEXT NOT NULL,"
+            " started_at REAL NOT NULL,"
+            " finished_at REAL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS checkpoints ("
+            " run_id TEXT NOT NULL,"
+            " stage TEXT NOT NULL,"
+            " key TEXT NOT NULL,"
+            " payload BLOB,"
+            " created_at REAL NOT NULL,"
+            " PRIMARY KEY (run_id, stage, key))"
+        )
+        self._conn.commit()
+
+    def start_run(self, flow: str, resume: bool = True) -> "RunCheckpoint":
+        """
+        Returns the open run of a flow if there is one, resume is True and it is
+        at most max_resume_age seconds old. Otherwise closes every open run of the
+        flow, drops their checkpoints and starts a new one.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT run_id, started_at FROM runs WHERE flow = ? AND finished_at IS NULL"
+                " ORDER BY started_at DESC LIMIT 1",
+                (flow,),
+            ).fetchone()
+            if row and resume:
+                run_id, started_at = row
+                if now - started_at <= self.max_resume_age:
+                    return RunCheckpoint(self, run_id, resumed=True)
+                print(
+                    f"Not resuming run {run_id}: it started {(now - started_at) / 3600:.1f}h "
+                    f"ago, more than {self.max_resume_age / 3600:.1f}h."
+                )
+            self._conn.execute(
+                "DELETE FROM checkpoints WHERE run_id IN"
+                " (SELECT run_id FROM runs WHERE flow = ? AND finished_at IS NULL)",
+                (flow,),
+            )
+            self._conn.execute(
+                "UPDATE runs SET finished_at = ? WHERE flow = ? AND finished_at IS NULL",
+                (now, flow),
+            )
+            run_id = uuid.uuid4().hex
+            self._conn.execute(
+                "INSERT INTO runs (run_id, flow, started_at) VALUES (?, ?, ?)",
+                (run_id, flow, time.time()),
+            )
+            self._conn.commit()
+        return RunCheckpoint(self, run_id, resumed=False)
+
+    def finish_run(self, run_id: str) -> None:
+        """
+        Closes a run and drops its checkpoints, which are only needed to resume it.
+        """
+        with self._lock:
+            self._conn.execute(
+                "UPDATE runs SET finished_at = ? WHERE run_id = ?", (time.time(), run_id)
+            )
+            self._conn.execute("DELETE FROM checkpoints WHERE run_id = ?", (run_id,))
+            self._conn.commit()
+
+    def close(self) -> None:
+        """
+        Closes the SQLite connection. Open runs stay open, to be resumed by a new store.
+        """
+        with self._lock:
+            self._conn.close()
+
+    def put(self, run_id: str, stage: str, key: str, payload: bytes | None = None) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO checkpoints (run_id, stage, key, payload, created_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (run_id, stage, key, payload, time.time()),
+            )
+            self._conn.commit()
+
+    def put_many(self, run_id: str, stage: str, items: dict[str, bytes | None]) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO checkpoints (run_id, stage, key, payload, created_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                [(run_id, stage, key, payload, now) for key, payload in items.items()],
+            )
+            self._conn.commit()
+
+    def get(self, run_id: str, stage: str, key: str) -> bytes | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload FROM checkpoints WHERE run_id = ? AND stage = ? AND key = ?",
+                (run_id, stage, key),
+            ).fetchone()
+        return row[0] if row else None
+
+    def has(self, run_id: str, stage: str, key: str) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM checkpoints WHERE run_id = ? AND stage = ? AND key = ?",
+                (run_id, stage, key),
+            ).fetchone()
+        return row is not None
+
+    def counts(self, run_id: str) -> dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT stage, COUNT(*) FROM checkpoints WHERE run_id = ? GROUP BY stage",
+                (run_id,),
+            ).fetchall()
+        counts = dict(rows)
+        return {stage: counts.get(stage, 0) for stage in STAGES}
+
+
+class RunCheckpoint:
+    """
+    The checkpoints of one refresh run.
+    """
+
+    def __init__(self, store: CheckpointStore, run_id: str, resumed: bool):
+        self.store = store
+        self.run_id = run_id
+        self.resumed = resumed
+
+    def get_page(self, url: str) -> str | None:
+        payload = self.store.get(self.run_id, "fetched", url)
+        return zlib.decompress(payload).decode("utf-8") if payload is not None else None
+
+    def put_page(self, url: str, html: str) -> None:
+        self.store.put(self.run_id, "fetched", url, zlib.compress(html.encode("utf-8")))
+
+    def get_records(self, source: str) -> list | None:
+        payload = self.store.get(self.run_id, "parsed", source)
+        if payload is None:
+            return None
+        return [
+            MODEL_BY_DOC_TYPE[item["doc_type"]].model_validate(item["record"])
+            for item in json.loads(zlib.decompress(payload))
+        ]
+
+    def put_records(self, source: str, records: list) -> None:
+        payload = json.dumps(
+            [
+                {"doc_type": doc_type_of(record), "record": record.model_dump(mode="json")}
+                for record in records
+            ]
+        )
+        self.store.put(self.run_id, "parsed", source, zlib.compress(payload.encode("utf-8")))
+
+    def mark(self, stage: str, keys: list[str]) -> None:
+        self.store.put_many(self.run_id, stage, dict.fromkeys(keys))
+
+    def is_done(self, stage: str, key: str) -> bool:
+        return self.store.has(self.run_id, stage, key)
+
+    def counts(self) -> dict[str, int]:
+        return self.store.counts(self.run_id)
+
+    def finish(self) -> None:
+        self.store.finish_run(self.run_id)
+
+    def close(self) -> None:
+        self.store.close()
+
+
+# The checkpoint of the refresh run in progress in this process, if any. Fetch tasks
+# and the ingest stage run in worker threads, so this is a plain module global.
+_active = None
+
+
+def activate(checkpoint: RunCheckpoint | None) -> None:
+    global _active
+    _active = checkpoint
+
+
+def active_checkpoint() -> RunCheckpoint | None:
+    return _active
+
+
+def start_checkpointed_run(flow: str, resume: bool = True) -> RunCheckpoint:
+    """
+    Opens (or resumes) the checkpointed run of a flow and makes it the active one.
+    """
+    checkpoint = CheckpointStore().start_run(flow, resume=resume)
+    activate(checkpoint)
+    if checkpoint.resumed:
+        print(f"Resuming refresh run {checkpoint.run_id}: {checkpoint.counts()}")
+    else:
+        print(f"Starting refresh run {checkpoint.run_id}")
+    return checkpoint
+
+
+def load_with_checkpoint(source: str, loader, **kwargs) -> list:
+    """
+    Returns a source's parsed records from the active run's checkpoint if the source
+    was already loaded in this run; otherwise runs the loader and checkpoints its
+    records.
+    """
+    checkpoint = active_checkpoint()
+    if checkpoint is not None:
+        records = checkpoint.get_records(source)
+        if records is not None:
+            print(f"Using {len(records)} checkpointed records for {source}")
+            return records
+    records = loader(**kwargs)
+    if checkpoint is not None:
+        checkpoint.put_records(source, records)
+    return records
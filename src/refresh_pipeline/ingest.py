@@ -0,0 +1,313 @@
+# src/refresh_pipeline/ingest.py
+
+import time
+from datetime import datetime
+from src.corpus.chunking import (
+    CHUNKING_ENABLED,
+    chunk_record,
+    chunking_signature,
+    parent_id_of,
+)
+from src.corpus.dedupe import DEDUPE_ENABLED, dedupe_records, default_index
+from src.corpus.records import doc_type_of, document_text
+from src.embeddings.batching import embed_and_upsert
+from src.embeddings.budget import active_budget
+from src.embeddings.factory import check_collection, collection_metadata
+from src.embeddings.tokens import count_tokens
+from src.utils.hashing import content_hash
+from src.utils.logs import sample_ids
+from src.vector_store.routing import route_records
+from src.vector_store.store import bump_last_update_date, write_lock
+
+
+def clean_metadata(metadata: dict) -> dict:
+    """
+    Remove keys with None values and remove the 'changes' and 'content' keys to avoid
+    duplicating the raw text (which is already stored in the documents field).
+    """
+    cleaned = {k: v for k, v in metadata.items() if v is not None}
+    cleaned.pop("changes", None)
+    cleaned.pop("content", None)
+    return cleaned
+
+
+def build_record(record) -> tuple[str, str, dict]:
+    """
+    Build the (id, document, metadata) triple stored in the collection for a
+    BlogPost, ChangeLog or DocsPage. The metadata carries a 'doc_type' and a
+    'content_hash' of the document and its metadata, which lets later refreshes
+    detect upstream edits without re-embedding.
+    """
+    document = document_text(record)
+    metadata = clean_metadata(record.model_dump(mode="json"))
+    metadata["doc_type"] = doc_type_of(record)
+    if CHUNKING_ENABLED:
+        metadata["chunking"] = chunking_signature()
+    metadata["content_hash"] = content_hash(document, metadata)
+    return record.unique_id, document, metadata
+
+
+def build_records(record) -> list[tuple[str, str, dict]]:
+    """
+    Build every (id, document, metadata) triple stored for a record: the record
+    itself, or its chunks when chunking is enabled. Chunks carry their parent's
+    content hash.
+    """
+    unique_id, document, metadata = build_record(record)
+    if CHUNKING_ENABLED:
+        return list(chunk_record(unique_id, document, metadata))
+    return [(unique_id, document, metadata)]
+
+
+def diff_items(collection, records, allow_delete: bool = True):
+    """
+    Compare the fetched records against the collection and return a three-way diff
+    as (new_items, changed_items, deleted_ids).
+
+    - new_items: records whose unique_id is not in the collection.
+    - changed_items: records whose content hash differs from the stored one
+      (records written before hashing was introduced have no hash and count as changed).
+    - deleted_ids: ids of stored records of the refreshed (company, doc_type) pairs
+      that were not returned by the loaders anymore. Only stale chunks of changed
+      records are returned when allow_delete is False, which callers use for
+      loaders that only return part of a source.
+
+    Records are compared by parent: stored chunks are grouped under their
+    'parent_id', and a changed record's chunks that it no longer produces are
+    returned in deleted_ids.
+
+    Only (company, doc_type) pairs that returned at least one record are considered
+    for deletion, so a loader that fails and returns nothing does not wipe its records.
+    Records stored before doc_type was recorded are treated as changelogs.
+    """
+    start = time.perf_counter()
+    candidates = {}
+    missing_id, duplicates, empty = [], [], []
+    for record in records:
+        if not record.unique_id:
+            missing_id.append(record.title)
+            continue
+        if record.unique_id in candidates:
+            duplicates.append(record.unique_id)
+            continue
+        if not document_text(record).strip():
+            # Nothing to embed or store, not even a chunk.
+            empty.append(record.unique_id)
+            continue
+        candidates[record.unique_id] = record
+    if missing_id:
+        print(f"Skipping {len(missing_id)} records without a unique_id: {sample_ids(missing_id)}")
+    if duplicates:
+        print(f"Skipping {len(duplicates)} duplicate records: {sample_ids(duplicates)}")
+    if empty:
+        print(f"Skipping {len(empty)} records without text: {sample_ids(empty)}")
+
+    scopes = {(record.company.value, doc_type_of(record)) for record in candidates.values()}
+    if not scopes:
+        return [], [], []
+
+    # One scan over the refreshed companies returns every stored id and its hash,
+    # so the diff below runs in memory without a round trip per record.
+    existing = collection.get(
+        where={"company": {"$in": sorted({company for company, _ in scopes})}},
+        include=["metadatas"],
+    )
+    stored_hashes = {}
+    stored_ids = {}
+    for id_, metadata in zip(existing["ids"], existing["metadatas"]):
+        metadata = metadata or {}
+        if (metadata.get("company"), metadata.get("doc_type", "changelog")) in scopes:
+            parent_id = metadata.get("parent_id", id_)
+            stored_hashes[parent_id] = metadata.get("content_hash")
+            stored_ids.setdefault(parent_id, []).append(id_)
+    lookup_ms = (time.perf_counter() - start) * 1000
+
+    new_items, changed_items, deleted_ids, removed = [], [], [], []
+    for unique_id, record in candidates.items():
+        if unique_id not in stored_hashes:
+            new_items.append(record)
+            continue
+        _, _, metadata = build_record(record)
+        if stored_hashes[unique_id] != metadata["content_hash"]:
+            changed_items.append(record)
+            new_ids = {id_ for id_, _, _ in build_records(record)}
+            deleted_ids += [id_ for id_ in stored_ids[unique_id] if id_ not in new_ids]
+
+    if allow_delete:
+        for parent_id in stored_hashes:
+            if parent_id not in candidates:
+                removed.append(parent_id)
+                deleted_ids += stored_ids[parent_id]
+
+    # One summary line per collection, naming a sample of the ids.
+    print(
+        f"Diffed {len(candidates)} records against {len(stored_hashes)} stored in "
+        f"{collection.name} in {(time.perf_counter() - start) * 1000:.1f} ms "
+        f"(lookup {lookup_ms:.1f} ms): {len(new_items)} new, {len(changed_items)} changed, "
+        f"{len(removed)} removed upstream."
+    )
+    if new_items:
+        # TODO: Add a notification to Slack here
+        print(f"New: {sample_ids(record.unique_id for record in new_items)}")
+    if changed_items:
+        print(f"Changed: {sample_ids(record.unique_id for record in changed_items)}")
+    if removed:
+        print(f"Removed upstream: {sample_ids(removed)}")
+    return new_items, changed_items, deleted_ids
+
+
+def embed_and_add_items(collection, new_items, embedding_function) -> set[str]:
+    """
+    Prepare metadata and upsert the new or changed records into the collection.
+    The raw text is stored only in the documents field. Only the items passed in
+    are embedded, so unchanged records cost no embedding calls.
+
+    If a token budget is active, the records' tokens are counted first and the
+    records that don't fit in the run's budget are deferred to the next run; their
+    ids are returned.
+    """
+    triples_by_record = {record.unique_id: build_records(record) for record in new_items}
+    deferred = set()
+    budget = active_budget()
+    # Each document is tokenized once, for both the budget and the batching.
+    token_counts = {
+        unique_id: [count_tokens(document) for _, document, _ in triples]
+        for unique_id, triples in triples_by_record.items()
+    }
+    if triples_by_record and budget is not None:
+        _, deferred_ids = budget.admit(
+            {
+                unique_id: [document for _, document, _ in triples]
+                for unique_id, triples in triples_by_record.items()
+            },
+            embedding_function,
+            token_counts=token_counts,
+            scopes={
+                record.unique_id: (record.company.value, doc_type_of(record))
+                for record in new_items
+            },
+        )
+        deferred = set(deferred_ids)
+    new_items = [record for record in new_items if record.unique_id not in deferred]
+
+    if new_items:
+        records = [triple for record in new_items for triple in triples_by_record[record.unique_id]]
+        # Embed in bounded, parallel batches and write each batch as it completes.
+        # A resumed run needs no record of which batches were written: their
+        # content hashes are in the store, so the diff no longer lists them.
+        embed_and_upsert(
+            collection,
+            ids=[id_ for id_, _, _ in records],
+            documents=[document for _, document, _ in records],  # The text to embed.
+            metadatas=[metadata for _, _, metadata in records],
+            embedding_function=embedding_function,
+            token_counts=[
+                count for record in new_items for count in token_counts[record.unique_id]
+            ],
+        )
+        print(
+            f"Upserted {len(new_items)} records ({len(records)} documents) "
+            f"into {collection.name}."
+        )
+    else:
+        print("No new or changed records found.")
+    return deferred
+
+
+def delete_items(collection, deleted_ids):
+    """
+    Delete records that no longer exist upstream from the collection.
+    """
+    if deleted_ids:
+        collection.delete(ids=deleted_ids)
+        print(f"Deleted {len(deleted_ids)} records from {collection.name}.")
+    else:
+        print("No removed records found.")
+
+
+def sync_records(records, embedding_function, allow_delete: bool = True) -> dict:
+    """
+    Sync a list of BlogPost, ChangeLog or DocsPage records into the store: route them
+    to their collection(s), diff them against what is stored, embed and upsert the
+    new and changed ones and delete the ones removed upstream.
+
+    With DEDUPE=1, near-duplicate records are dropped before routing: only one
+    record of each group is embedded and stored, and the others are recorded as its
+    aliases in the dedupe index.
+
+    Returns the number of new, changed, deleted and near-duplicate records, and of
+    records deferred to the next run by the token budget.
+    """
+    # The records this sync saw and the (company, doc_type) pairs it refreshed,
+    # before near-duplicates are dropped.
+    seen = {record.unique_id for record in records if record.unique_id}
+    scopes = {
+        (record.company.value, doc_type_of(record)) for record in records if record.unique_id
+    }
+    aliases = {}
+    if DEDUPE_ENABLED:
+        records, aliases = dedupe_records(records)
+
+    # Route the records to the collection(s) they are stored in, creating them
+    # with the embedding function if needed.
+    routed = route_records(
+        records,
+        embedding_function=embedding_function,
+        metadata={
+            "last_update_date": datetime.now().isoformat(),
+            **collection_metadata(),
+        },
+    )
+    # Fail before embedding anything if a collection holds vectors of another
+    # backend or dimension.
+    for collection, _ in routed:
+        check_collection(collection)
+
+    summary = {"new": 0, "changed": 0, "deleted": 0, "duplicates": len(aliases), "deferred": 0}
+    pending = set()
+    for collection, collection_records in routed:
+        # Diff the fetched records against what is already stored.
+        new_items, changed_items, deleted_ids = diff_items(
+            collection, collection_records, allow_delete=allow_delete
+        )
+        print(
+            f"{collection.name}: new: {len(new_items)}, changed: {len(changed_items)}, "
+            f"deleted: {len(deleted_ids)}"
+        )
+
+        # Embed and upsert only the new and changed records, then drop removed ones.
+        # Writes hold the store's write lock so concurrent refreshes don't interleave.
+        with write_lock():
+            deferred = embed_and_add_items(
+                collection, new_items + changed_items, embedding_function
+            )
+            # Keep the old chunks of deferred records until they are re-embedded.
+            deleted_ids = [id_ for id_ in deleted_ids if parent_id_of(id_) not in deferred]
+            delete_items(collection, deleted_ids)
+            if len(new_items) + len(changed_items) > len(deferred) or deleted_ids:
+                # Let readers caching results or vectors know the collection changed.
+                bump_last_update_date(collection)
+
+        if DEDUPE_ENABLED:
+            # Records removed upstream stop representing their near-duplicates.
+            kept = {record.unique_id for record in collection_records}
+            removed = {parent_id_of(id_) for id_ in deleted_ids}
+            default_index().forget(sorted(removed - kept - set(aliases)))
+
+        summary["new"] += len([r for r in new_items if r.unique_id not in deferred])
+        summary["changed"] += len([r for r in changed_items if r.unique_id not in deferred])
+        summary["deferred"] += len(deferred)
+        summary["deleted"] += len(deleted_ids)
+        pending |= deferred
+
+    budget = active_budget()
+    if budget is not None:
+        # Backlog rows are only removed when their record is admitted, so drop the
+        # ones this sync no longer defers. Like deletes, a partial sync only drops
+        # the rows of records it saw.
+        pruned = budget.backlog.prune(
+            pending, scopes=scopes if allow_delete else set(), seen=seen
+        )
+        if pruned:
+            print(f"Dropped {pruned} records from the embedding backlog.")
+    return summary
@@ -0,0 +1,237 @@
+# src/refresh_pipeline/metrics.py
+
+import functools
+import glob
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+DEFAULT_REPORT_DIR = os.environ.get("REFRESH_REPORT_DIR", "./reports/refresh")
+
+# The stages a refresh goes through, in order. Samples are:
+#   sitemap, fetch, render: one page request (or checkpoint hit), bytes of the page
+#   parse:  one parsed page, items are the records it produced
+#   dedupe: one near-duplicate pass over a source's records
+#   embed:  one embedding request, items are its inputs, tokens its input tokens
+#   write:  one upsert batch
+STAGES = ["sitemap", "fetch", "render", "parse", "dedupe", "embed", "write", "digest"]
+
+
+def percentile(values: list[float], q: float) -> float:
+    """
+    Returns the q-th percentile (0-100) of values using the nearest-rank method.
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+class Sample:
+    """
+    The counters of one measured call. The measured code fills in items, bytes,
+    tokens and cached as it learns them.
+    """
+
+    def __init__(self, items: int = 1):
+        self.items = items
+        self.bytes = 0
+        self.tokens = 0
+        self.cached = False
+
+
+class RunMetrics:
+    """
+    Per-stage counters of one refresh run: item counts, wall time, bytes, embedding
+    tokens and the latency of every measured call. Safe to update from the worker
+    threads the loaders and the embedder run in.
+    """
+
+    def __init__(self, flow: str, run_id: str | None = None):
+        self.flow = flow
+        self.run_id = run_id
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self._stages = {}
+
+    def record(self, stage: str, start: float, end: float, sample: Sample) -> None:
+        with self._lock:
+            stats = self._stages.setdefault(
+                stage,
+                {
+                    "calls": 0,
+                    "items": 0,
+                    "bytes": 0,
+                    "tokens": 0,
+                    "cached": 0,
+                    "first_start": start,
+                    "last_end": end,
+                    "busy_s": 0.0,
+                    "latencies": [],
+                },
+            )
+            stats["calls"] += 1
+            stats["items"] += sample.items
+            stats["bytes"] += sample.bytes
+            stats["tokens"] += sample.tokens
+            stats["cached"] += int(sample.cached)
+            stats["first_start"] = min(stats["first_start"], start)
+            stats["last_end"] = max(stats["last_end"], end)
+            stats["busy_s"] += end - start
+            stats["latencies"].append(end - start)
+
+    def report(self) -> dict:
+        """
+        Returns the run's metrics as a JSON-serializable dict. wall_s is the time
+        from a stage's first call starting to its last call ending, so overlapping
+        calls are counted once; busy_s is the sum of all call durations.
+        """
+        stages = {}
+        with self._lock:
+            names = [s for s in STAGES if s in self._stages]
+            names += sorted(set(self._stages) - set(STAGES))
+            for name in names:
+                stats = self._stages[name]
+                wall = stats["last_end"] - stats["first_start"]
+                stages[name] = {
+                    "calls": stats["calls"],
+                    "items": stats["items"],
+                    "cached": stats["cached"],
+                    "bytes": stats["bytes"],
+                    "tokens": stats["tokens"],
+                    "wall_s": round(wall, 3),
+                    "busy_s": round(stats["busy_s"], 3),
+                    "items_per_s": round(stats["items"] / wall, 2) if wall > 0 else None,
+                    "p50_ms": round(percentile(stats["latencies"], 50) * 1000, 1),
+                    "p99_ms": round(percentile(stats["latencies"], 99) * 1000, 1),
+                }
+        return {
+            "flow": self.flow,
+            "run_id": self.run_id,
+            "started_at": datetime.fromtimestamp(self.started_at).isoformat(),
+            "wall_s": round(time.time() - self.started_at, 3),
+            "stages": stages,
+        }
+
+    def finish(self, report_dir: str = DEFAULT_REPORT_DIR, **extra) -> dict:
+        """
+        Writes the run's JSON report to report_dir, prints a summary table compared
+        against the flow's previous report, and returns the report. Extra keyword
+        arguments (e.g. the sync summary) are added to the report as is.
+        """
+        report = {**self.report(), **extra}
+        previous = latest_report(self.flow, report_dir)
+
+        os.makedirs(report_dir, exist_ok=True)
+        stamp = datetime.fromtimestamp(self.started_at).strftime("%Y%m%dT%H%M%S")
+        suffix = f"-{self.run_id[:8]}" if self.run_id else ""
+        path = os.path.join(report_dir, f"{self.flow}-{stamp}{suffix}.json")
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+
+        print(format_summary(report, previous))
+        print(f"Wrote refresh metrics to {path}")
+        return report
+
+
+def latest_report(flow: str, report_dir: str = DEFAULT_REPORT_DIR) -> dict | None:
+    """
+    Returns the most recent report written for a flow, if any.
+    """
+    paths = sorted(glob.glob(os.path.join(report_dir, f"{flow}-*.json")))
+    if not paths:
+        return None
+    with open(paths[-1]) as f:
+        return json.load(f)
+
+
+def format_summary(report: dict, previous: dict | None = None) -> str:
+    """
+    Formats a report as a compact table, one row per stage. When a previous report
+    is given, each stage's wall time is followed by its change since that run.
+    """
+    lines = [
+        f"{'stage':<8} {'items':>7} {'cached':>6} {'MB':>8} {'tokens':>9} "
+        f"{'wall s':>8} {'items/s':>8} {'p50 ms':>8} {'p99 ms':>8}"
+    ]
+    previous_stages = (previous or {}).get("stages", {})
+    for name, stats in report["stages"].items():
+        line = (
+            f"{name:<8} {stats['items']:>7} {stats['cached']:>6} "
+            f"{stats['bytes'] / 1e6:>8.2f} {stats['tokens']:>9} {stats['wall_s']:>8.2f} "
+            f"{stats['items_per_s'] or 0:>8.1f} {stats['p50_ms']:>8.1f} {stats['p99_ms']:>8.1f}"
+        )
+        before = previous_stages.get(name)
+        if before and before["wall_s"] > 0:
+            change = (stats["wall_s"] - before["wall_s"]) / before["wall_s"] * 100
+            line += f"  ({change:+.0f}% wall vs previous run)"
+        lines.append(line)
+    lines.append(f"Total wall time: {report['wall_s']:.1f}s")
+    return "\n".join(lines)
+
+
+# The metrics of the refresh run in progress in this process, if any. Like the
+# active checkpoint, this is a plain module global because the measured code runs
+# in worker threads.
+_active = None
+
+
+def activate_metrics(metrics: RunMetrics | None) -> None:
+    global _active
+    _active = metrics
+
+
+def active_metrics() -> RunMetrics | None:
+    return _active
+
+
+def start_metrics(flow: str, run_id: str | None = None) -> RunMetrics:
+    """
+    Starts collecting the metrics of a refresh run and makes them the active ones.
+    """
+    metrics = RunMetrics(flow, run_id)
+    activate_metrics(metrics)
+    return metrics
+
+
+@contextmanager
+def measure(stage: str, items: int = 1):
+    """
+    Times the enclosed block as one call of a stage of the active run and yields its
+    Sample, so the block can fill in bytes, tokens, items and cached. Does nothing
+    but yield a throwaway Sample when no run is active.
+    """
+    sample = Sample(items)
+    metrics = active_metrics()
+    start = time.perf_counter()
+    try:
+        yield sample
+    finally:
+        if metrics is not None:
+            metrics.record(stage, start, time.perf_counter(), sample)
+
+
+def measured(stage: str):
+    """
+    Decorates a parse function taking the page HTML as its first argument so each
+    call is measured as one call of a stage: bytes are the size of the HTML and
+    items the number of records returned (1 for a single record).
+    """
+
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(html, *args, **kwargs):
+            with measure(stage) as sample:
+                sample.bytes = len(html.encode("utf-8")) if html else 0
+                result = fn(html, *args, **kwargs)
+                sample.items = len(result) if isinstance(result, list) else 1
+            return result
+
+        return wrapper
+
+    return decorator
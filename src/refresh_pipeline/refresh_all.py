@@ -0,0 +1,174 @@
+# src/refresh_pipeline/refresh_all.py
+
+import time
+from prefect import flow, task
+from prefect.cache_policies import NO_CACHE
+from prefect.futures import as_completed
+from prefect.task_runners import ThreadPoolTaskRunner
+from src.corpus.digests import DIGESTS_ENABLED
+from src.embeddings.budget import activate_budget, start_token_budget
+from src.embeddings.factory import get_embedding_function
+from src.loaders.codeium.load_codeium_blog_posts import fetch_and_parse_codeium_blog_posts
+from src.loaders.codeium.load_codeium_changelog import fetch_and_parse_codeium_changelog
+from src.loaders.codeium.load_codeium_docs import fetch_and_parse_codeium_docs
+from src.loaders.cursor.load_cursor_blog_posts import fetch_and_parse_cursor_blog_posts
+from src.loaders.cursor.load_cursor_changelog import fetch_and_parse_cursor_changelog
+from src.loaders.cursor.load_cursor_docs import fetch_and_parse_cursor_docs
+from src.refresh_pipeline.checkpoints import (
+    activate,
+    load_with_checkpoint,
+    start_checkpointed_run,
+)
+from src.refresh_pipeline.ingest import sync_records
+from src.refresh_pipeline.metrics import activate_metrics, start_metrics
+from src.refresh_pipeline.refresh_changelog import (
+    generate_digests,
+    store_count,
+    wait_for_digests,
+)
+
+# Every source the refresh ingests. max_concurrency caps how many pages a source
+# fetches at the same time (its loader flow's task runner size), so slow rendered
+# sites don't get hammered while the other sources run alongside them.
+SOURCES = {
+    "codeium_changelog": {
+        "loader": fetch_and_parse_codeium_changelog,
+        "max_concurrency": 1,
+    },
+    "cursor_changelog": {
+        "loader": fetch_and_parse_cursor_changelog,
+        "max_concurrency": 1,
+    },
+    "codeium_blog": {
+        "loader": fetch_and_parse_codeium_blog_posts,
+        "kwargs": {"limit": None},
+        "max_concurrency": 4,
+    },
+    "cursor_blog": {
+        "loader": fetch_and_parse_cursor_blog_posts,
+        "kwargs": {"limit": None},
+        "max_concurrency": 4,
+    },
+    "codeium_docs": {
+        "loader": fetch_and_parse_codeium_docs,
+        "max_concurrency": 8,
+    },
+    "cursor_docs": {
+        "loader": fetch_and_parse_cursor_docs,
+        "max_concurrency": 8,
+    },
+}
+
+
+@task(cache_policy=NO_CACHE)
+def load_source(name: str) -> list:
+    """
+    Runs a source's loader flow with its own concurrency limit and returns its records.
+    If the source was already loaded by the run being resumed, its checkpointed
+    records are returned instead.
+    """
+    source = SOURCES[name]
+    loader = source["loader"].with_options(
+        task_runner=ThreadPoolTaskRunner(max_workers=source["max_concurrency"])
+    )
+    start = time.perf_counter()
+    records = load_with_checkpoint(name, loader, **source.get("kwargs", {}))
+    print(f"Loaded {len(records)} records from {name} in {time.perf_counter() - start:.1f}s")
+    return records
+
+
+@flow(log_prints=True, task_runner=ThreadPoolTaskRunner(max_workers=len(SOURCES)))
+def refresh_all(sources: list[str] | None = None, resume: bool = True):
+    """
+    This Prefect flow refreshes the store from every source at once. All loaders are
+    submitted as concurrent tasks and each source's records are synced into the
+    store as soon as that source finishes, so total wall time tracks the slowest
+    source rather than the sum of all of them. A source that fails is reported
+    and skipped; the others are still synced.
+
+    Progress is checkpointed per stage (fetched pages, parsed records, synced
+    sources). A run that didn't finish, because it crashed or a source failed, is
+    resumed by the next run unless resume=False or it started more than
+    REFRESH_RESUME_MAX_AGE seconds ago: synced sources are skipped and the rest
+    reuse their already fetched pages.
+
+    With DIGESTS=1, each synced source's documents are digested by a background
+    task while the other sources are still loading and syncing.
+
+    Every stage is measured, and a JSON metrics report of the run is written to
+    ./reports/refresh with a summary printed at the end. The report is returned.
+    """
+    names = sources or list(SOURCES)
+    start = time.perf_counter()
+    embedding_function = get_embedding_function()
+    checkpoint = start_checkpointed_run("refresh_all", resume=resume)
+    try:
+        metrics = start_metrics("refresh_all", checkpoint.run_id)
+        budget = start_token_budget()
+        pending = [name for name in names if not checkpoint.is_done("synced", name)]
+        if len(pending) < len(names):
+            print(f"Skipping sources synced by the resumed run: {sorted(set(names) - set(pending))}")
+
+        original_count = store_count()
+        print("Number of items in the collection before processing:", original_count)
+
+        futures = {load_source.submit(name): name for name in pending}
+        failed = []
+        synced = {}
+        digest_futures = []
+        for future in as_completed(list(futures)):
+            name = futures[future]
+            try:
+                records = future.result()
+            except Exception as e:
+                print(f"Source {name} failed: {e!r}")
+                failed.append(name)
+                continue
+            summary = sync_records(records, embedding_function)
+            print(
+                f"Synced {name}: new: {summary['new']}, changed: {summary['changed']}, "
+                f"deleted: {summary['deleted']}, near-duplicates: {summary['duplicates']}, "
+                f"deferred: {summary['deferred']}"
+            )
+            checkpoint.mark("synced", [name])
+            synced[name] = {"records": len(records), **summary}
+            if DIGESTS_ENABLED:
+                digest_futures.append(generate_digests.submit(records))
+
+        final_count = store_count()
+        print("Number of items in the collection after processing:", final_count)
+        print("Difference:", final_count - original_count)
+        print("Embedding cache:", embedding_function.cache.stats())
+        print("Token budget:", budget.summary())
+        digests = wait_for_digests(digest_futures)
+        if DIGESTS_ENABLED:
+            print("Digests:", digests)
+        print(f"Refreshed {len(names) - len(failed)}/{len(names)} sources in {time.perf_counter() - start:.1f}s")
+        report = metrics.finish(
+            sources=synced,
+            failed=failed,
+            store_count={"before": original_count, "after": final_count},
+            embedding_cache=embedding_function.cache.stats(),
+            token_budget=budget.summary(),
+            digests=digests,
+        )
+        if failed:
+            # Keep the run open so the next run resumes the failed sources.
+            print(f"Failed sources: {', '.join(failed)}")
+        else:
+            checkpoint.finish()
+        return report
+    finally:
+        # Also after a failure, so the next flow in this process doesn't write
+        # into this run's checkpoint, metrics or budget.
+        checkpoint.close()
+        activate(None)
+        activate_metrics(None)
+        activate_budget(None)
+
+
+if __name__ == "__main__":
+    refresh_all()
+
+# to run
+# python -m src.refresh_pipeline.refresh_all
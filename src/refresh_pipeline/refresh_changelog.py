@@ -1,115 +1,136 @@
 # src/refresh_pipeline/refresh_changelog.py
 
-import chromadb
-from datetime import datetime
-from prefect import flow
+from prefect import flow, task
+from prefect.cache_policies import NO_CACHE
 from src.loaders.cursor.load_cursor_changelog import fetch_and_parse_cursor_changelog
 from src.loaders.codeium.load_codeium_changelog import fetch_and_parse_codeium_changelog
-import chromadb.utils.embedding_functions as embedding_functions
-from prefect.blocks.system import Secret
-from prefect.cache_policies import NO_CACHE
-
-# Initialize OpenAI API key.
-secret_block = Secret.load("openai-api-key")
-openai_api_key = secret_block.get()
-
-# Initialize the OpenAI embedding function using the loaded API key.
-openai_ef = embedding_functions.OpenAIEmbeddingFunction(
-    api_key=openai_api_key, model_name="text-embedding-3-small"
+from src.corpus.digests import DIGESTS_ENABLED, digest_collection
+from src.corpus.records import doc_type_of
+from src.embeddings.budget import activate_budget, start_token_budget
+from src.embeddings.factory import get_embedding_function
+from src.refresh_pipeline.checkpoints import (
+    activate,
+    load_with_checkpoint,
+    start_checkpointed_run,
 )
+from src.refresh_pipeline.ingest import sync_records
+from src.refresh_pipeline.metrics import activate_metrics, start_metrics
+from src.vector_store.routing import stored_collections
 
 
-def clean_metadata(metadata: dict) -> dict:
+def store_count() -> int:
     """
-    Remove keys with None values and remove the 'changes' key to avoid duplicating
-    the raw text (which is already stored in the documents field).
+    Returns the number of records across every collection of the store.
     """
-    cleaned = {k: v for k, v in metadata.items() if v is not None}
-    cleaned.pop("changes", None)
-    return cleaned
+    try:
+        return sum(collection.count() for collection in stored_collections())
+    except Exception:
+        # The collection doesn't exist before the first refresh.
+        return 0
 
 
-def find_new_items(collection, changelogs):
+@task(cache_policy=NO_CACHE)
+def generate_digests(records) -> dict:
     """
-    Check each changelog by its unique_id and return a list of new items
-    that are not already present in the collection.
+    Background stage of a refresh: digests the stored documents of the records'
+    (company, doc_type) pairs that don't have an up-to-date digest yet. The flows
+    submit it after syncing a source and carry on while it runs.
     """
-    new_items = []
-    for changelog in changelogs:
-        if not changelog.unique_id:
-            print(f"Skipping changelog with missing unique_id: {changelog.title}")
-            continue
-
-        result = collection.get(ids=[changelog.unique_id])
-        if not result["ids"]:
-            new_items.append(changelog)
-            print("------------- !!!!!!! -------------")
-            print(f"New changelog detected: {changelog.unique_id} - {changelog.title}")
-            print("------------- !!!!!!! -------------")
-            # TODO: Add a notification to Slack here
-        else:
-            print(f"Changelog already exists: {changelog.unique_id}")
-    return new_items
+    scopes = {(record.company.value, doc_type_of(record)) for record in records}
+    totals = {"digested": 0, "failed": 0}
+    if not scopes:
+        return totals
+    for collection in stored_collections():
+        for key, value in digest_collection(collection, scopes).items():
+            totals[key] += value
+    return totals
 
 
-def embed_and_add_items(collection, new_items):
+def wait_for_digests(futures) -> dict:
     """
-    Prepare metadata and add the new changelogs to the collection.
-    The raw text is stored only in the documents field.
+    Waits for the submitted generate_digests tasks and returns their totals.
     """
-    # Clean metadata without the duplicate 'changes' field.
-    metadatas_to_add = [
-        clean_metadata(changelog.model_dump()) for changelog in new_items
-    ]
-
-    if new_items:
-        ids_to_add = [changelog.unique_id for changelog in new_items]
-        documents_to_add = [
-            changelog.changes for changelog in new_items
-        ]  # The text to embed.
-        collection.add(
-            ids=ids_to_add,
-            documents=documents_to_add,
-            metadatas=metadatas_to_add,
-        )
-        print(f"Added {len(new_items)} new changelogs to the collection.")
-    else:
-        print("No new changelogs found.")
+    totals = {"digested": 0, "failed": 0}
+    for future in futures:
+        try:
+            result = future.result()
+        except Exception as e:
+            print(f"Digest stage failed: {e!r}")
+            continue
+        for key, value in result.items():
+            totals[key] += value
+    return totals
 
 
 @flow(log_prints=True)
-def refresh_changelog():
+def refresh_changelog(resume: bool = True):
     """
-    This Prefect flow refreshes the changelog collection by fetching new changelogs from
-    both Codeium and Cursor and adding them to the collection. It prints the number
-    of items in the collection before and after processing.
+    This Prefect flow refreshes the changelog collection by fetching changelogs from
+    both Codeium and Cursor and syncing them into the collection: new and edited
+    entries are upserted and entries removed upstream are deleted. It prints the
+    number of items in the collection before and after processing. With DIGESTS=1
+    the changelogs are then digested in the background.
+
+    Progress is checkpointed per stage. If a run crashes, the next run resumes it
+    (unless resume=False or the run is older than REFRESH_RESUME_MAX_AGE) and
+    reuses the pages and changelogs it already fetched.
+
+    Every stage is measured, and a JSON metrics report of the run is written to
+    ./reports/refresh with a summary printed at the end. The report is returned.
     """
-    client = chromadb.PersistentClient(path="./data")
-
-    # Get or create the persistent collection with the OpenAI embedding function.
-    collection = client.get_or_create_collection(
-        name="coding_assistant_document_dump",
-        embedding_function=openai_ef,
-        metadata={"last_update_date": datetime.now().isoformat()},
-    )
-
-    original_count = collection.count()
-    print("Number of items in the collection before processing:", original_count)
-
-    # Load changelogs from both sources.
-    codeium_changelogs = fetch_and_parse_codeium_changelog()
-    cursor_changelogs = fetch_and_parse_cursor_changelog()
-    all_changelogs = codeium_changelogs + cursor_changelogs
+    embedding_function = get_embedding_function()
+    checkpoint = start_checkpointed_run("refresh_changelog", resume=resume)
+    try:
+        metrics = start_metrics("refresh_changelog", checkpoint.run_id)
+        budget = start_token_budget()
+
+        # Load changelogs from both sources.
+        codeium_changelogs = load_with_checkpoint(
+            "codeium_changelog", fetch_and_parse_codeium_changelog
+        )
+        cursor_changelogs = load_with_checkpoint(
+            "cursor_changelog", fetch_and_parse_cursor_changelog
+        )
+        all_changelogs = codeium_changelogs + cursor_changelogs
 
-    # Find new items that are not in the collection.
-    new_items = find_new_items(collection, all_changelogs)
+        original_count = store_count()
+        print("Number of items in the collection before processing:", original_count)
 
-    # Embed and add the new changelogs.
-    embed_and_add_items(collection, new_items)
+        # Sync the changelogs: upsert new and edited entries, delete removed ones.
+        summary = sync_records(all_changelogs, embedding_function)
+        print(
+            f"New: {summary['new']}, changed: {summary['changed']}, "
+            f"deleted: {summary['deleted']}, near-duplicates: {summary['duplicates']}, "
+            f"deferred: {summary['deferred']}"
+        )
+        digest_futures = [generate_digests.submit(all_changelogs)] if DIGESTS_ENABLED else []
+
+        final_count = store_count()
+        print("Number of items in the collection after processing:", final_count)
+        print("Difference:", final_count - original_count)
+        print("Embedding cache:", embedding_function.cache.stats())
+        print("Token budget:", budget.summary())
+        digests = wait_for_digests(digest_futures)
+        if DIGESTS_ENABLED:
+            print("Digests:", digests)
+        report = metrics.finish(
+            sync=summary,
+            digests=digests,
+            store_count={"before": original_count, "after": final_count},
+            embedding_cache=embedding_function.cache.stats(),
+            token_budget=budget.summary(),
+        )
 
-    final_count = collection.count()
-    print("Number of items in the collection after processing:", final_count)
-    print("Difference:", final_count - original_count)
+        # The run completed, so its checkpoints are no longer needed.
+        checkpoint.finish()
+        return report
+    finally:
+        # Also after a failure, so the next flow in this process doesn't write
+        # into this run's checkpoint, metrics or budget.
+        checkpoint.close()
+        activate(None)
+        activate_metrics(None)
+        activate_budget(None)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,22 @@
+# src/utils/hashing.py
+
+import hashlib
+import json
+
+
+def content_hash(document: str, metadata: dict | None = None) -> str:
+    """
+    Returns a stable sha256 hex digest for a document and its metadata.
+
+    The metadata is serialized with sorted keys so the hash does not depend on
+    dict ordering. Any existing 'content_hash' key is ignored, which lets the
+    hash be computed from metadata that has already been stamped with one.
+    """
+    metadata = {k: v for k, v in (metadata or {}).items() if k != "content_hash"}
+    payload = json.dumps(
+        {"document": document, "metadata": metadata},
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
@@ -0,0 +1,18 @@
+# src/utils/logs.py
+
+import os
+
+# Number of ids named in a summary log line. Flows run with log_prints=True, so
+# every print is a Prefect log record; per-record lines would cost one each.
+LOG_SAMPLE_SIZE = int(os.environ.get("LOG_SAMPLE_SIZE", "5"))
+
+
+def sample_ids(ids, limit: int = LOG_SAMPLE_SIZE) -> str:
+    """
+    Formats up to limit ids for a log line, e.g. 'a, b, c (+12 more)'.
+    """
+    ids = list(ids)
+    shown = ", ".join(str(id_) for id_ in ids[:limit])
+    if len(ids) > limit:
+        shown += f" (+{len(ids) - limit} more)"
+    return shown
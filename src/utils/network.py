@@ -1,39 +1,112 @@
 # src/utils/network.py
 
-from playwright.sync_api import sync_playwright
 import httpx
+import os
 import re
 from prefect import task
+from src.refresh_pipeline.checkpoints import active_checkpoint
+from src.refresh_pipeline.metrics import measure
 
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (compatible; BlogLoader/1.0; +https://example.com)"
 }
 
+# Recorded HTML fixtures. With REFRESH_FIXTURES_DIR set, pages are served from the
+# directory in "replay" mode (no network access at all) or fetched live and saved
+# into it in "record" mode.
+FIXTURES_DIR = os.environ.get("REFRESH_FIXTURES_DIR")
+FIXTURES_MODE = os.environ.get("REFRESH_FIXTURES_MODE", "replay")
+
+
+def fixture_path(url: str, fixtures_dir: str) -> str:
+    """
+    Returns the file a URL's page is recorded in, e.g.
+    https://docs.cursor.com/get-started -> docs_cursor_com_get_started.html
+    """
+    name = re.sub(r"[^A-Za-z0-9]+", "_", url.split("://", 1)[-1]).strip("_")
+    return os.path.join(fixtures_dir, f"{name}.html")
+
+
+def read_fixture(url: str) -> str | None:
+    """
+    Returns the recorded page of a URL in replay mode, None otherwise. A page that
+    was not recorded is an error in replay mode, since it would need the network.
+    """
+    if not FIXTURES_DIR or FIXTURES_MODE != "replay":
+        return None
+    path = fixture_path(url, FIXTURES_DIR)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No recorded fixture for {url} (expected {path})")
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+def record_fixture(url: str, html: str) -> None:
+    """
+    Saves a fetched page into the fixtures directory in record mode.
+    """
+    if FIXTURES_DIR and FIXTURES_MODE == "record":
+        os.makedirs(FIXTURES_DIR, exist_ok=True)
+        with open(fixture_path(url, FIXTURES_DIR), "w", encoding="utf-8") as f:
+            f.write(html)
+
 
 @task
-def fetch(url: str) -> str:
+def fetch(url: str, stage: str = "fetch") -> str:
     """
     Fetches the raw HTML (or XML) content for a given URL using httpx.
     Raises an error if the response status is not 200.
+    Pages already fetched by the active refresh run are served from its checkpoint,
+    and pages are served from the recorded fixtures in replay mode.
+    The request is measured as a call of the given refresh stage.
     """
-    with httpx.Client(headers=HEADERS, timeout=30) as client:
-        response = client.get(url)
-        response.raise_for_status()
-        return response.text
+    with measure(stage) as sample:
+        checkpoint = active_checkpoint()
+        html = checkpoint.get_page(url) if checkpoint is not None else None
+        sample.cached = html is not None
+        if html is None:
+            html = read_fixture(url)
+        if html is None:
+            with httpx.Client(headers=HEADERS, timeout=30) as client:
+                response = client.get(url)
+                response.raise_for_status()
+                html = response.text
+            record_fixture(url, html)
+        if checkpoint is not None and not sample.cached:
+            checkpoint.put_page(url, html)
+        sample.bytes = len(html.encode("utf-8"))
+    return html
 
 
 @task
 def fetch_rendered(url: str) -> str:
     """
     Fetches the rendered HTML content for a given URL using Playwright.
+    Pages already fetched by the active refresh run are served from its checkpoint,
+    and pages are served from the recorded fixtures in replay mode.
+    The render is measured as a call of the 'render' refresh stage.
     """
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        page = browser.new_page()
-        page.goto(url, wait_until="networkidle")
-        content = page.content()  # Gets the fully rendered HTML
-        browser.close()
-        return content
+    with measure("render") as sample:
+        checkpoint = active_checkpoint()
+        content = checkpoint.get_page(url) if checkpoint is not None else None
+        sample.cached = content is not None
+        if content is None:
+            content = read_fixture(url)
+        if content is None:
+            # Playwright is only imported for pages that have to be rendered.
+            from playwright.sync_api import sync_playwright
+
+            with sync_playwright() as p:
+                browser = p.chromium.launch(headless=True)
+                page = browser.new_page()
+                page.goto(url, wait_until="networkidle")
+                content = page.content()  # Gets the fully rendered HTML
+                browser.close()
+            record_fixture(url, content)
+        if checkpoint is not None and not sample.cached:
+            checkpoint.put_page(url, content)
+        sample.bytes = len(content.encode("utf-8"))
+    return content
 
 
 if __name__ == "__main__":
@@ -0,0 +1,31 @@
+# src/utils/secrets.py
+
+import os
+import threading
+
+# Environment variables that override a Prefect Secret block, so the assistant and
+# offline tools can run without a Prefect server.
+SECRET_ENV_VARS = {
+    "openai-api-key": "OPENAI_API_KEY",
+    "logfire-write-token": "LOGFIRE_TOKEN",
+}
+
+_secrets = {}
+_secrets_lock = threading.Lock()
+
+
+def get_secret(name: str) -> str:
+    """
+    Returns a secret, loading it on first use: from its environment variable if set,
+    otherwise from the Prefect Secret block of that name. Prefect is only imported
+    when a block has to be loaded.
+    """
+    with _secrets_lock:
+        if name not in _secrets:
+            value = os.environ.get(SECRET_ENV_VARS.get(name, ""))
+            if not value:
+                from prefect.blocks.system import Secret
+
+                value = Secret.load(name).get()
+            _secrets[name] = value
+        return _secrets[name]
@@ -0,0 +1,66 @@
+# src/vector_store/dimensions.py
+
+import time
+
+from src.embeddings.dimensions import DIM_METADATA_KEY, collection_dim, reduce_embeddings
+from src.vector_store.hnsw import collection_metadata_with_hnsw, replace_collection
+
+
+def migrate_collection_dim(client, name: str, dim: int, page_size: int = 5_000) -> int:
+    """
+    Reduces the vectors stored in a collection to dim dimensions without calling
+    the embedding API: a prefix of a reduced vector is the same prefix of the full
+    vector, so truncating and renormalizing the stored vectors gives exactly what
+    embedding the documents again at dim would. The records are copied into a new
+    collection recording the new dimension, which takes over the original name.
+
+    Vectors can only be made smaller. Going back to a larger dimension means
+    re-embedding, which the embedding cache makes free for text it still holds:
+    delete the collection and run a refresh. Returns the number of records copied,
+    or 0 if the collection already has the requested dimension.
+    """
+    collection = client.get_collection(name=name)
+    current = collection_dim(collection)
+    if dim == current:
+        print(f"{name} already holds {dim}-dimensional vectors")
+        return 0
+    if dim > current:
+        raise ValueError(
+            f"{name} holds {current}-dimensional vectors, which can't be extended to {dim}"
+        )
+
+    start = time.perf_counter()
+    metadata = {**collection_metadata_with_hnsw(collection), DIM_METADATA_KEY: dim}
+    copied = replace_collection(
+        client,
+        name,
+        metadata,
+        page_size=page_size,
+        transform=lambda embeddings: reduce_embeddings(embeddings, dim),
+    )
+    print(
+        f"Reduced {name} ({copied} records) from {current} to {dim} dimensions "
+        f"in {time.perf_counter() - start:.2f}s"
+    )
+    return copied
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from src.embeddings.dimensions import EMBEDDING_DIM
+    from src.vector_store.routing import stored_collections
+    from src.vector_store.store import get_client, write_lock
+
+    parser = argparse.ArgumentParser(
+        description="Reduce the stored vectors to a smaller embedding dimension."
+    )
+    parser.add_argument("--dim", type=int, default=EMBEDDING_DIM)
+    args = parser.parse_args()
+
+    with write_lock():
+        for collection in stored_collections():
+            migrate_collection_dim(get_client(), collection.name, args.dim)
+
+# to run
+# EMBEDDING_DIM=512 python -m src.vector_store.dimensions
@@ -0,0 +1,175 @@
+# src/vector_store/hnsw.py
+
+import time
+
+from src.vector_store.store import DISTANCE_SPACE_KEY, bump_last_update_date
+
+# Chroma's defaults for collections created without hnsw settings.
+HNSW_DEFAULTS = {
+    "hnsw:space": "l2",
+    "hnsw:M": 16,
+    "hnsw:construction_ef": 100,
+    "hnsw:search_ef": 10,
+}
+
+
+def hnsw_metadata(
+    M: int | None = None,
+    construction_ef: int | None = None,
+    search_ef: int | None = None,
+    space: str | None = None,
+) -> dict:
+    """
+    Returns the collection metadata keys for the given HNSW parameters, skipping
+    any that are None.
+    """
+    params = {
+        "hnsw:space": space,
+        "hnsw:M": M,
+        "hnsw:construction_ef": construction_ef,
+        "hnsw:search_ef": search_ef,
+    }
+    return {k: v for k, v in params.items() if v is not None}
+
+
+def current_hnsw_settings(collection) -> dict:
+    """
+    Returns the effective HNSW parameters of a collection, filling in Chroma's
+    defaults for any that weren't set when it was created. The distance is read
+    from DISTANCE_SPACE_KEY once a metadata update has dropped 'hnsw:space'.
+    """
+    metadata = collection.metadata or {}
+    settings = {k: metadata.get(k, default) for k, default in HNSW_DEFAULTS.items()}
+    if "hnsw:space" not in metadata and DISTANCE_SPACE_KEY in metadata:
+        settings["hnsw:space"] = metadata[DISTANCE_SPACE_KEY]
+    return settings
+
+
+def collection_metadata_with_hnsw(collection) -> dict:
+    """
+    Returns a collection's metadata with its effective HNSW parameters, to create a
+    copy of it with the same index settings.
+    """
+    metadata = {
+        k: v
+        for k, v in (collection.metadata or {}).items()
+        if not k.startswith("hnsw:") and k != DISTANCE_SPACE_KEY
+    }
+    return {**metadata, **current_hnsw_settings(collection)}
+
+
+def copy_collection(source, target, page_size: int = 5_000, transform=None) -> int:
+    """
+    Copies every record of source into target, reusing the stored embeddings so no
+    embedding calls are made. If given, transform is applied to each page of
+    embeddings before they are written. Returns the number of records copied.
+    """
+    copied = 0
+    while True:
+        page = source.get(
+            include=["documents", "metadatas", "embeddings"],
+            limit=page_size,
+            offset=copied,
+        )
+        if not page["ids"]:
+            break
+        embeddings = page["embeddings"]
+        if transform is not None:
+            embeddings = transform(embeddings)
+        target.add(
+            ids=page["ids"],
+            documents=page["documents"],
+            metadatas=page["metadatas"],
+            embeddings=embeddings,
+        )
+        copied += len(page["ids"])
+    return copied
+
+
+def replace_collection(
+    client, name: str, metadata: dict, page_size: int = 5_000, transform=None
+) -> int:
+    """
+    Copies a collection into a new one created with the given metadata, which then
+    takes over the original name. The original collection is kept under
+    '<name>__previous' until the new one is in place and is then dropped.
+
+    The new collection's last_update_date is bumped once it has the name, so the
+    readers that compare it (the hot tier, the quantized index, the query result
+    cache) reload instead of serving the old vectors. Returns the number of records
+    copied.
+    """
+    source = client.get_collection(name=name)
+    staging_name = f"{name}__rebuild"
+    if staging_name in set(client.list_collections()):
+        client.delete_collection(staging_name)
+    staging = client.create_collection(
+        name=staging_name, metadata=metadata, embedding_function=None
+    )
+    copied = copy_collection(source, staging, page_size=page_size, transform=transform)
+
+    # Swap names, keeping the old collection until the new one is in place.
+    previous_name = f"{name}__previous"
+    source.modify(name=previous_name)
+    staging.modify(name=name)
+    client.delete_collection(previous_name)
+    bump_last_update_date(staging)
+    return copied
+
+
+def rebuild_collection(
+    client,
+    name: str,
+    M: int | None = None,
+    construction_ef: int | None = None,
+    search_ef: int | None = None,
+    page_size: int = 5_000,
+) -> dict:
+    """
+    Rebuilds a collection's HNSW index with new parameters.
+
+    Chroma fixes HNSW parameters when a collection is created, so the records are
+    copied (with their embeddings) into a new collection built with the requested
+    parameters, which then takes over the original name. The original collection is
+    kept under '<name>__previous' until the new one is in place and is then dropped.
+    Parameters that are not given keep their current value. Returns the new settings.
+    """
+    source = client.get_collection(name=name)
+    metadata = {
+        **collection_metadata_with_hnsw(source),
+        **hnsw_metadata(M, construction_ef, search_ef),
+    }
+    settings = {k: metadata[k] for k in HNSW_DEFAULTS}
+
+    start = time.perf_counter()
+    copied = replace_collection(client, name, metadata, page_size=page_size)
+    print(
+        f"Rebuilt {name} ({copied} records) with {settings} "
+        f"in {time.perf_counter() - start:.2f}s"
+    )
+    return settings
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from src.vector_store.store import COLLECTION_NAME, get_client, write_lock
+
+    parser = argparse.ArgumentParser(description="Rebuild the collection's HNSW index.")
+    parser.add_argument("--collection", default=COLLECTION_NAME)
+    parser.add_argument("--M", type=int)
+    parser.add_argument("--construction-ef", type=int)
+    parser.add_argument("--search-ef", type=int)
+    args = parser.parse_args()
+
+    with write_lock():
+        rebuild_collection(
+            get_client(),
+            args.collection,
+            M=args.M,
+            construction_ef=args.construction_ef,
+            search_ef=args.search_ef,
+        )
+
+# to run
+# python -m src.vector_store.hnsw --M 32 --construction-ef 200 --search-ef 64
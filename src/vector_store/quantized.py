@@ -0,0 +1,373 @@
+# src/vector_store/quantized.py
+
+import os
+import threading
+import time
+from typing import Optional
+
+import numpy as np
+
+from src.corpus.chunking import CHUNK_OVERSAMPLE, CHUNKING_ENABLED, collapse_chunks
+from src.vector_store.routing import COMPANIES, DOC_TYPES, stored_collections
+
+# Quantized sidecar index settings. QUANTIZED_INDEX=int8 keeps one byte per
+# dimension (4x smaller than float32), QUANTIZED_INDEX=binary one bit (32x
+# smaller). The sidecar finds QUANTIZED_RESCORE times n_results candidates, which
+# are then rescored with their full-precision vectors fetched from Chroma.
+QUANTIZED_INDEX = os.environ.get("QUANTIZED_INDEX", "")
+QUANTIZED_RESCORE = int(os.environ.get("QUANTIZED_RESCORE", "10"))
+QUANTIZED_INDEX_DIR = os.environ.get("QUANTIZED_INDEX_DIR", "./cache")
+MODES = ("int8", "binary")
+
+# Rows scored per step of the coarse search, which bounds the float32 copy of the
+# int8 codes that the matrix product needs.
+SCORE_BLOCK_ROWS = 4096
+
+# Number of set bits of every byte value, for Hamming distances on packed bits.
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def _code(values: list[str], value: Optional[str]) -> int:
+    """
+    Returns the position of value in values, or -1 if it isn't one of them.
+    """
+    return values.index(value) if value in values else -1
+
+
+def int8_scale(vectors: np.ndarray) -> np.ndarray:
+    """
+    Returns the per-dimension scale mapping the largest absolute value of each
+    dimension to 127. Larger values seen later are clipped.
+    """
+    scale = np.abs(vectors).max(axis=0) / 127
+    return np.where(scale == 0, 1, scale).astype(np.float32)
+
+
+def quantize_int8(vectors: np.ndarray, scale: np.ndarray) -> np.ndarray:
+    return np.clip(np.rint(vectors / scale), -127, 127).astype(np.int8)
+
+
+def quantize_binary(vectors: np.ndarray) -> np.ndarray:
+    """
+    Keeps the sign of each dimension, packed 8 dimensions per byte.
+    """
+    return np.packbits(vectors > 0, axis=-1)
+
+
+class QuantizedIndex:
+    """
+    Compact in-memory sidecar over the stored embeddings for cheap candidate search.
+
+    Only the quantized codes, ids and the (company, doc_type) of each record are
+    held in memory. A query is scored against every code (a dot product with the
+    int8 codes, or a Hamming distance to the binary codes), and the best candidates
+    are fetched from Chroma with their float32 vectors and re-ranked by exact
+    squared L2 distance, so returned distances match Chroma's.
+
+    The codes are saved to QUANTIZED_INDEX_DIR together with the collections'
+    last_update_date, so a node restarts without re-reading every embedding unless
+    a refresh has happened since.
+
+    The arrays of one load are swapped in together as one tuple, and each search
+    reads them once, so its codes and ids always come from the same load.
+    """
+
+    def __init__(
+        self,
+        embedding_function,
+        mode: str = QUANTIZED_INDEX or "int8",
+        rescore_factor: int = QUANTIZED_RESCORE,
+        index_dir: str = QUANTIZED_INDEX_DIR,
+        reload_interval: float = 300.0,
+    ):
+        if mode not in MODES:
+            raise ValueError(f"Unknown quantization mode {mode!r}, expected one of {MODES}")
+        self.embedding_function = embedding_function
+        self.mode = mode
+        self.rescore_factor = rescore_factor
+        self.path = os.path.join(index_dir, f"quantized-{mode}.npz") if index_dir else None
+        self.reload_interval = reload_interval
+        self.stats = {"queries": 0, "candidates": 0, "coarse_s": 0.0, "rescore_s": 0.0}
+        self._lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._loaded_at = None
+        self._load_marker = None
+        # (collections, ids, collection_index, company, doc_type, codes, scale)
+        self._arrays = (
+            [],
+            np.empty(0, dtype=object),
+            np.empty(0, dtype=np.int16),
+            np.empty(0, dtype=np.int8),
+            np.empty(0, dtype=np.int8),
+            np.empty((0, 0), dtype=np.uint8),
+            None,
+        )
+
+    @staticmethod
+    def _markers(collections) -> list:
+        return [
+            [collection.name, str((collection.metadata or {}).get("last_update_date"))]
+            for collection in collections
+        ]
+
+    def _swap(self, arrays: tuple, markers: list) -> None:
+        with self._lock:
+            self._arrays = arrays
+            self._loaded_at = time.monotonic()
+            self._load_marker = markers
+
+    def nbytes(self) -> int:
+        """
+        Returns the memory held by the codes and per-record arrays, ids excluded.
+        """
+        _, _, collection_index, company, doc_type, codes, _ = self._arrays
+        return sum(array.nbytes for array in (codes, collection_index, company, doc_type))
+
+    def load(self, page_size: int = 10_000) -> int:
+        """
+        (Re)builds the codes from the stored embeddings, page by page so the
+        float32 vectors are never all in memory at once, and saves them. Returns the
+        number of indexed records.
+        """
+        collections = stored_collections()
+        markers = self._markers(collections)
+        if self._load_saved(collections, markers):
+            return len(self._arrays[1])
+
+        start = time.perf_counter()
+        ids, collection_index, companies, doc_types, codes = [], [], [], [], []
+        scale = None
+        for c, collection in enumerate(collections):
+            offset = 0
+            while True:
+                page = collection.get(
+                    include=["metadatas", "embeddings"], limit=page_size, offset=offset
+                )
+                if not page["ids"]:
+                    break
+                vectors = np.asarray(page["embeddings"], dtype=np.float32)
+                if self.mode == "int8":
+                    # Calibrated on the first page; later outliers are clipped.
+                    if scale is None:
+                        scale = int8_scale(vectors)
+                    codes.append(quantize_int8(vectors, scale))
+                else:
+                    codes.append(quantize_binary(vectors))
+                ids += page["ids"]
+                collection_index += [c] * len(page["ids"])
+                for metadata in page["metadatas"]:
+                    metadata = metadata or {}
+                    companies.append(_code(COMPANIES, metadata.get("company")))
+                    doc_types.append(_code(DOC_TYPES, metadata.get("doc_type", "changelog")))
+                offset += len(page["ids"])
+
+        arrays = (
+            collections,
+            np.array(ids, dtype=object),
+            np.array(collection_index, dtype=np.int16),
+            np.array(companies, dtype=np.int8),
+            np.array(doc_types, dtype=np.int8),
+            np.concatenate(codes) if codes else np.empty((0, 0), dtype=np.uint8),
+            scale,
+        )
+        self._swap(arrays, markers)
+        self._save(arrays, markers)
+        print(
+            f"Built the {self.mode} index over {len(ids)} records "
+            f"({self.nbytes() / 1e6:.1f} MB) in {time.perf_counter() - start:.2f}s"
+        )
+        return len(ids)
+
+    def _save(self, arrays: tuple, markers: list) -> None:
+        if not self.path:
+            return
+        _, ids, collection_index, company, doc_type, codes, scale = arrays
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        # np.savez appends .npz to names without it, so write to '<name>.tmp.npz'.
+        tmp_path = f"{self.path[: -len('.npz')]}.tmp.npz"
+        np.savez(
+            tmp_path,
+            markers=np.array(markers, dtype=str).reshape(-1, 2),
+            ids=ids.astype(str),
+            collection_index=collection_index,
+            company=company,
+            doc_type=doc_type,
+            codes=codes,
+            scale=scale if scale is not None else np.empty(0, dtype=np.float32),
+        )
+        os.replace(tmp_path, self.path)
+
+    def _load_saved(self, collections, markers: list) -> bool:
+        """
+        Loads the saved codes if they were built from the current collections.
+        """
+        if not self.path or not os.path.exists(self.path):
+            return False
+        with np.load(self.path) as saved:
+            if saved["markers"].tolist() != markers:
+                return False
+            arrays = (
+                collections,
+                saved["ids"].astype(object),
+                saved["collection_index"],
+                saved["company"],
+                saved["doc_type"],
+                saved["codes"],
+                saved["scale"] if saved["scale"].size else None,
+            )
+        self._swap(arrays, markers)
+        print(f"Loaded the {self.mode} index over {len(arrays[1])} records from {self.path}")
+        return True
+
+    def _maybe_reload(self) -> None:
+        """
+        Reloads the codes when they have never been loaded or reload_interval has
+        passed and a refresh has bumped a collection's last_update_date since.
+
+        One query at a time checks and reloads. Once the codes are loaded, the
+        others keep searching them instead of waiting for the reload.
+        """
+        loaded_at = self._loaded_at
+        if loaded_at is not None and time.monotonic() - loaded_at < self.reload_interval:
+            return
+        if not self._reload_lock.acquire(blocking=loaded_at is None):
+            return
+        try:
+            if self._loaded_at is None:
+                self.load()
+                return
+            if time.monotonic() - self._loaded_at < self.reload_interval:
+                return
+            if self._markers(stored_collections()) != self._load_marker:
+                self.load()
+            else:
+                with self._lock:
+                    self._loaded_at = time.monotonic()
+        finally:
+            self._reload_lock.release()
+
+    def search_coarse(
+        self,
+        query_embedding,
+        n_candidates: int,
+        companies: Optional[list[str]] = None,
+        doc_types: Optional[list[str]] = None,
+        arrays: Optional[tuple] = None,
+    ) -> np.ndarray:
+        """
+        Returns the row numbers of the n_candidates best-scoring records, best first.
+        Rows refer to arrays, the currently loaded ones by default.
+        """
+        _, _, _, company, doc_type, codes, scale = arrays or self._arrays
+        if not len(codes):
+            return np.empty(0, dtype=np.int64)
+
+        query = np.asarray(query_embedding, dtype=np.float32)
+        # Lower is better for both scores.
+        scores = np.empty(len(codes), dtype=np.float32)
+        if self.mode == "int8":
+            # codes * scale approximates each vector, so its dot product with the
+            # query is codes @ (query * scale).
+            weights = query * scale
+            for start in range(0, len(codes), SCORE_BLOCK_ROWS):
+                block = codes[start : start + SCORE_BLOCK_ROWS]
+                scores[start : start + len(block)] = -(block.astype(np.float32) @ weights)
+        else:
+            query_bits = quantize_binary(query)
+            for start in range(0, len(codes), SCORE_BLOCK_ROWS):
+                block = codes[start : start + SCORE_BLOCK_ROWS]
+                scores[start : start + len(block)] = _POPCOUNT[block ^ query_bits].sum(
+                    axis=1, dtype=np.uint32
+                )
+
+        if companies or doc_types:
+            mask = np.ones(len(codes), dtype=bool)
+            if companies:
+                mask &= np.isin(company, [_code(COMPANIES, c) for c in companies])
+            if doc_types:
+                mask &= np.isin(doc_type, [_code(DOC_TYPES, d) for d in doc_types])
+            scores = np.where(mask, scores, np.inf)
+
+        n = min(n_candidates, len(codes))
+        top = np.argpartition(scores, n - 1)[:n]
+        top = top[np.argsort(scores[top])]
+        return top[np.isfinite(scores[top])]
+
+    def ids_of(self, rows: np.ndarray, arrays: Optional[tuple] = None) -> list[str]:
+        return (arrays or self._arrays)[1][rows].tolist()
+
+    def rescore(
+        self,
+        query_embedding,
+        rows: np.ndarray,
+        n_results: int,
+        arrays: Optional[tuple] = None,
+    ) -> list[dict]:
+        """
+        Fetches the candidate rows from Chroma with their full-precision vectors and
+        returns the n_results closest by exact squared L2 distance.
+        """
+        collections, ids, collection_index, _, _, _, _ = arrays or self._arrays
+        query = np.asarray(query_embedding, dtype=np.float32)
+        hits = []
+        for c in np.unique(collection_index[rows]):
+            candidate_ids = ids[rows[collection_index[rows] == c]].tolist()
+            found = collections[c].get(
+                ids=candidate_ids, include=["documents", "metadatas", "embeddings"]
+            )
+            if not found["ids"]:
+                continue
+            vectors = np.asarray(found["embeddings"], dtype=np.float32)
+            distances = ((vectors - query) ** 2).sum(axis=1)
+            hits += [
+                {"id": id_, "document": document, "metadata": metadata, "distance": float(distance)}
+                for id_, document, metadata, distance in zip(
+                    found["ids"], found["documents"], found["metadatas"], distances
+                )
+            ]
+        return sorted(hits, key=lambda hit: hit["distance"])[:n_results]
+
+    def search(
+        self,
+        query_embedding,
+        n_results: int,
+        companies: Optional[list[str]] = None,
+        doc_types: Optional[list[str]] = None,
+    ) -> list[dict]:
+        """
+        Coarse search over the codes followed by full-precision rescoring.
+        """
+        arrays = self._arrays
+        start = time.perf_counter()
+        rows = self.search_coarse(
+            query_embedding, n_results * self.rescore_factor, companies, doc_types, arrays
+        )
+        coarse_done = time.perf_counter()
+        hits = self.rescore(query_embedding, rows, n_results, arrays)
+        with self._lock:
+            self.stats["queries"] += 1
+            self.stats["candidates"] += len(rows)
+            self.stats["coarse_s"] += coarse_done - start
+            self.stats["rescore_s"] += time.perf_counter() - coarse_done
+        return hits
+
+    def query(
+        self,
+        query: str,
+        n_results: int = 3,
+        companies: Optional[list[str]] = None,
+        doc_types: Optional[list[str]] = None,
+    ) -> list[dict]:
+        """
+        Returns the n_results closest hits, in the same shape as query_store.
+        """
+        self._maybe_reload()
+        query_embedding = self.embedding_function([query])[0]
+        if CHUNKING_ENABLED:
+            return collapse_chunks(
+                self.search(
+                    query_embedding, n_results * CHUNK_OVERSAMPLE, companies, doc_types
+                ),
+                n_results,
+            )
+        return self.search(query_embedding, n_results, companies, doc_types)
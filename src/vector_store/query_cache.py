@@ -0,0 +1,172 @@
+# src/vector_store/query_cache.py
+
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from src.vector_store.routing import stored_collections
+
+# Query result cache settings. With QUERY_CACHE=1 the assistant keeps the hits of
+# recent queries in memory, so a repeated question skips both the query embedding
+# and the vector search. Entries expire after QUERY_CACHE_TTL seconds, the least
+# recently used are evicted beyond QUERY_CACHE_MAX_ENTRIES, and everything is
+# dropped when a refresh bumps a collection's last_update_date.
+QUERY_CACHE_ENABLED = os.environ.get("QUERY_CACHE", "0") == "1"
+QUERY_CACHE_MAX_ENTRIES = int(os.environ.get("QUERY_CACHE_MAX_ENTRIES", "1024"))
+QUERY_CACHE_TTL = float(os.environ.get("QUERY_CACHE_TTL", "600"))
+# How often, at most, lookups check the store for a refresh.
+QUERY_CACHE_CHECK_INTERVAL = float(os.environ.get("QUERY_CACHE_CHECK_INTERVAL", "5"))
+
+_WHITESPACE_REGEX = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """
+    Lowercases a query, collapses whitespace and drops trailing punctuation, so
+    'Latest Cursor version?' and 'latest cursor version' share a cache entry.
+    """
+    return _WHITESPACE_REGEX.sub(" ", query.lower()).strip().rstrip("?!.").strip()
+
+
+def cache_key(
+    query: str,
+    n_results: int,
+    companies: Optional[list[str]] = None,
+    doc_types: Optional[list[str]] = None,
+) -> tuple:
+    return (
+        normalize_query(query),
+        n_results,
+        tuple(sorted(companies or [])),
+        tuple(sorted(doc_types or [])),
+    )
+
+
+def store_marker() -> list:
+    """
+    Returns the (name, last_update_date) of every stored collection. It changes
+    whenever a refresh writes to the store.
+    """
+    return [
+        (collection.name, (collection.metadata or {}).get("last_update_date"))
+        for collection in stored_collections()
+    ]
+
+
+class QueryCache:
+    """
+    In-process LRU cache of query results with a TTL.
+
+    The cache remembers the store marker its entries were computed under. At most
+    every check_interval seconds a lookup re-reads it, and if a refresh has bumped
+    a collection's last_update_date since, every entry is dropped. Hit, miss,
+    expiry, eviction and invalidation counts are kept for stats().
+    """
+
+    def __init__(
+        self,
+        max_entries: int = QUERY_CACHE_MAX_ENTRIES,
+        ttl: float = QUERY_CACHE_TTL,
+        check_interval: float = QUERY_CACHE_CHECK_INTERVAL,
+        marker=store_marker,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.check_interval = check_interval
+        self.marker = marker
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._marker = None
+        self._checked_at = None
+        # Bumped on every invalidation, so results computed across one aren't cached.
+        self._generation = 0
+
+    def _check_marker(self) -> None:
+        """
+        Drops every entry if the store changed since they were computed.
+        """
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < self.check_interval:
+            return
+        marker = self.marker()
+        with self._lock:
+            self._checked_at = now
+            if marker != self._marker:
+                if self._entries:
+                    self.invalidations += 1
+                self._entries.clear()
+                self._marker = marker
+                self._generation += 1
+
+    def get(self, key: tuple):
+        """
+        Returns the cached hits for a key, or None.
+        """
+        self._check_marker()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, hits = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[key]
+                self.expired += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return hits
+
+    def put(self, key: tuple, hits: list[dict], generation: Optional[int] = None) -> None:
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, hits)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(
+        self,
+        query: str,
+        n_results: int,
+        companies: Optional[list[str]],
+        doc_types: Optional[list[str]],
+        compute,
+    ) -> list[dict]:
+        """
+        Returns the cached hits of a query, or calls compute() and caches its hits.
+        """
+        key = cache_key(query, n_results, companies, doc_types)
+        hits = self.get(key)
+        if hits is None:
+            generation = self._generation
+            hits = compute()
+            self.put(key, hits, generation)
+        return hits
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "expired": self.expired,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
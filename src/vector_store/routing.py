@@ -0,0 +1,349 @@
+# src/vector_store/routing.py
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from src.corpus.chunking import (
+    CHUNK_OVERSAMPLE,
+    CHUNKING_ENABLED,
+    collapse_chunks,
+    join_chunks,
+)
+from src.corpus.records import MODEL_BY_DOC_TYPE, doc_type_of
+from src.loaders.models.models import CodeAssistantCompany
+from src.vector_store.hnsw import collection_metadata_with_hnsw
+from src.vector_store.store import COLLECTION_NAME, get_client, get_collection
+
+# Storage layout. "single" keeps every record in COLLECTION_NAME and routes queries
+# with metadata filters. "sharded" stores each (company, doc_type) pair in its own
+# collection so a query only searches the shards it is routed to.
+LAYOUT = os.environ.get("CHROMA_LAYOUT", "single")
+
+COMPANIES = [company.value for company in CodeAssistantCompany]
+DOC_TYPES = list(MODEL_BY_DOC_TYPE)
+
+# Shard handles used by queries, keyed by (client, shard name, embedding function)
+# ids. Looking a shard up costs round trips to a server, so queries reuse them.
+_shard_handles = {}
+_shard_handles_lock = threading.Lock()
+
+
+def is_sharded() -> bool:
+    """
+    Returns True when the store is configured for the sharded layout.
+    """
+    return LAYOUT == "sharded"
+
+
+def shard_name(company: str, doc_type: str) -> str:
+    """
+    Returns the collection name of a (company, doc_type) shard, e.g.
+    'coding_assistant_document_dump__Cursor_Enterprise__changelog'.
+    """
+    return f"{COLLECTION_NAME}__{company}__{doc_type}"
+
+
+def get_shard(
+    company: str,
+    doc_type: str,
+    embedding_function=None,
+    metadata: dict | None = None,
+    create: bool = False,
+):
+    """
+    Returns the collection for a shard. Without create=True, returns None if the
+    shard doesn't exist yet.
+    """
+    client = get_client()
+    name = shard_name(company, doc_type)
+    if create:
+        return client.get_or_create_collection(
+            name=name,
+            embedding_function=embedding_function,
+            metadata={**(metadata or {}), "company": company, "doc_type": doc_type},
+        )
+    if name not in set(client.list_collections()):
+        return None
+    return client.get_collection(name=name, embedding_function=embedding_function)
+
+
+def stored_collections(embedding_function=None) -> list:
+    """
+    Returns every collection that holds documents in the configured layout.
+    """
+    if not is_sharded():
+        return [get_collection(embedding_function=embedding_function)]
+    client = get_client()
+    existing = set(client.list_collections())
+    return [
+        client.get_collection(name=name, embedding_function=embedding_function)
+        for name in (
+            shard_name(company, doc_type) for company in COMPANIES for doc_type in DOC_TYPES
+        )
+        if name in existing
+    ]
+
+
+def cached_shards(
+    companies: Optional[list[str]] = None,
+    doc_types: Optional[list[str]] = None,
+    embedding_function=None,
+) -> list:
+    """
+    Returns the existing shards of the selected companies and doc types (all of
+    them when omitted) for queries. Handles are kept per client, so the collection
+    list is only fetched when a shard isn't cached yet. Unlike stored_collections,
+    their metadata can be stale.
+    """
+    client = get_client()
+    keys = [
+        (id(client), shard_name(company, doc_type), id(embedding_function))
+        for company in (companies or COMPANIES)
+        for doc_type in (doc_types or DOC_TYPES)
+    ]
+    with _shard_handles_lock:
+        missing = [key for key in keys if key not in _shard_handles]
+    if missing:
+        existing = set(client.list_collections())
+        for key in missing:
+            if key[1] in existing:
+                shard = client.get_collection(name=key[1], embedding_function=embedding_function)
+                with _shard_handles_lock:
+                    _shard_handles[key] = shard
+    with _shard_handles_lock:
+        return [_shard_handles[key] for key in keys if key in _shard_handles]
+
+
+def forget_shards() -> None:
+    """
+    Drops the cached shard handles, e.g. after a shard was replaced by a rebuild.
+    """
+    with _shard_handles_lock:
+        _shard_handles.clear()
+
+
+def route_records(records, embedding_function=None, metadata: dict | None = None):
+    """
+    Groups records by the collection they are stored in and returns a list of
+    (collection, records) pairs. In the single layout there is one pair for the
+    main collection; in the sharded layout there is one per (company, doc_type).
+    """
+    if not is_sharded():
+        collection = get_collection(
+            embedding_function=embedding_function, metadata=metadata, create=True
+        )
+        return [(collection, list(records))]
+
+    groups = {}
+    for record in records:
+        groups.setdefault((record.company.value, doc_type_of(record)), []).append(record)
+    return [
+        (get_shard(company, doc_type, embedding_function, metadata, create=True), group)
+        for (company, doc_type), group in sorted(groups.items())
+    ]
+
+
+def build_where(
+    companies: Optional[list[str]] = None, doc_types: Optional[list[str]] = None
+) -> Optional[dict]:
+    """
+    Builds the Chroma metadata filter for a set of companies and doc types.
+    """
+    conditions = []
+    if companies:
+        conditions.append({"company": {"$in": list(companies)}})
+    if doc_types:
+        conditions.append({"doc_type": {"$in": list(doc_types)}})
+    if not conditions:
+        return None
+    if len(conditions) == 1:
+        return conditions[0]
+    return {"$and": conditions}
+
+
+def _flatten(result) -> list[dict]:
+    """
+    Turns the result of a single-query collection.query call into a list of hits.
+    """
+    return [
+        {"id": id_, "document": document, "metadata": metadata, "distance": distance}
+        for id_, document, metadata, distance in zip(
+            result["ids"][0],
+            result["documents"][0],
+            result["metadatas"][0],
+            result["distances"][0],
+        )
+    ]
+
+
+def query_store(
+    query: str,
+    n_results: int = 3,
+    companies: Optional[list[str]] = None,
+    doc_types: Optional[list[str]] = None,
+    embedding_function=None,
+    query_embedding=None,
+) -> list[dict]:
+    """
+    Runs a similarity query against the partitions selected by companies and
+    doc_types (all of them when omitted) and returns the n_results closest hits,
+    each a dict with 'id', 'document', 'metadata' and 'distance'.
+
+    In the sharded layout the query is embedded once, the selected shards are
+    searched in parallel and their hits are merged by distance. Callers that have
+    already embedded the query can pass query_embedding to skip that step.
+
+    When chunking is enabled, more chunk hits are fetched and collapsed into one
+    hit per parent document.
+    """
+    if CHUNKING_ENABLED:
+        hits = _query_store(
+            query,
+            n_results * CHUNK_OVERSAMPLE,
+            companies,
+            doc_types,
+            embedding_function,
+            query_embedding,
+        )
+        return collapse_chunks(hits, n_results)
+    return _query_store(
+        query, n_results, companies, doc_types, embedding_function, query_embedding
+    )
+
+
+def _query_store(
+    query, n_results, companies, doc_types, embedding_function, query_embedding
+) -> list[dict]:
+    include = ["documents", "metadatas", "distances"]
+    if not is_sharded():
+        collection = get_collection(embedding_function=embedding_function)
+        query_args = (
+            {"query_embeddings": [query_embedding]}
+            if query_embedding is not None
+            else {"query_texts": [query]}
+        )
+        result = collection.query(
+            **query_args,
+            n_results=n_results,
+            where=build_where(companies, doc_types),
+            include=include,
+        )
+        return _flatten(result)
+
+    if query_embedding is None:
+        query_embedding = embedding_function([query])[0]
+
+    def search(shards):
+        # Chroma caps n_results at a shard's size itself, so shards aren't counted first.
+        with ThreadPoolExecutor(max_workers=len(shards)) as executor:
+            results = executor.map(
+                lambda shard: shard.query(
+                    query_embeddings=[query_embedding], n_results=n_results, include=include
+                ),
+                shards,
+            )
+            return [hit for result in results for hit in _flatten(result)]
+
+    shards = cached_shards(companies, doc_types, embedding_function)
+    if not shards:
+        return []
+    try:
+        hits = search(shards)
+    except Exception:
+        # A cached shard may have been deleted or replaced (e.g. by a rebuild) since
+        # it was looked up, so look the shards up again and retry once.
+        forget_shards()
+        shards = cached_shards(companies, doc_types, embedding_function)
+        hits = search(shards) if shards else []
+    return sorted(hits, key=lambda hit: hit["distance"])[:n_results]
+
+
+def fetch_document(document_id: str) -> Optional[dict]:
+    """
+    Returns the stored document with the given id as a hit without a distance, with
+    a chunked document's chunks joined back together, or None if there is none.
+    """
+    if not is_sharded():
+        return _fetch_document([get_collection()], document_id)
+    try:
+        return _fetch_document(cached_shards(), document_id)
+    except Exception:
+        # A cached shard may have been replaced since it was looked up.
+        forget_shards()
+        return _fetch_document(cached_shards(), document_id)
+
+
+def _fetch_document(collections, document_id: str) -> Optional[dict]:
+    for collection in collections:
+        found = collection.get(ids=[document_id], include=["documents", "metadatas"])
+        if not found["ids"]:
+            found = collection.get(
+                where={"parent_id": document_id}, include=["documents", "metadatas"]
+            )
+        if not found["ids"]:
+            continue
+        chunks = sorted(
+            zip(found["documents"], found["metadatas"]),
+            key=lambda chunk: (chunk[1] or {}).get("chunk_index", 0),
+        )
+        metadata = {
+            k: v for k, v in (chunks[0][1] or {}).items() if k not in ("parent_id", "chunk_index")
+        }
+        return {
+            "id": document_id,
+            "document": join_chunks([document for document, _ in chunks]),
+            "metadata": metadata,
+        }
+    return None
+
+
+def migrate_to_shards(page_size: int = 5_000) -> dict:
+    """
+    Copies every record of the single collection into its (company, doc_type)
+    shard, reusing the stored embeddings. Records written before doc_type was
+    stored are treated as changelogs. New shards get the collection's metadata
+    (embedding backend, dimension and HNSW settings). Returns the number of records
+    per shard.
+    """
+    source = get_collection()
+    shard_metadata = collection_metadata_with_hnsw(source)
+    counts = {}
+    offset = 0
+    while True:
+        page = source.get(
+            include=["documents", "metadatas", "embeddings"],
+            limit=page_size,
+            offset=offset,
+        )
+        if not page["ids"]:
+            break
+
+        groups = {}
+        for id_, document, metadata, embedding in zip(
+            page["ids"], page["documents"], page["metadatas"], page["embeddings"]
+        ):
+            metadata = {"doc_type": "changelog", **(metadata or {})}
+            key = (metadata["company"], metadata["doc_type"])
+            group = groups.setdefault(key, ([], [], [], []))
+            for values, value in zip(group, (id_, document, metadata, embedding)):
+                values.append(value)
+
+        for (company, doc_type), (ids, documents, metadatas, embeddings) in groups.items():
+            shard = get_shard(company, doc_type, metadata=shard_metadata, create=True)
+            shard.upsert(
+                ids=ids, documents=documents, metadatas=metadatas, embeddings=embeddings
+            )
+            counts[shard.name] = counts.get(shard.name, 0) + len(ids)
+
+        offset += len(page["ids"])
+    return counts
+
+
+if __name__ == "__main__":
+    for name, count in migrate_to_shards().items():
+        print(f"{name}: {count}")
+
+# to run
+# python -m src.vector_store.routing
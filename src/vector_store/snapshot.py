@@ -0,0 +1,171 @@
+# src/vector_store/snapshot.py
+
+import json
+import time
+from datetime import datetime
+
+import numpy as np
+import pyarrow as pa
+
+from src.embeddings.dimensions import collection_dim
+from src.vector_store.hnsw import collection_metadata_with_hnsw
+from src.vector_store.store import DISTANCE_SPACE_KEY
+
+SNAPSHOT_FORMAT_VERSION = "1"
+
+
+def _snapshot_schema(embedding_dim: int, metadata: dict) -> pa.Schema:
+    """
+    Returns the Arrow schema of a snapshot file. The snapshot-level metadata
+    (format version, source collection name and metadata, dimension) is stored
+    in the schema metadata so it can be read without scanning the rows.
+    """
+    return pa.schema(
+        [
+            pa.field("id", pa.string()),
+            pa.field("document", pa.string()),
+            pa.field("metadata", pa.string()),  # JSON, metadata keys differ per record
+            pa.field("embedding", pa.list_(pa.float32(), embedding_dim)),
+        ],
+        metadata={k: json.dumps(v) for k, v in metadata.items()},
+    )
+
+
+def read_snapshot_info(path: str) -> dict:
+    """
+    Returns the snapshot-level metadata of a snapshot file without reading its rows.
+    """
+    with pa.memory_map(path) as source:
+        schema = pa.ipc.open_file(source).schema
+    return {k.decode(): json.loads(v) for k, v in schema.metadata.items()}
+
+
+def export_snapshot(collection, path: str, page_size: int = 10_000) -> int:
+    """
+    Writes every id, document, metadata and embedding of a collection to a single
+    zstd-compressed Arrow IPC file. Pages are streamed to disk one at a time so the
+    whole collection never has to fit in memory. The collection metadata is saved
+    with its effective HNSW settings, so an import recreates the same distance
+    function. An empty collection is written as a file with no rows. Returns the
+    number of records written.
+    """
+    include = ["documents", "metadatas", "embeddings"]
+    page = collection.get(include=include, limit=page_size, offset=0)
+    embedding_dim = (
+        len(page["embeddings"][0]) if page["ids"] else collection_dim(collection)
+    )
+    schema = _snapshot_schema(
+        embedding_dim,
+        {
+            "format_version": SNAPSHOT_FORMAT_VERSION,
+            "collection_name": collection.name,
+            "collection_metadata": collection_metadata_with_hnsw(collection),
+            "embedding_dim": embedding_dim,
+            "created_at": datetime.now().isoformat(),
+        },
+    )
+    written = 0
+    with pa.ipc.new_file(
+        path, schema, options=pa.ipc.IpcWriteOptions(compression="zstd")
+    ) as writer:
+        while page["ids"]:
+            embeddings = np.asarray(page["embeddings"], dtype=np.float32)
+            batch = pa.record_batch(
+                [
+                    pa.array(page["ids"]),
+                    pa.array(page["documents"]),
+                    pa.array([json.dumps(m) if m else None for m in page["metadatas"]]),
+                    pa.FixedSizeListArray.from_arrays(
+                        pa.array(embeddings.reshape(-1)), embeddings.shape[1]
+                    ),
+                ],
+                schema=schema,
+            )
+            writer.write_batch(batch)
+            written += len(page["ids"])
+            page = collection.get(include=include, limit=page_size, offset=written)
+    return written
+
+
+def import_snapshot(client, path: str, collection_name: str | None = None) -> int:
+    """
+    Bulk-loads a snapshot into a new collection using the stored embeddings, so no
+    embedding calls are made. The collection is created with the snapshot's
+    collection metadata (including any hnsw settings) and must not exist yet.
+    Snapshots written before the metadata was saved with its HNSW settings get
+    their distance function back from DISTANCE_SPACE_KEY. Returns the number of
+    records imported.
+    """
+    info = read_snapshot_info(path)
+    if info["format_version"] != SNAPSHOT_FORMAT_VERSION:
+        raise ValueError(
+            f"Unsupported snapshot format version {info['format_version']!r}, "
+            f"expected {SNAPSHOT_FORMAT_VERSION!r}"
+        )
+
+    metadata = dict(info["collection_metadata"])
+    if "hnsw:space" not in metadata and DISTANCE_SPACE_KEY in metadata:
+        metadata["hnsw:space"] = metadata.pop(DISTANCE_SPACE_KEY)
+    collection = client.create_collection(
+        name=collection_name or info["collection_name"],
+        metadata=metadata or None,
+        embedding_function=None,
+    )
+    max_batch_size = client.get_max_batch_size()
+
+    imported = 0
+    with pa.memory_map(path) as source:
+        reader = pa.ipc.open_file(source)
+        for i in range(reader.num_record_batches):
+            batch = reader.get_batch(i)
+            for start in range(0, batch.num_rows, max_batch_size):
+                chunk = batch.slice(start, max_batch_size)
+                embeddings = chunk.column("embedding")
+                collection.add(
+                    ids=chunk.column("id").to_pylist(),
+                    documents=chunk.column("document").to_pylist(),
+                    metadatas=[
+                        json.loads(m) if m else None
+                        for m in chunk.column("metadata").to_pylist()
+                    ],
+                    embeddings=embeddings.flatten()
+                    .to_numpy()
+                    .reshape(-1, embeddings.type.list_size),
+                )
+                imported += chunk.num_rows
+    return imported
+
+
+if __name__ == "__main__":
+    import argparse
+    import glob
+    import os
+
+    from src.vector_store.routing import stored_collections
+    from src.vector_store.store import get_client, write_lock
+
+    parser = argparse.ArgumentParser(
+        description="Snapshot the stored collections to a directory, or restore them from one."
+    )
+    parser.add_argument("action", choices=["export", "import"])
+    parser.add_argument("snapshot_dir")
+    args = parser.parse_args()
+
+    # The store is opened like everywhere else: CHROMA_DATA_PATH or the server
+    # (CHROMA_SERVER_HOST), in the single or sharded layout (CHROMA_LAYOUT).
+    start = time.perf_counter()
+    count = 0
+    if args.action == "export":
+        os.makedirs(args.snapshot_dir, exist_ok=True)
+        for collection in stored_collections():
+            path = os.path.join(args.snapshot_dir, f"{collection.name}.arrow")
+            count += export_snapshot(collection, path)
+    else:
+        with write_lock():
+            for path in sorted(glob.glob(os.path.join(args.snapshot_dir, "*.arrow"))):
+                count += import_snapshot(get_client(), path)
+    print(f"{args.action.capitalize()}ed {count} records in {time.perf_counter() - start:.2f}s")
+
+# to run
+# python -m src.vector_store.snapshot export ./snapshots
+# CHROMA_DATA_PATH=./new_data python -m src.vector_store.snapshot import ./snapshots
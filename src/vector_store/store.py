@@ -0,0 +1,125 @@
+# src/vector_store/store.py
+
+import fcntl
+import os
+import threading
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+
+COLLECTION_NAME = "coding_assistant_document_dump"
+
+# Metadata key keeping a collection's distance function once 'hnsw:space' is gone
+# from its metadata (see bump_last_update_date).
+DISTANCE_SPACE_KEY = "distance_space"
+
+# Storage settings. By default every process opens ./data with an embedded
+# PersistentClient, which is only safe for one process at a time: refresh, then
+# query. Setting CHROMA_SERVER_HOST switches to client/server mode, where a single
+# `chroma run --path ./data --port 8000` process owns the data directory and the
+# refresh pipeline and the assistant both talk to it over HTTP. Server mode is
+# required whenever refreshes and queries run in different processes at the same
+# time (see write_lock).
+DATA_PATH = os.environ.get("CHROMA_DATA_PATH", "./data")
+SERVER_HOST = os.environ.get("CHROMA_SERVER_HOST")
+SERVER_PORT = int(os.environ.get("CHROMA_SERVER_PORT", "8000"))
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def is_server_mode() -> bool:
+    """
+    Returns True when the store is configured to use a Chroma server.
+    """
+    return bool(SERVER_HOST)
+
+
+def get_client():
+    """
+    Returns the process-wide Chroma client, creating it on first use. The same
+    client (and its HTTP connection pool or open index files) is reused by every
+    caller in the process. chromadb itself is only imported here, so importing
+    this module stays cheap.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                import chromadb
+
+                if is_server_mode():
+                    _client = chromadb.HttpClient(host=SERVER_HOST, port=SERVER_PORT)
+                else:
+                    _client = chromadb.PersistentClient(path=DATA_PATH)
+    return _client
+
+
+def get_collection(embedding_function=None, metadata: dict | None = None, create: bool = False):
+    """
+    Returns the document collection from the shared client. With create=True the
+    collection is created with the given metadata if it doesn't exist yet.
+    """
+    client = get_client()
+    if create:
+        return client.get_or_create_collection(
+            name=COLLECTION_NAME,
+            embedding_function=embedding_function,
+            metadata=metadata,
+        )
+    return client.get_collection(
+        name=COLLECTION_NAME, embedding_function=embedding_function
+    )
+
+
+def bump_last_update_date(collection) -> str:
+    """
+    Sets a collection's 'last_update_date' metadata to now and returns it.
+
+    get_or_create_collection ignores the metadata it is given when the collection
+    already exists, so refreshes bump the date explicitly after writing. Readers
+    that keep state derived from the store (the hot tier, the quantized index, the
+    query result cache) compare it to notice refreshes.
+
+    modify replaces the whole metadata but refuses 'hnsw:space', since the distance
+    is fixed when the index is created. The distance is therefore kept under
+    DISTANCE_SPACE_KEY, where current_hnsw_settings still finds it.
+    """
+    now = datetime.now().isoformat()
+    metadata = dict(collection.metadata or {})
+    space = metadata.pop("hnsw:space", None)
+    if space is not None:
+        metadata[DISTANCE_SPACE_KEY] = space
+    collection.modify(metadata={**metadata, "last_update_date": now})
+    return now
+
+
+@contextmanager
+def _file_write_lock():
+    """
+    Holds an exclusive lock on DATA_PATH/.write.lock for the duration of the block.
+    """
+    os.makedirs(DATA_PATH, exist_ok=True)
+    with open(os.path.join(DATA_PATH, ".write.lock"), "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def write_lock():
+    """
+    Context manager that serializes writers to the store.
+
+    In embedded mode writers (a refresh, the digest backfill, a rebuild or
+    migration) take an exclusive file lock, so two of them never write the data
+    directory at once. Readers don't take it, because a lock can't make them
+    correct: an embedded client loads the HNSW index into memory and never sees
+    another process's writes, so a reader next to a writing process serves stale
+    or partially flushed state whether or not it waits. Processes that read while
+    another one writes must use server mode. There the server serializes writes
+    and serves every reader from one index, and this is a no-op.
+    """
+    if is_server_mode():
+        return nullcontext()
+    return _file_write_lock()
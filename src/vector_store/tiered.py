@@ -0,0 +1,260 @@
+# src/vector_store/tiered.py
+
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+import numpy as np
+from dateutil import parser as date_parser
+
+from src.corpus.chunking import CHUNK_OVERSAMPLE, CHUNKING_ENABLED, collapse_chunks
+from src.vector_store.routing import query_store, stored_collections
+
+# Hot tier settings. A record is hot if its date is within HOT_WINDOW_DAYS, or, for
+# records without a usable date (e.g. Cursor changelogs), if its changelog index is
+# among the latest HOT_WINDOW_ENTRIES of its company.
+HOT_TIER_ENABLED = os.environ.get("HOT_TIER", "0") == "1"
+HOT_WINDOW_DAYS = int(os.environ.get("HOT_WINDOW_DAYS", "120"))
+HOT_WINDOW_ENTRIES = int(os.environ.get("HOT_WINDOW_ENTRIES", "20"))
+# Squared L2 distance under which a hot hit counts as a strong match. For unit
+# vectors this is 2 - 2 * cosine similarity, so 0.8 means a cosine of 0.6.
+HOT_MAX_DISTANCE = float(os.environ.get("HOT_MAX_DISTANCE", "0.8"))
+
+
+def _parse_date(date: Optional[str]) -> Optional[datetime]:
+    if not date:
+        return None
+    try:
+        return date_parser.parse(date, ignoretz=True)
+    except (ValueError, OverflowError):
+        return None
+
+
+def select_hot_ids(
+    ids: list[str],
+    metadatas: list[dict],
+    window_days: int = HOT_WINDOW_DAYS,
+    window_entries: int = HOT_WINDOW_ENTRIES,
+    now: Optional[datetime] = None,
+) -> set[str]:
+    """
+    Returns the ids of the records that belong in the hot tier.
+    """
+    cutoff = (now or datetime.now()) - timedelta(days=window_days)
+    hot = set()
+    undated = {}
+    for id_, metadata in zip(ids, metadatas):
+        metadata = metadata or {}
+        date = _parse_date(metadata.get("date"))
+        if date is not None:
+            if date >= cutoff:
+                hot.add(id_)
+        elif metadata.get("index") is not None:
+            undated.setdefault(metadata.get("company"), []).append(
+                (metadata["index"], id_)
+            )
+
+    for entries in undated.values():
+        entries.sort(reverse=True)
+        hot.update(id_ for _, id_ in entries[:window_entries])
+    return hot
+
+
+class TieredIndex:
+    """
+    Two-tier search over the store: recent records are held in memory as a dense
+    matrix and searched exactly with numpy, the full archive stays in Chroma.
+
+    A query is embedded once and searched in the hot tier first. It only fans out
+    to the persistent store when the hot tier has fewer than n_results hits within
+    max_distance, in which case both tiers' hits are merged.
+    """
+
+    def __init__(
+        self,
+        embedding_function,
+        window_days: int = HOT_WINDOW_DAYS,
+        window_entries: int = HOT_WINDOW_ENTRIES,
+        max_distance: float = HOT_MAX_DISTANCE,
+        reload_interval: float = 300.0,
+    ):
+        self.embedding_function = embedding_function
+        self.window_days = window_days
+        self.window_entries = window_entries
+        self.max_distance = max_distance
+        self.reload_interval = reload_interval
+        self.stats = {"hot_only": 0, "fan_out": 0}
+        self._lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._loaded_at = None
+        self._load_marker = None
+        self._ids = []
+        self._documents = []
+        self._metadatas = []
+        self._matrix = np.empty((0, 0), dtype=np.float32)
+
+    def load(self, page_size: int = 10_000) -> int:
+        """
+        (Re)builds the hot tier. Metadata is scanned without embeddings to select the
+        hot ids, then only those records are fetched with their embeddings.
+        Returns the number of hot records.
+        """
+        ids, documents, metadatas, embeddings = [], [], [], []
+        markers = []
+        for collection in stored_collections():
+            markers.append((collection.name, (collection.metadata or {}).get("last_update_date")))
+            all_ids, all_metadatas = [], []
+            offset = 0
+            while True:
+                page = collection.get(include=["metadatas"], limit=page_size, offset=offset)
+                if not page["ids"]:
+                    break
+                all_ids += page["ids"]
+                all_metadatas += page["metadatas"]
+                offset += len(page["ids"])
+
+            hot_ids = sorted(
+                select_hot_ids(all_ids, all_metadatas, self.window_days, self.window_entries)
+            )
+            if not hot_ids:
+                continue
+            hot = collection.get(
+                ids=hot_ids, include=["documents", "metadatas", "embeddings"]
+            )
+            ids += hot["ids"]
+            documents += hot["documents"]
+            metadatas += hot["metadatas"]
+            embeddings += list(hot["embeddings"])
+
+        with self._lock:
+            self._ids = ids
+            self._documents = documents
+            self._metadatas = metadatas
+            self._matrix = (
+                np.asarray(embeddings, dtype=np.float32)
+                if embeddings
+                else np.empty((0, 0), dtype=np.float32)
+            )
+            self._loaded_at = time.monotonic()
+            self._load_marker = markers
+        print(f"Loaded {len(ids)} records into the hot tier.")
+        return len(ids)
+
+    def _maybe_reload(self) -> None:
+        """
+        Reloads the hot tier when it has never been loaded or reload_interval has
+        passed and a refresh has bumped a collection's last_update_date since.
+
+        One query at a time checks and reloads. Once the hot tier is loaded, the
+        others keep searching it instead of waiting for the reload.
+        """
+        loaded_at = self._loaded_at
+        if loaded_at is not None and time.monotonic() - loaded_at < self.reload_interval:
+            return
+        if not self._reload_lock.acquire(blocking=loaded_at is None):
+            return
+        try:
+            if self._loaded_at is None:
+                self.load()
+                return
+            if time.monotonic() - self._loaded_at < self.reload_interval:
+                return
+            markers = [
+                (collection.name, (collection.metadata or {}).get("last_update_date"))
+                for collection in stored_collections()
+            ]
+            if markers != self._load_marker:
+                self.load()
+            else:
+                with self._lock:
+                    self._loaded_at = time.monotonic()
+        finally:
+            self._reload_lock.release()
+
+    def search_hot(
+        self,
+        query_embedding,
+        n_results: int,
+        companies: Optional[list[str]] = None,
+        doc_types: Optional[list[str]] = None,
+    ) -> list[dict]:
+        """
+        Exact squared-L2 search over the hot tier, matching Chroma's 'l2' distances.
+        """
+        with self._lock:
+            ids, documents, metadatas, matrix = (
+                self._ids,
+                self._documents,
+                self._metadatas,
+                self._matrix,
+            )
+        if not ids:
+            return []
+
+        query = np.asarray(query_embedding, dtype=np.float32)
+        distances = ((matrix - query) ** 2).sum(axis=1)
+        if companies or doc_types:
+            mask = np.array(
+                [
+                    (not companies or m.get("company") in companies)
+                    and (not doc_types or m.get("doc_type", "changelog") in doc_types)
+                    for m in metadatas
+                ]
+            )
+            distances = np.where(mask, distances, np.inf)
+
+        n = min(n_results, len(ids))
+        top = np.argpartition(distances, n - 1)[:n]
+        top = top[np.argsort(distances[top])]
+        return [
+            {
+                "id": ids[i],
+                "document": documents[i],
+                "metadata": metadatas[i],
+                "distance": float(distances[i]),
+            }
+            for i in top
+            if np.isfinite(distances[i])
+        ]
+
+    def query(
+        self,
+        query: str,
+        n_results: int = 3,
+        companies: Optional[list[str]] = None,
+        doc_types: Optional[list[str]] = None,
+    ) -> list[dict]:
+        """
+        Returns the n_results closest hits, in the same shape as query_store.
+        """
+        self._maybe_reload()
+        query_embedding = self.embedding_function([query])[0]
+
+        if CHUNKING_ENABLED:
+            # Collapse chunk hits to their parents, like query_store does for cold hits.
+            hot_hits = collapse_chunks(
+                self.search_hot(
+                    query_embedding, n_results * CHUNK_OVERSAMPLE, companies, doc_types
+                ),
+                n_results,
+            )
+        else:
+            hot_hits = self.search_hot(query_embedding, n_results, companies, doc_types)
+        strong = [hit for hit in hot_hits if hit["distance"] <= self.max_distance]
+        if len(strong) >= n_results:
+            self.stats["hot_only"] += 1
+            return strong[:n_results]
+
+        self.stats["fan_out"] += 1
+        cold_hits = query_store(
+            query,
+            n_results=n_results,
+            companies=companies,
+            doc_types=doc_types,
+            embedding_function=self.embedding_function,
+            query_embedding=query_embedding,
+        )
+        merged = {hit["id"]: hit for hit in cold_hits + hot_hits}
+        return sorted(merged.values(), key=lambda hit: hit["distance"])[:n_results]
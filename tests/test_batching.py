@@ -0,0 +1,67 @@
+# tests/test_batching.py
+
+import threading
+
+from src.embeddings import batching
+from src.embeddings.batching import embed_in_batches, make_batches
+from src.embeddings.tokens import MAX_REQUEST_INPUTS
+
+
+class RateLimitError(Exception):
+    status_code = 429
+
+
+class FlakyEmbeddingFunction:
+    billable = False
+
+    def __init__(self, failures: int = 0):
+        self.failures = failures
+        self.requests = []
+        self._lock = threading.Lock()
+
+    def __call__(self, input):
+        with self._lock:
+            self.requests.append(list(input))
+            if self.failures:
+                self.failures -= 1
+                raise RateLimitError()
+        return [[float(text)] for text in input]
+
+
+def test_batches_respect_the_input_and_token_limits():
+    assert make_batches([1] * 5, max_inputs=2, max_tokens=100) == [[0, 1], [2, 3], [4]]
+    assert make_batches([40, 40, 40, 90, 10], max_inputs=10, max_tokens=100) == [
+        [0, 1],
+        [2],
+        [3, 4],
+    ]
+    # An input larger than the token limit gets a batch of its own.
+    assert make_batches([150, 1], max_inputs=10, max_tokens=100) == [[0], [1]]
+
+
+def test_parallel_batches_come_back_in_input_order():
+    documents = [str(i) for i in range(3 * MAX_REQUEST_INPUTS + 1)]
+    written = []
+    embedding_function = FlakyEmbeddingFunction()
+
+    embeddings = embed_in_batches(
+        embedding_function,
+        documents,
+        max_workers=4,
+        on_batch=lambda batch, vectors: written.extend(batch),
+        token_counts=[1] * len(documents),
+    )
+
+    assert len(embedding_function.requests) == 4
+    assert embeddings == [[float(document)] for document in documents]
+    assert sorted(written) == list(range(len(documents)))
+
+
+def test_rate_limited_requests_are_retried(monkeypatch):
+    monkeypatch.setattr(batching.time, "sleep", lambda seconds: None)
+    embedding_function = FlakyEmbeddingFunction(failures=2)
+
+    embeddings = embed_in_batches(embedding_function, ["1", "2"], token_counts=[1, 1])
+
+    assert embeddings == [[1.0], [2.0]]
+    assert len(embedding_function.requests) == 3
@@ -0,0 +1,81 @@
+# tests/test_budget.py
+
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.embeddings.budget import EmbeddingBacklog, TokenBudget, TokenRateLimiter
+
+
+def test_concurrent_admits_stay_within_the_run_budget(tmp_path):
+    budget = TokenBudget(1_000, EmbeddingBacklog(str(tmp_path / "backlog.sqlite3")))
+
+    def admit(i):
+        admitted, _ = budget.admit({str(i): ["text"]}, token_counts={str(i): [100]})
+        return admitted
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        admitted = [id_ for ids in executor.map(admit, range(50)) for id_ in ids]
+
+    assert len(admitted) == 10
+    assert budget.spent == 1_000
+    assert budget.deferred == 40
+    assert budget.backlog.totals()["records"] == 40
+
+
+def test_backlogs_without_scopes_are_migrated(tmp_path):
+    path = str(tmp_path / "backlog.sqlite3")
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE deferred (id TEXT PRIMARY KEY, tokens INTEGER NOT NULL,"
+        " first_deferred_at REAL NOT NULL, times_deferred INTEGER NOT NULL)"
+    )
+    conn.execute("INSERT INTO deferred VALUES ('a', 10, 0, 1)")
+    conn.commit()
+    conn.close()
+
+    backlog = EmbeddingBacklog(path)
+    backlog.defer({"a": 12}, {"a": ("Cursor_Enterprise", "changelog")})
+
+    assert backlog.totals()["tokens"] == 12
+    assert backlog.prune(set(), scopes={("Cursor_Enterprise", "changelog")}) == 1
+
+
+def test_backlog_records_are_admitted_first(tmp_path):
+    backlog = EmbeddingBacklog(str(tmp_path / "backlog.sqlite3"))
+    backlog.defer({"old": 100})
+    budget = TokenBudget(150, backlog)
+
+    admitted, deferred = budget.admit(
+        {"new": ["text"], "old": ["text"]}, token_counts={"new": [100], "old": [100]}
+    )
+
+    assert admitted == ["old"]
+    assert deferred == ["new"]
+    assert backlog.ids() == {"new"}
+
+
+def test_unbillable_records_cost_nothing(tmp_path):
+    class Local:
+        billable = False
+
+    budget = TokenBudget(1, EmbeddingBacklog(str(tmp_path / "backlog.sqlite3")))
+
+    admitted, deferred = budget.admit(
+        {"a": ["text"], "b": ["text"]}, Local(), token_counts={"a": [100], "b": [100]}
+    )
+
+    assert admitted == ["a", "b"]
+    assert budget.spent == 0
+
+
+def test_rate_limiter_makes_requests_wait_for_tokens():
+    limiter = TokenRateLimiter(tokens_per_minute=600)
+
+    assert limiter.reserve(500) == 0
+    # 100 tokens are left and the bucket refills at 10 tokens a second.
+    assert limiter.reserve(300) == pytest.approx(20, abs=0.1)
+    # A request larger than the bucket waits until it is full.
+    assert limiter.reserve(1_000) == pytest.approx(50, abs=0.1)
+    assert TokenRateLimiter(tokens_per_minute=0).reserve(10**9) == 0
@@ -0,0 +1,64 @@
+# tests/test_cache.py
+
+import numpy as np
+
+from src.embeddings.cache import CachedEmbeddingFunction, EmbeddingCache
+
+
+def test_put_many_evicts_the_least_recently_used(tmp_path):
+    path = str(tmp_path / "embeddings.sqlite3")
+    cache = EmbeddingCache(path, max_entries=3)
+    vector = np.zeros(4, dtype=np.float32)
+    cache.put_many("model", {"a": vector, "b": vector})
+    cache.put_many("model", {"b": vector, "c": vector})
+    assert cache.evictions == 0
+
+    cache.put_many("model", {"d": vector})
+
+    assert cache.evictions == 1
+    assert cache.contains_many("model", ["a", "b", "c", "d"]) == {"b", "c", "d"}
+    # A reopened cache starts from the stored count.
+    reopened = EmbeddingCache(path, max_entries=3)
+    reopened.put_many("model", {"e": vector})
+    assert reopened.evictions == 1
+
+
+class CountingEmbeddingFunction:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, input):
+        self.calls.append(list(input))
+        return [[3.0, 4.0, float(len(text))] for text in input]
+
+
+def test_only_unseen_texts_are_embedded(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "embeddings.sqlite3"))
+    inner = CountingEmbeddingFunction()
+    embedding_function = CachedEmbeddingFunction(inner, "model", cache=cache)
+
+    first = embedding_function(["a", "bb", "a"])
+    second = embedding_function(["bb", "ccc"])
+
+    assert inner.calls == [["a", "bb"], ["ccc"]]
+    assert [list(vector) for vector in first] == [
+        [3.0, 4.0, 1.0],
+        [3.0, 4.0, 2.0],
+        [3.0, 4.0, 1.0],
+    ]
+    assert list(second[0]) == [3.0, 4.0, 2.0]
+    assert embedding_function.cached_mask(["a", "dddd"]) == [True, False]
+    # Vectors are cached per model, so another model embeds the text again.
+    CachedEmbeddingFunction(inner, "other-model", cache=cache)(["a"])
+    assert inner.calls[-1] == ["a"]
+
+
+def test_reduced_vectors_come_from_the_full_cached_ones(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "embeddings.sqlite3"))
+    inner = CountingEmbeddingFunction()
+    CachedEmbeddingFunction(inner, "model", cache=cache)(["a"])
+
+    reduced = CachedEmbeddingFunction(inner, "model", cache=cache, dim=2)(["a"])
+
+    assert len(inner.calls) == 1
+    assert np.allclose(reduced[0], [0.6, 0.8])
@@ -0,0 +1,53 @@
+# tests/test_checkpoints.py
+
+import sqlite3
+import time
+
+import pytest
+
+from src.refresh_pipeline.checkpoints import CheckpointStore
+
+
+def test_open_run_is_resumed_with_its_checkpoints(tmp_path):
+    path = str(tmp_path / "checkpoints.sqlite3")
+    store = CheckpointStore(path)
+    run = store.start_run("refresh_all")
+    run.mark("synced", ["cursor_changelog"])
+    run.close()
+
+    store = CheckpointStore(path)
+    resumed = store.start_run("refresh_all")
+    assert resumed.resumed
+    assert resumed.run_id == run.run_id
+    assert resumed.is_done("synced", "cursor_changelog")
+    assert not resumed.is_done("synced", "codeium_changelog")
+
+    resumed.finish()
+    fresh = store.start_run("refresh_all")
+    assert not fresh.resumed
+    assert fresh.counts() == {"fetched": 0, "parsed": 0, "synced": 0}
+    store.close()
+
+
+def test_runs_older_than_max_resume_age_are_not_resumed(tmp_path):
+    store = CheckpointStore(str(tmp_path / "checkpoints.sqlite3"), max_resume_age=60)
+    run = store.start_run("refresh_all")
+    run.mark("synced", ["cursor_changelog"])
+    with store._lock:
+        store._conn.execute(
+            "UPDATE runs SET started_at = ? WHERE run_id = ?", (time.time() - 120, run.run_id)
+        )
+        store._conn.commit()
+
+    fresh = store.start_run("refresh_all")
+    assert not fresh.resumed
+    assert not fresh.is_done("synced", "cursor_changelog")
+    assert run.counts()["synced"] == 0
+    store.close()
+
+
+def test_close_closes_the_connection(tmp_path):
+    store = CheckpointStore(str(tmp_path / "checkpoints.sqlite3"))
+    store.start_run("refresh_all").close()
+    with pytest.raises(sqlite3.ProgrammingError):
+        store.counts("any")
@@ -0,0 +1,79 @@
+# tests/test_chunking.py
+
+import pytest
+
+from src.corpus.chunking import chunk_record, chunk_text, collapse_chunks, join_chunks
+from src.embeddings import tokens
+from src.embeddings.tokens import count_tokens
+
+
+@pytest.fixture(autouse=True)
+def estimate(monkeypatch):
+    monkeypatch.setattr(tokens, "TOKENIZER", "estimate")
+    tokens.get_encoding.cache_clear()
+    yield
+    tokens.get_encoding.cache_clear()
+
+
+def document(paragraphs: int = 40) -> str:
+    lines = []
+    for i in range(paragraphs):
+        if i % 10 == 0:
+            lines.append(f"Release {i // 10}")
+        lines.append(f"Paragraph {i} describes change number {i} of the editor in detail.")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def test_chunks_stay_within_the_token_limit_and_join_back():
+    text = document()
+
+    chunks = list(chunk_text(text, max_tokens=60, overlap_tokens=20))
+
+    assert len(chunks) > 1
+    assert all(count_tokens(chunk) <= 60 for chunk in chunks)
+    # Consecutive chunks overlap by whole lines.
+    assert chunks[1].split("\n")[0] in chunks[0].split("\n")
+    assert join_chunks(chunks) == "\n".join(line for line in text.split("\n") if line)
+
+
+def test_long_lines_are_split_on_token_boundaries():
+    line = " ".join(f"word{i}" for i in range(100))
+
+    chunks = list(chunk_text(line, max_tokens=30, overlap_tokens=0))
+
+    assert all(count_tokens(chunk) <= 30 for chunk in chunks)
+    assert "".join(chunks) == line
+
+
+def test_empty_text_has_no_chunks():
+    assert list(chunk_text(" \n\n  ")) == []
+
+
+def test_chunks_keep_their_parent_metadata():
+    chunks = list(
+        chunk_record("cursor-1", document(), {"company": "Cursor_Enterprise"}, max_tokens=60)
+    )
+
+    assert [id_ for id_, _, _ in chunks][:2] == ["cursor-1#chunk-0", "cursor-1#chunk-1"]
+    assert chunks[1][2] == {"company": "Cursor_Enterprise", "parent_id": "cursor-1", "chunk_index": 1}
+
+
+def test_chunk_hits_collapse_into_their_parents():
+    hits = [
+        {"id": "a#chunk-2", "document": "a2", "distance": 0.1,
+         "metadata": {"parent_id": "a", "chunk_index": 2, "company": "Cursor_Enterprise"}},
+        {"id": "b", "document": "b", "distance": 0.2, "metadata": {"company": "Cursor_Enterprise"}},
+        {"id": "a#chunk-0", "document": "a0", "distance": 0.3,
+         "metadata": {"parent_id": "a", "chunk_index": 0, "company": "Cursor_Enterprise"}},
+        {"id": "c#chunk-0", "document": "c0", "distance": 0.4,
+         "metadata": {"parent_id": "c", "chunk_index": 0}},
+    ]
+
+    collapsed = collapse_chunks(hits, n_results=2)
+
+    assert collapsed == [
+        {"id": "a", "document": "a0\n...\na2", "metadata": {"company": "Cursor_Enterprise"},
+         "distance": 0.1},
+        hits[1],
+    ]
@@ -0,0 +1,43 @@
+# tests/test_dedupe.py
+
+import sqlite3
+
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("pydantic")
+
+from src.corpus import dedupe  # noqa: E402
+from src.corpus.dedupe import DedupeIndex  # noqa: E402
+
+TEXT = " ".join(f"word{i}" for i in range(60))
+
+
+def test_near_duplicates_are_folded(tmp_path):
+    index = DedupeIndex(str(tmp_path / "dedupe.sqlite3"))
+    representatives, aliases = index.assign([("a", TEXT), ("b", TEXT + " extra")])
+
+    assert representatives == ["b"]
+    assert aliases == {"a": "b"}
+
+
+def test_short_texts_are_not_deduplicated(tmp_path):
+    index = DedupeIndex(str(tmp_path / "dedupe.sqlite3"))
+    representatives, aliases = index.assign([("a", "Fixed a bug"), ("b", "Fixed a bug")])
+
+    assert sorted(representatives) == ["a", "b"]
+    assert aliases == {}
+
+
+def test_buckets_are_rebuilt_when_the_bands_change(tmp_path):
+    path = str(tmp_path / "dedupe.sqlite3")
+    DedupeIndex(path).assign([("a", TEXT)])
+    conn = sqlite3.connect(path)
+    conn.execute("UPDATE settings SET value = 16 WHERE key = 'bands'")
+    conn.execute("DELETE FROM buckets")
+    conn.commit()
+
+    _, aliases = DedupeIndex(path).assign([("b", TEXT + " extra")])
+
+    assert aliases == {"b": "a"}
+    assert conn.execute("SELECT COUNT(*) FROM buckets").fetchone()[0] == dedupe.BANDS
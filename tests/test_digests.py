@@ -0,0 +1,99 @@
+# tests/test_digests.py
+
+import uuid
+from contextlib import nullcontext
+
+import pytest
+
+chromadb = pytest.importorskip("chromadb")
+
+from src.corpus import digests  # noqa: E402
+from src.corpus.digests import (  # noqa: E402
+    DIGEST_KEY,
+    digest_collection,
+    extractive_digest,
+    pending_digests,
+)
+
+
+@pytest.fixture
+def collection(monkeypatch):
+    monkeypatch.setattr(digests, "write_lock", nullcontext)
+    return chromadb.EphemeralClient().create_collection(name=f"test-{uuid.uuid4().hex[:8]}")
+
+
+def summarize(document, metadata):
+    return f"digest of {document}"
+
+
+def metadata(content_hash, **extra):
+    return {
+        "company": "Cursor_Enterprise",
+        "doc_type": "changelog",
+        "content_hash": content_hash,
+        **extra,
+    }
+
+
+def test_edited_documents_are_digested_again(collection):
+    collection.add(
+        ids=["a", "b"],
+        documents=["first", "second"],
+        embeddings=[[1.0, 0.0], [0.0, 1.0]],
+        metadatas=[metadata("h1"), metadata("h2")],
+    )
+    assert digest_collection(collection, summarizer=summarize) == {"digested": 2, "failed": 0}
+    assert pending_digests(collection) == {}
+
+    # A refresh upserts an edited document with its new content hash.
+    collection.upsert(
+        ids=["a"], documents=["first, edited"], embeddings=[[1.0, 0.0]], metadatas=[metadata("h3")]
+    )
+
+    assert pending_digests(collection) == {"a": ["a"]}
+    assert digest_collection(collection, summarizer=summarize)["digested"] == 1
+    stored = collection.get(ids=["a"], include=["metadatas"])["metadatas"][0]
+    assert stored[DIGEST_KEY] == "digest of first, edited"
+
+
+def test_every_chunk_gets_the_document_digest(collection):
+    collection.add(
+        ids=["a#chunk-0", "a#chunk-1"],
+        documents=["Line one\nLine two", "Line two\nLine three"],
+        embeddings=[[1.0, 0.0], [0.0, 1.0]],
+        metadatas=[
+            metadata("h1", parent_id="a", chunk_index=0),
+            metadata("h1", parent_id="a", chunk_index=1),
+        ],
+    )
+
+    digest_collection(collection, summarizer=summarize)
+
+    stored = collection.get(include=["metadatas"])["metadatas"]
+    assert [m[DIGEST_KEY] for m in stored] == ["digest of Line one\nLine two\nLine three"] * 2
+
+
+def test_failed_digests_stay_pending(collection):
+    collection.add(
+        ids=["a"], documents=["first"], embeddings=[[1.0, 0.0]], metadatas=[metadata("h1")]
+    )
+
+    def fail(document, metadata):
+        raise RuntimeError("summarizer down")
+
+    assert digest_collection(collection, summarizer=fail) == {"digested": 0, "failed": 1}
+    assert pending_digests(collection) == {"a": ["a"]}
+
+
+def test_extractive_digest_keeps_versions_and_key_points():
+    digest = extractive_digest(
+        "Cursor 0.45\nAdded a new agent mode that edits several files at once. It is fast.\nok",
+        {"company": "Cursor_Enterprise", "doc_type": "changelog", "date": "2025-01-20"},
+    )
+
+    assert digest.split("\n") == [
+        "Cursor 0.45 (Cursor_Enterprise, changelog)",
+        "Dates: 2025-01-20",
+        "Versions: 0.45",
+        "- Added a new agent mode that edits several files at once.",
+    ]
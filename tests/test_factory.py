@@ -0,0 +1,38 @@
+# tests/test_factory.py
+
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+pytest.importorskip("chromadb")
+
+from src.embeddings import factory  # noqa: E402
+from src.embeddings.cache import EmbeddingCache  # noqa: E402
+from src.embeddings.factory import embedding_function_for, query_embedding_function  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(factory, "_cache", EmbeddingCache(str(tmp_path / "embeddings.sqlite3")))
+    monkeypatch.setattr(factory, "_embedding_functions", {})
+
+
+def collection(name, dim):
+    return SimpleNamespace(name=name, metadata={"embedding_backend": "fake", "embedding_dim": dim})
+
+
+def test_queries_use_the_collection_dimension():
+    (vector,) = embedding_function_for(collection("reduced", 256))(["query"])
+    (full,) = embedding_function_for(collection("full", 1536))(["query"])
+
+    assert len(vector) == 256
+    assert np.linalg.norm(vector) == pytest.approx(1.0)
+    assert len(full) == 1536
+
+
+def test_collections_of_different_dimensions_cant_be_queried_together():
+    collections = [collection("a", 256), collection("b", 512)]
+
+    with pytest.raises(ValueError, match="512-dimensional"):
+        query_embedding_function(collections)
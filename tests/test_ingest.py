@@ -0,0 +1,165 @@
+# tests/test_ingest.py
+
+import uuid
+from contextlib import nullcontext
+
+import pytest
+
+chromadb = pytest.importorskip("chromadb")
+
+from src.embeddings import tokens  # noqa: E402
+from src.embeddings.budget import EmbeddingBacklog, TokenBudget, activate_budget  # noqa: E402
+from src.loaders.models.models import ChangeLog, CodeAssistantCompany  # noqa: E402
+from src.refresh_pipeline import ingest  # noqa: E402
+
+
+class FakeEmbeddingFunction:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, input):
+        self.calls.append(list(input))
+        return [[1.0, float(len(text))] for text in input]
+
+
+def changelog(unique_id, changes, company=CodeAssistantCompany.CURSOR_ENTERPRISE):
+    return ChangeLog(version=unique_id, changes=changes, company=company, unique_id=unique_id)
+
+
+@pytest.fixture
+def collection(monkeypatch):
+    collection = chromadb.EphemeralClient().create_collection(
+        name=f"test-{uuid.uuid4().hex[:8]}"
+    )
+    monkeypatch.setattr(tokens, "TOKENIZER", "estimate")
+    tokens.get_encoding.cache_clear()
+    monkeypatch.setattr(ingest, "CHUNKING_ENABLED", False)
+    monkeypatch.setattr(ingest, "DEDUPE_ENABLED", False)
+    monkeypatch.setattr(ingest, "check_collection", lambda collection: None)
+    monkeypatch.setattr(ingest, "write_lock", nullcontext)
+    monkeypatch.setattr(
+        ingest,
+        "route_records",
+        lambda records, embedding_function=None, metadata=None: [(collection, list(records))],
+    )
+    yield collection
+    activate_budget(None)
+    tokens.get_encoding.cache_clear()
+
+
+def test_sync_prunes_backlog_records_it_no_longer_defers(collection, tmp_path):
+    backlog = EmbeddingBacklog(str(tmp_path / "backlog.sqlite3"))
+    backlog.defer({"codeium-1": 5}, {"codeium-1": ("Codeium_Enterprise", "changelog")})
+    activate_budget(TokenBudget(1, backlog))
+    embedding_function = FakeEmbeddingFunction()
+
+    summary = ingest.sync_records([changelog("cursor-1", "Added tabs")], embedding_function)
+    assert summary["deferred"] == 1
+    assert backlog.ids() == {"codeium-1", "cursor-1"}
+
+    # cursor-1 was removed upstream before it was ever embedded.
+    summary = ingest.sync_records([changelog("cursor-2", "Fixed tabs")], embedding_function)
+    assert summary["deferred"] == 1
+    assert backlog.ids() == {"codeium-1", "cursor-2"}
+    assert backlog.totals()["records"] == 2
+    assert embedding_function.calls == []
+
+
+def test_partial_sync_only_prunes_records_it_saw(tmp_path):
+    backlog = EmbeddingBacklog(str(tmp_path / "backlog.sqlite3"))
+    scope = ("Cursor_Enterprise", "changelog")
+    backlog.defer({"a": 1, "b": 1, "c": 1}, {"a": scope, "b": scope})
+
+    assert backlog.prune({"a"}, seen={"a", "c"}) == 1
+    assert backlog.ids() == {"a", "b"}
+    assert backlog.prune(set(), scopes={scope}) == 2
+    assert backlog.ids() == set()
+
+
+def stored(collection):
+    found = collection.get(include=["documents"])
+    return dict(zip(found["ids"], found["documents"]))
+
+
+def test_sync_writes_only_new_and_changed_records_and_deletes_removed_ones(collection):
+    embedding_function = FakeEmbeddingFunction()
+    summary = ingest.sync_records(
+        [changelog("a", "Added tabs"), changelog("b", "Fixed tabs"), changelog("c", "Removed tabs")],
+        embedding_function,
+    )
+    assert summary == {"new": 3, "changed": 0, "deleted": 0, "duplicates": 0, "deferred": 0}
+
+    embedding_function.calls.clear()
+    summary = ingest.sync_records(
+        [changelog("a", "Added tabs"), changelog("b", "Fixed tabs twice"), changelog("d", "New")],
+        embedding_function,
+    )
+
+    assert summary == {"new": 1, "changed": 1, "deleted": 1, "duplicates": 0, "deferred": 0}
+    assert sorted(text for call in embedding_function.calls for text in call) == [
+        "Fixed tabs twice",
+        "New",
+    ]
+    assert stored(collection) == {"a": "Added tabs", "b": "Fixed tabs twice", "d": "New"}
+
+
+def test_sync_without_records_of_a_company_keeps_its_records(collection):
+    embedding_function = FakeEmbeddingFunction()
+    codeium = CodeAssistantCompany.CODEIUM_ENTERPRISE
+    ingest.sync_records(
+        [changelog("a", "Added tabs"), changelog("b", "Windsurf", company=codeium)],
+        embedding_function,
+    )
+
+    # The Codeium loader failed and returned nothing.
+    summary = ingest.sync_records([changelog("a", "Added tabs")], embedding_function)
+
+    assert summary["deleted"] == 0
+    assert set(stored(collection)) == {"a", "b"}
+
+
+def test_partial_sync_deletes_nothing(collection):
+    embedding_function = FakeEmbeddingFunction()
+    ingest.sync_records([changelog("a", "Added tabs"), changelog("b", "Fixed")], embedding_function)
+
+    summary = ingest.sync_records(
+        [changelog("b", "Fixed again")], embedding_function, allow_delete=False
+    )
+
+    assert summary["changed"] == 1
+    assert summary["deleted"] == 0
+    assert stored(collection) == {"a": "Added tabs", "b": "Fixed again"}
+
+
+
+def test_diff_looks_the_stored_records_up_in_one_scan(collection, monkeypatch):
+    ingest.sync_records(
+        [changelog(str(i), f"Change {i}") for i in range(20)], FakeEmbeddingFunction()
+    )
+    lookups = []
+    get = collection.get
+    monkeypatch.setattr(collection, "get", lambda **kwargs: lookups.append(kwargs) or get(**kwargs))
+
+    new_items, changed_items, deleted_ids = ingest.diff_items(
+        collection, [changelog(str(i), f"Change {i}") for i in range(1, 21)]
+    )
+
+    assert len(lookups) == 1
+    assert [record.unique_id for record in new_items] == ["20"]
+    assert changed_items == []
+    assert deleted_ids == ["0"]
+
+
+def test_edited_chunked_record_drops_its_stale_chunks(collection, monkeypatch):
+    monkeypatch.setattr(ingest, "CHUNKING_ENABLED", True)
+    long_changes = "\n".join(
+        f"Line {i} of a long changelog entry with many words." for i in range(150)
+    )
+    embedding_function = FakeEmbeddingFunction()
+    ingest.sync_records([changelog("a", long_changes)], embedding_function)
+    assert len(stored(collection)) > 1
+
+    summary = ingest.sync_records([changelog("a", "Now a short entry.")], embedding_function)
+
+    assert summary["changed"] == 1
+    assert stored(collection) == {"a#chunk-0": "Now a short entry."}
@@ -0,0 +1,23 @@
+# tests/test_local.py
+
+import pytest
+
+pytest.importorskip("chromadb")
+
+from src.embeddings import local  # noqa: E402
+from src.embeddings.local import LocalEmbeddingFunction  # noqa: E402
+
+
+def test_cache_name_changes_with_the_model(tmp_path):
+    model_dir = tmp_path / "embedding"
+    model_dir.mkdir()
+    (model_dir / "config.json").write_text('{"hidden_size": 384}')
+    (model_dir / "model.safetensors").write_bytes(b"weights")
+    first = LocalEmbeddingFunction(str(model_dir)).model_name
+
+    (model_dir / "model.safetensors").write_bytes(b"other weights")
+    local.model_fingerprint.cache_clear()
+    second = LocalEmbeddingFunction(str(model_dir)).model_name
+
+    assert first.startswith("local:embedding:")
+    assert first != second
@@ -0,0 +1,52 @@
+# tests/test_main.py
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+from src.main import build_parser, list_benchmarks
+
+HEAVY_MODULES = ["chromadb", "openai", "pydantic_ai", "logfire", "tiktoken", "playwright"]
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.mark.parametrize(
+    "module",
+    [
+        "src.main",
+        "src.assistant_analyzer.assistant",
+        "src.embeddings.factory",
+        "src.vector_store.store",
+    ],
+)
+def test_importing_defers_heavy_dependencies(module):
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            f"import sys, {module}; "
+            f"print(sorted(m for m in {HEAVY_MODULES!r} if m in sys.modules))",
+        ],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    assert result.stdout.strip() == "[]"
+
+
+def test_cli_parses_every_command():
+    parser = build_parser()
+
+    refresh = parser.parse_args(["refresh", "--sources", "cursor_changelog", "--no-resume"])
+    query = parser.parse_args(["query", "mcp", "--retrieve-only", "--doc-type", "changelog"])
+    bench = parser.parse_args(["bench", "bench_chunking", "--pages", "5"])
+
+    assert (refresh.flow, refresh.sources, refresh.no_resume) == ("all", ["cursor_changelog"], True)
+    assert (query.retrieve_only, query.n_results, query.doc_type) == (True, 3, ["changelog"])
+    assert (bench.name, bench.args) == ("bench_chunking", ["--pages", "5"])
+    assert "bench_refresh_offline" in list_benchmarks()
+    assert "fixtures" not in list_benchmarks()
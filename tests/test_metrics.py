@@ -0,0 +1,86 @@
+# tests/test_metrics.py
+
+import json
+
+import pytest
+
+from src.refresh_pipeline.metrics import (
+    RunMetrics,
+    Sample,
+    activate_metrics,
+    active_metrics,
+    latest_report,
+    measure,
+    measured,
+    percentile,
+    start_metrics,
+)
+
+
+@pytest.fixture
+def metrics():
+    metrics = start_metrics("refresh_test", "0123456789abcdef")
+    yield metrics
+    activate_metrics(None)
+
+
+def test_percentile_uses_the_nearest_rank():
+    values = [0.4, 0.1, 0.3, 0.2]
+    assert percentile(values, 50) == 0.2
+    assert percentile(values, 99) == 0.4
+    assert percentile([], 50) == 0.0
+
+
+def test_overlapping_calls_count_once_in_wall_time():
+    metrics = RunMetrics("refresh_test")
+    metrics.record("fetch", 0.0, 1.0, Sample())
+    metrics.record("fetch", 0.5, 2.0, Sample())
+    sample = Sample(items=10)
+    sample.tokens = 300
+    metrics.record("embed", 2.0, 2.5, sample)
+    metrics.record("custom", 0.0, 1.0, Sample())
+
+    stages = metrics.report()["stages"]
+
+    assert list(stages) == ["fetch", "embed", "custom"]
+    assert stages["fetch"]["wall_s"] == 2.0
+    assert stages["fetch"]["busy_s"] == 2.5
+    assert stages["embed"]["items_per_s"] == 20.0
+    assert stages["embed"]["tokens"] == 300
+
+
+def test_measured_calls_are_recorded_in_the_active_run(metrics):
+    @measured("parse")
+    def parse(html):
+        return ["a", "b"]
+
+    parse("<p>héllo</p>")
+    with measure("write", items=3) as sample:
+        sample.bytes = 10
+
+    stages = metrics.report()["stages"]
+    assert stages["parse"]["items"] == 2
+    assert stages["parse"]["bytes"] == len("<p>héllo</p>".encode("utf-8"))
+    assert stages["write"]["items"] == 3
+    assert stages["write"]["bytes"] == 10
+
+
+def test_measure_works_without_an_active_run():
+    assert active_metrics() is None
+    with measure("write") as sample:
+        sample.bytes = 10
+    assert sample.bytes == 10
+
+
+def test_finish_writes_a_report_compared_with_the_previous_run(metrics, tmp_path, capsys):
+    metrics.record("fetch", 0.0, 1.0, Sample())
+    metrics.finish(str(tmp_path), sync={"new": 1})
+    later = RunMetrics("refresh_test", "fedcba9876543210")
+    later.started_at = metrics.started_at + 1
+    later.record("fetch", 0.0, 2.0, Sample())
+
+    report = later.finish(str(tmp_path))
+
+    assert latest_report("refresh_test", str(tmp_path)) == json.loads(json.dumps(report))
+    assert "(+100% wall vs previous run)" in capsys.readouterr().out
+    assert len(list(tmp_path.iterdir())) == 2
@@ -0,0 +1,71 @@
+# tests/test_parquet_store.py
+
+import uuid
+
+import pytest
+
+chromadb = pytest.importorskip("chromadb")
+pytest.importorskip("pyarrow")
+
+from src.corpus.parquet_store import (  # noqa: E402
+    changelogs_per_company_month,
+    collections_to_table,
+    embedding_matrix,
+    iter_models,
+    open_corpus,
+    write_corpus,
+)
+from src.loaders.models.models import ChangeLog, CodeAssistantCompany, DocsPage  # noqa: E402
+
+
+@pytest.fixture
+def client():
+    return chromadb.EphemeralClient()
+
+
+def create(client):
+    return client.create_collection(name=f"test-{uuid.uuid4().hex[:8]}")
+
+
+def test_shards_export_into_one_corpus(client, tmp_path):
+    changelogs, docs, empty = create(client), create(client), create(client)
+    changelogs.add(
+        ids=["cursor-1", "cursor-2"],
+        documents=["Added tabs", "Fixed tabs"],
+        embeddings=[[1.0, 0.0], [0.0, 1.0]],
+        metadatas=[
+            {"company": "Cursor_Enterprise", "doc_type": "changelog", "version": "1.0",
+             "date": "January 5, 2025"},
+            {"company": "Cursor_Enterprise", "doc_type": "changelog", "version": "1.1",
+             "date": "2025-01-20"},
+        ],
+    )
+    docs.add(
+        ids=["docs-1"],
+        documents=["How to index a repo"],
+        embeddings=[[0.5, 0.5]],
+        metadatas=[
+            {"company": "Codeium_Enterprise", "doc_type": "docs_page", "title": "Indexing",
+             "url": "https://example.com/indexing"}
+        ],
+    )
+
+    table = collections_to_table([changelogs, empty, docs], include_embeddings=True)
+    write_corpus(table, str(tmp_path / "corpus"))
+    corpus = open_corpus(str(tmp_path / "corpus"))
+
+    assert sorted(corpus.to_table()["id"].to_pylist()) == ["cursor-1", "cursor-2", "docs-1"]
+    assert embedding_matrix(table).shape == (3, 2)
+    assert changelogs_per_company_month(corpus).to_pylist() == [
+        {"company": "Cursor_Enterprise", "month": "2025-01", "month_count": 2}
+    ]
+    models = {model.unique_id: model for model in iter_models(corpus)}
+    assert models["cursor-2"] == ChangeLog(
+        version="1.1", date="2025-01-20", changes="Fixed tabs",
+        company=CodeAssistantCompany.CURSOR_ENTERPRISE, unique_id="cursor-2",
+    )
+    assert isinstance(models["docs-1"], DocsPage)
+
+
+def test_no_stored_documents_export_an_empty_table(client):
+    assert collections_to_table([create(client)], include_embeddings=True).num_rows == 0
@@ -0,0 +1,111 @@
+# tests/test_quantized.py
+
+import threading
+import time
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("pydantic")
+
+from src.vector_store import quantized  # noqa: E402
+from src.vector_store.quantized import QuantizedIndex  # noqa: E402
+
+
+class FakeCollection:
+    """
+    The parts of a Chroma collection the quantized index reads.
+    """
+
+    name = "fake"
+    metadata = {"last_update_date": "2025-01-01T00:00:00"}
+
+    def __init__(self, vectors):
+        self.ids = [str(i) for i in range(len(vectors))]
+        self.vectors = vectors
+
+    def get(self, ids=None, include=(), limit=None, offset=0):
+        if ids is None:
+            rows = list(range(offset, min(offset + (limit or len(self.ids)), len(self.ids))))
+        else:
+            rows = [int(id_) for id_ in ids]
+        return {
+            "ids": [self.ids[row] for row in rows],
+            "documents": [f"document {row}" for row in rows],
+            "metadatas": [{"company": "Cursor", "doc_type": "changelog"} for _ in rows],
+            "embeddings": [self.vectors[row] for row in rows],
+        }
+
+
+@pytest.mark.parametrize("mode", ["int8", "binary"])
+def test_search_returns_the_nearest_vector(monkeypatch, mode):
+    vectors = np.random.default_rng(0).normal(size=(200, 32)).astype(np.float32)
+    monkeypatch.setattr(quantized, "stored_collections", lambda: [FakeCollection(vectors)])
+
+    index = QuantizedIndex(None, mode=mode, rescore_factor=20, index_dir=None)
+    assert index.load() == 200
+    hits = index.search(vectors[7], n_results=3)
+
+    assert hits[0]["id"] == "7"
+    assert hits[0]["distance"] == pytest.approx(0.0, abs=1e-5)
+    assert index.stats["queries"] == 1
+
+
+def test_concurrent_queries_reload_once(monkeypatch):
+    vectors = np.random.default_rng(0).normal(size=(50, 16)).astype(np.float32)
+    collection = FakeCollection(vectors)
+    monkeypatch.setattr(quantized, "stored_collections", lambda: [collection])
+    index = QuantizedIndex(None, rescore_factor=5, index_dir=None, reload_interval=0)
+    index.load()
+    loads = []
+    original_load = index.load
+
+    def load():
+        loads.append(1)
+        time.sleep(0.05)
+        return original_load()
+
+    monkeypatch.setattr(index, "load", load)
+    collection.metadata = {"last_update_date": "2025-01-02T00:00:00"}
+    barrier = threading.Barrier(8)
+    found = []
+
+    def query():
+        barrier.wait()
+        index._maybe_reload()
+        found.append(index.search(vectors[3], 1)[0]["id"])
+
+    threads = [threading.Thread(target=query) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(loads) == 1
+    assert found == ["3"] * 8
+    assert index.stats["queries"] == 8
+
+
+def test_saved_codes_are_reused_until_the_store_changes(monkeypatch, tmp_path):
+    vectors = np.random.default_rng(0).normal(size=(40, 16)).astype(np.float32)
+    collection = FakeCollection(vectors)
+    monkeypatch.setattr(quantized, "stored_collections", lambda: [collection])
+    QuantizedIndex(None, rescore_factor=5, index_dir=str(tmp_path)).load()
+
+    reads = []
+    get = collection.get
+    collection.get = lambda **kwargs: reads.append(kwargs) or get(**kwargs)
+    index = QuantizedIndex(None, rescore_factor=5, index_dir=str(tmp_path))
+    assert index.load() == 40
+    assert reads == []
+    assert index.search(vectors[3], 1)[0]["id"] == "3"
+
+    # A refresh replaced the vectors and bumped last_update_date.
+    collection.vectors = -vectors
+    collection.metadata = {"last_update_date": "2025-01-02T00:00:00"}
+    reloaded = QuantizedIndex(None, rescore_factor=5, index_dir=str(tmp_path))
+    assert reloaded.load() == 40
+    assert any("limit" in kwargs for kwargs in reads)
+    hit = reloaded.search(-vectors[5], 1)[0]
+    assert hit["id"] == "5"
+    assert hit["distance"] == pytest.approx(0.0, abs=1e-5)
@@ -0,0 +1,87 @@
+# tests/test_query_cache.py
+
+import uuid
+
+import pytest
+
+chromadb = pytest.importorskip("chromadb")
+
+from src.vector_store import query_cache  # noqa: E402
+from src.vector_store.query_cache import QueryCache, cache_key  # noqa: E402
+from src.vector_store.store import bump_last_update_date  # noqa: E402
+
+
+class Marker:
+    def __init__(self):
+        self.value = 0
+
+    def __call__(self):
+        return self.value
+
+
+def lookup(cache, query, hits):
+    return cache.get_or_compute(query, 3, None, None, lambda: hits)
+
+
+def test_similar_queries_share_an_entry():
+    assert cache_key("Latest  Cursor version?", 3, ["b", "a"]) == cache_key(
+        "latest cursor version", 3, ["a", "b"]
+    )
+    cache = QueryCache(marker=Marker())
+
+    lookup(cache, "Latest Cursor version?", ["hit"])
+
+    assert lookup(cache, "latest cursor version", ["other"]) == ["hit"]
+    assert cache.stats()["hits"] == 1
+
+
+def test_entries_expire_and_the_least_recently_used_are_evicted():
+    cache = QueryCache(max_entries=2, ttl=0, marker=Marker())
+    lookup(cache, "a", ["a"])
+    assert lookup(cache, "a", ["a2"]) == ["a2"]
+    assert cache.stats()["expired"] == 1
+
+    cache = QueryCache(max_entries=2, marker=Marker())
+    for query in ["a", "b", "a", "c"]:
+        lookup(cache, query, [query])
+
+    assert cache.stats()["evictions"] == 1
+    assert lookup(cache, "a", ["a2"]) == ["a"]
+    assert lookup(cache, "b", ["b2"]) == ["b2"]
+
+
+def test_a_refresh_drops_every_entry():
+    marker = Marker()
+    cache = QueryCache(check_interval=0, marker=marker)
+    lookup(cache, "a", ["old"])
+
+    marker.value += 1
+
+    assert lookup(cache, "a", ["new"]) == ["new"]
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_results_computed_across_a_refresh_are_not_cached():
+    marker = Marker()
+    cache = QueryCache(check_interval=0, marker=marker)
+
+    def compute():
+        marker.value += 1
+        cache.get(cache_key("other", 3))
+        return ["stale"]
+
+    cache.get_or_compute("a", 3, None, None, compute)
+
+    assert lookup(cache, "a", ["fresh"]) == ["fresh"]
+
+
+def test_bumping_a_collection_changes_the_store_marker(monkeypatch):
+    collection = chromadb.EphemeralClient().create_collection(
+        name=f"test-{uuid.uuid4().hex[:8]}"
+    )
+    monkeypatch.setattr(query_cache, "stored_collections", lambda: [collection])
+    before = query_cache.store_marker()
+
+    bump_last_update_date(collection)
+
+    assert query_cache.store_marker() != before
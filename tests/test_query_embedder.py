@@ -0,0 +1,68 @@
+# tests/test_query_embedder.py
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+pytest.importorskip("chromadb")
+
+from src.embeddings.query_embedder import QueryEmbedder  # noqa: E402
+
+
+class SlowEmbeddingFunction:
+    def __init__(self, delay: float = 0.05):
+        self.delay = delay
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def __call__(self, input):
+        with self._lock:
+            self.calls.append(list(input))
+        time.sleep(self.delay)
+        return [[float(len(text)), 1.0] for text in input]
+
+
+def test_concurrent_queries_are_coalesced_into_one_batch():
+    embedding_function = SlowEmbeddingFunction()
+    embedder = QueryEmbedder(embedding_function, window_ms=200, max_batch=64)
+    texts = [f"query {i}" for i in range(8)] * 2
+
+    with ThreadPoolExecutor(max_workers=len(texts)) as executor:
+        vectors = list(executor.map(lambda text: list(embedder([text])[0]), texts))
+
+    assert vectors == [[float(len(text)), 1.0] for text in texts]
+    assert len(embedding_function.calls) == 1
+    assert sorted(embedding_function.calls[0]) == sorted(set(texts))
+    stats = embedder.stats()
+    assert stats["batches"] == 1
+    assert stats["calls"] == len(texts)
+
+    # Repeated queries are served from memory.
+    assert list(embedder(["query 0"])[0]) == [7.0, 1.0]
+    assert len(embedding_function.calls) == 1
+
+
+def test_full_batches_are_sent_without_waiting_for_the_window():
+    embedding_function = SlowEmbeddingFunction(delay=0)
+    embedder = QueryEmbedder(embedding_function, window_ms=10_000, max_batch=4)
+
+    start = time.perf_counter()
+    embedder([f"query {i}" for i in range(4)])
+
+    assert time.perf_counter() - start < 1
+    assert embedder.stats()["batch_sizes"] == {4: 1}
+
+
+def test_latency_samples_are_bounded():
+    embedder = QueryEmbedder(SlowEmbeddingFunction(delay=0), window_ms=0, latency_samples=10)
+
+    for i in range(50):
+        embedder([f"query {i}"])
+
+    stats = embedder.stats()
+    assert len(embedder._latencies) == 10
+    assert len(embedder._batch_latencies) == 10
+    assert stats["calls"] == 50
+    assert sum(stats["latency_ms"].values()) == 50
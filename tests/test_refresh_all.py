@@ -0,0 +1,124 @@
+# tests/test_refresh_all.py
+
+import sqlite3
+
+import pytest
+
+pytest.importorskip("prefect")
+pytest.importorskip("bs4")
+
+from prefect import flow  # noqa: E402
+from prefect.testing.utilities import prefect_test_harness  # noqa: E402
+
+import src.refresh_pipeline.refresh_all as refresh_all_module  # noqa: E402
+from src.loaders.models.models import ChangeLog, CodeAssistantCompany  # noqa: E402
+from src.embeddings.budget import active_budget  # noqa: E402
+from src.refresh_pipeline.checkpoints import CheckpointStore, active_checkpoint  # noqa: E402
+from src.refresh_pipeline.metrics import active_metrics  # noqa: E402
+
+broken = {"down": True}
+
+
+@flow
+def load_changelogs():
+    return [
+        ChangeLog(
+            version="1.0",
+            changes="Added tabs",
+            company=CodeAssistantCompany.CURSOR_ENTERPRISE,
+            unique_id="cursor-1",
+        )
+    ]
+
+
+@flow
+def load_broken():
+    if broken["down"]:
+        raise RuntimeError("site down")
+    return []
+
+
+class FakeEmbeddingFunction:
+    class cache:
+        @staticmethod
+        def stats():
+            return {}
+
+
+@pytest.fixture(scope="module", autouse=True)
+def harness():
+    with prefect_test_harness():
+        yield
+
+
+@pytest.fixture
+def synced(tmp_path, monkeypatch):
+    # Checkpoints, metrics reports and the backlog are written under ./cache and ./reports.
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(
+        refresh_all_module,
+        "SOURCES",
+        {
+            "changelogs": {"loader": load_changelogs, "max_concurrency": 1},
+            "broken": {"loader": load_broken, "max_concurrency": 1},
+        },
+    )
+    monkeypatch.setattr(refresh_all_module, "DIGESTS_ENABLED", False)
+    monkeypatch.setattr(refresh_all_module, "store_count", lambda: 0)
+    monkeypatch.setattr(refresh_all_module, "get_embedding_function", FakeEmbeddingFunction)
+    synced = []
+
+    def sync_records(records, embedding_function):
+        synced.append([record.unique_id for record in records])
+        return {"new": len(records), "changed": 0, "deleted": 0, "duplicates": 0, "deferred": 0}
+
+    monkeypatch.setattr(refresh_all_module, "sync_records", sync_records)
+    broken["down"] = True
+    return synced
+
+
+def test_failed_sources_are_resumed_by_the_next_run(synced):
+    report = refresh_all_module.refresh_all()
+
+    assert report["failed"] == ["broken"]
+    assert report["sources"]["changelogs"]["records"] == 1
+    assert synced == [["cursor-1"]]
+
+    broken["down"] = False
+    report = refresh_all_module.refresh_all()
+
+    assert report["failed"] == []
+    assert list(report["sources"]) == ["broken"]
+    assert synced == [["cursor-1"], []]
+    # The run finished, so the next one starts from scratch.
+    store = CheckpointStore()
+    assert not store.start_run("refresh_all").resumed
+    store.close()
+
+
+def test_a_failed_flow_leaves_no_active_run_state(synced, monkeypatch):
+    def sync_records(records, embedding_function):
+        raise RuntimeError("store down")
+
+    monkeypatch.setattr(refresh_all_module, "sync_records", sync_records)
+    checkpoints = []
+    start_checkpointed_run = refresh_all_module.start_checkpointed_run
+    monkeypatch.setattr(
+        refresh_all_module,
+        "start_checkpointed_run",
+        lambda flow, resume: checkpoints.append(start_checkpointed_run(flow, resume))
+        or checkpoints[-1],
+    )
+
+    with pytest.raises(RuntimeError, match="store down"):
+        refresh_all_module.refresh_all()
+
+    assert active_checkpoint() is None
+    assert active_metrics() is None
+    assert active_budget() is None
+    with pytest.raises(sqlite3.ProgrammingError):
+        checkpoints[0].counts()
+    # The run stays open for the next one to resume.
+    store = CheckpointStore()
+    assert store.start_run("refresh_all").run_id == checkpoints[0].run_id
+    store.close()
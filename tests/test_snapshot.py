@@ -0,0 +1,57 @@
+# tests/test_snapshot.py
+
+import uuid
+
+import pytest
+
+chromadb = pytest.importorskip("chromadb")
+pytest.importorskip("pyarrow")
+
+from src.vector_store.hnsw import current_hnsw_settings  # noqa: E402
+from src.vector_store.snapshot import (  # noqa: E402
+    export_snapshot,
+    import_snapshot,
+    read_snapshot_info,
+)
+from src.vector_store.store import bump_last_update_date  # noqa: E402
+
+
+@pytest.fixture
+def client():
+    return chromadb.EphemeralClient()
+
+
+def test_round_trip_keeps_records_and_distance(client, tmp_path):
+    source = client.create_collection(
+        name=f"test-{uuid.uuid4().hex[:8]}", metadata={"hnsw:space": "cosine"}
+    )
+    source.add(
+        ids=["a", "b"],
+        documents=["first", "second"],
+        metadatas=[{"company": "Cursor"}, None],
+        embeddings=[[1.0, 0.0], [0.0, 1.0]],
+    )
+    bump_last_update_date(source)
+    path = str(tmp_path / "snapshot.arrow")
+
+    name = f"test-{uuid.uuid4().hex[:8]}"
+    assert export_snapshot(source, path, page_size=1) == 2
+    assert import_snapshot(client, path, name) == 2
+
+    restored = client.get_collection(name)
+    assert current_hnsw_settings(restored)["hnsw:space"] == "cosine"
+    assert sorted(restored.get()["ids"]) == ["a", "b"]
+    result = restored.query(query_embeddings=[[2.0, 0.0]], n_results=1)
+    assert result["ids"][0] == ["a"]
+    assert result["distances"][0][0] == pytest.approx(0.0, abs=1e-6)
+
+
+def test_empty_collection_writes_an_empty_snapshot(client, tmp_path):
+    source = client.create_collection(
+        name=f"test-{uuid.uuid4().hex[:8]}", metadata={"embedding_dim": 8}
+    )
+    path = str(tmp_path / "snapshot.arrow")
+
+    assert export_snapshot(source, path) == 0
+    assert read_snapshot_info(path)["embedding_dim"] == 8
+    assert import_snapshot(client, path, f"test-{uuid.uuid4().hex[:8]}") == 0
@@ -0,0 +1,244 @@
+# tests/test_store.py
+
+import threading
+import time
+import uuid
+
+import pytest
+
+chromadb = pytest.importorskip("chromadb")
+
+from src.loaders.models.models import BlogPost, ChangeLog, CodeAssistantCompany  # noqa: E402
+from src.vector_store import routing, store  # noqa: E402
+from src.vector_store.hnsw import (  # noqa: E402
+    current_hnsw_settings,
+    hnsw_metadata,
+    rebuild_collection,
+)
+from src.vector_store.store import bump_last_update_date  # noqa: E402
+
+
+@pytest.fixture
+def client():
+    return chromadb.EphemeralClient()
+
+
+def create(client, metadata):
+    return client.create_collection(name=f"test-{uuid.uuid4().hex[:8]}", metadata=metadata)
+
+
+def test_bump_keeps_the_collection_metadata(client):
+    collection = create(client, {"hnsw:space": "cosine", "hnsw:M": 32, "embedding_dim": 512})
+
+    first = bump_last_update_date(collection)
+    second = bump_last_update_date(client.get_collection(collection.name))
+
+    stored = client.get_collection(collection.name)
+    assert stored.metadata["last_update_date"] == second >= first
+    assert stored.metadata["embedding_dim"] == 512
+    assert current_hnsw_settings(stored)["hnsw:space"] == "cosine"
+    assert current_hnsw_settings(stored)["hnsw:M"] == 32
+
+
+def test_rebuild_after_bump_keeps_the_distance(client):
+    collection = create(client, {"hnsw:space": "cosine"})
+    collection.add(ids=["a", "b"], embeddings=[[1.0, 0.0], [0.5, 0.5]])
+    bump_last_update_date(collection)
+
+    settings = rebuild_collection(client, collection.name, M=24)
+
+    rebuilt = client.get_collection(collection.name)
+    assert settings["hnsw:space"] == "cosine"
+    assert current_hnsw_settings(rebuilt)["hnsw:space"] == "cosine"
+    distances = rebuilt.query(query_embeddings=[[2.0, 0.0]], n_results=1)["distances"]
+    assert distances[0][0] == pytest.approx(0.0, abs=1e-6)
+
+
+def test_replace_collection_bumps_last_update_date(client):
+    collection = create(client, {"last_update_date": "2025-01-01T00:00:00"})
+    collection.add(ids=["a"], embeddings=[[1.0, 0.0]])
+
+    rebuild_collection(client, collection.name, M=24)
+
+    rebuilt = client.get_collection(collection.name)
+    assert rebuilt.metadata["last_update_date"] > "2025-01-01T00:00:00"
+    assert rebuilt.count() == 1
+
+
+def test_shards_keep_the_collection_metadata(client, monkeypatch):
+    collection = create(
+        client, {"hnsw:space": "cosine", "embedding_backend": "local", "embedding_dim": 2}
+    )
+    collection.add(
+        ids=["a"], embeddings=[[1.0, 0.0]], metadatas=[{"company": collection.name}]
+    )
+    bump_last_update_date(collection)
+    monkeypatch.setattr(routing, "get_client", lambda: client)
+    monkeypatch.setattr(routing, "get_collection", lambda: collection)
+
+    counts = routing.migrate_to_shards()
+
+    shard = routing.get_shard(collection.name, "changelog")
+    assert counts == {shard.name: 1}
+    assert shard.metadata["embedding_backend"] == "local"
+    assert shard.metadata["embedding_dim"] == 2
+    assert current_hnsw_settings(shard)["hnsw:space"] == "cosine"
+
+
+def test_queries_reuse_shard_handles(client, monkeypatch):
+    company = f"test-{uuid.uuid4().hex[:8]}"
+    monkeypatch.setattr(routing, "get_client", lambda: client)
+    monkeypatch.setattr(routing, "is_sharded", lambda: True)
+    monkeypatch.setattr(routing, "COMPANIES", [company])
+    monkeypatch.setattr(routing, "DOC_TYPES", ["changelog"])
+    routing.forget_shards()
+    shard = routing.get_shard(company, "changelog", create=True)
+    shard.add(ids=["a", "b"], embeddings=[[1.0, 0.0], [0.0, 1.0]])
+    listed = []
+    list_collections = client.list_collections
+    monkeypatch.setattr(
+        client, "list_collections", lambda: listed.append(1) or list_collections()
+    )
+
+    for _ in range(3):
+        hits = routing.query_store("q", n_results=5, query_embedding=[1.0, 0.0])
+        assert [hit["id"] for hit in hits] == ["a", "b"]
+    assert len(listed) == 1
+
+    # A shard replaced since it was cached is looked up again.
+    client.delete_collection(shard.name)
+    replaced = routing.get_shard(company, "changelog", create=True)
+    replaced.add(ids=["c"], embeddings=[[1.0, 0.0]])
+    hits = routing.query_store("q", n_results=5, query_embedding=[1.0, 0.0])
+    assert [hit["id"] for hit in hits] == ["c"]
+
+
+def test_where_filters_combine_companies_and_doc_types():
+    assert routing.build_where() is None
+    assert routing.build_where(companies=["a"]) == {"company": {"$in": ["a"]}}
+    assert routing.build_where(["a"], ["changelog"]) == {
+        "$and": [{"company": {"$in": ["a"]}}, {"doc_type": {"$in": ["changelog"]}}]
+    }
+
+
+def test_sharded_queries_merge_the_routed_shards(client, monkeypatch):
+    companies = [f"test-{uuid.uuid4().hex[:8]}" for _ in range(2)]
+    monkeypatch.setattr(routing, "get_client", lambda: client)
+    monkeypatch.setattr(routing, "is_sharded", lambda: True)
+    monkeypatch.setattr(routing, "COMPANIES", companies)
+    monkeypatch.setattr(routing, "DOC_TYPES", ["changelog", "docs_page"])
+    routing.forget_shards()
+    for company, ids, embeddings in [
+        (companies[0], ["a1", "a2"], [[1.0, 0.0], [0.6, 0.4]]),
+        (companies[1], ["b1"], [[0.9, 0.1]]),
+    ]:
+        shard = routing.get_shard(company, "changelog", create=True)
+        shard.add(ids=ids, embeddings=embeddings, documents=ids)
+
+    hits = routing.query_store("q", n_results=2, query_embedding=[1.0, 0.0])
+    assert [hit["id"] for hit in hits] == ["a1", "b1"]
+    hits = routing.query_store(
+        "q", n_results=5, companies=[companies[1]], query_embedding=[1.0, 0.0]
+    )
+    assert [hit["id"] for hit in hits] == ["b1"]
+    assert routing.query_store("q", doc_types=["docs_page"], query_embedding=[1.0, 0.0]) == []
+    assert routing.fetch_document("a2")["document"] == "a2"
+    assert routing.fetch_document("missing") is None
+
+
+def test_records_are_routed_to_their_shards(client, monkeypatch):
+    monkeypatch.setattr(routing, "get_client", lambda: client)
+    monkeypatch.setattr(routing, "is_sharded", lambda: True)
+    cursor = CodeAssistantCompany.CURSOR_ENTERPRISE
+    records = [
+        ChangeLog(version="1", changes="a", company=cursor, unique_id="a"),
+        BlogPost(url="u", title="t", content="b", company=cursor, unique_id="b"),
+        ChangeLog(version="2", changes="c", company=cursor, unique_id="c"),
+    ]
+
+    routed = routing.route_records(records, metadata={"embedding_dim": 2})
+
+    assert [
+        (collection.name, [record.unique_id for record in group]) for collection, group in routed
+    ] == [
+        (routing.shard_name("Cursor_Enterprise", "blog_post"), ["b"]),
+        (routing.shard_name("Cursor_Enterprise", "changelog"), ["a", "c"]),
+    ]
+    assert routed[1][0].metadata == {
+        "embedding_dim": 2,
+        "company": "Cursor_Enterprise",
+        "doc_type": "changelog",
+    }
+
+
+def test_rebuild_copies_every_record_and_keeps_unset_parameters(client):
+    collection = create(client, {"hnsw:M": 8, "hnsw:search_ef": 20, "embedding_dim": 2})
+    ids = [str(i) for i in range(7)]
+    collection.add(
+        ids=ids,
+        embeddings=[[float(i), 1.0] for i in range(7)],
+        documents=[f"doc {i}" for i in ids],
+        metadatas=[{"company": "Cursor_Enterprise"}] * 7,
+    )
+    # A staging collection left behind by an interrupted rebuild.
+    client.create_collection(name=f"{collection.name}__rebuild")
+
+    settings = rebuild_collection(client, collection.name, construction_ef=200, page_size=3)
+
+    assert settings == {
+        "hnsw:space": "l2",
+        "hnsw:M": 8,
+        "hnsw:construction_ef": 200,
+        "hnsw:search_ef": 20,
+    }
+    rebuilt = client.get_collection(collection.name)
+    assert rebuilt.metadata["embedding_dim"] == 2
+    stored = rebuilt.get(include=["documents", "metadatas", "embeddings"])
+    assert sorted(stored["ids"]) == ids
+    assert sorted(stored["documents"]) == [f"doc {i}" for i in ids]
+    assert all(metadata == {"company": "Cursor_Enterprise"} for metadata in stored["metadatas"])
+    names = set(client.list_collections())
+    assert f"{collection.name}__rebuild" not in names
+    assert f"{collection.name}__previous" not in names
+
+
+def test_hnsw_metadata_skips_unset_parameters():
+    assert hnsw_metadata(M=32, space="cosine") == {"hnsw:space": "cosine", "hnsw:M": 32}
+
+
+def test_write_lock_serializes_writers(tmp_path, monkeypatch):
+    monkeypatch.setattr(store, "DATA_PATH", str(tmp_path))
+    monkeypatch.setattr(store, "SERVER_HOST", None)
+    events = []
+    first_holds_lock = threading.Event()
+
+    def first():
+        with store.write_lock():
+            events.append("first acquired")
+            first_holds_lock.set()
+            time.sleep(0.2)
+            events.append("first released")
+
+    def second():
+        first_holds_lock.wait()
+        with store.write_lock():
+            events.append("second acquired")
+
+    threads = [threading.Thread(target=first), threading.Thread(target=second)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert events == ["first acquired", "first released", "second acquired"]
+
+
+def test_write_lock_is_a_no_op_in_server_mode(tmp_path, monkeypatch):
+    monkeypatch.setattr(store, "DATA_PATH", str(tmp_path / "data"))
+    monkeypatch.setattr(store, "SERVER_HOST", "localhost")
+
+    with store.write_lock():
+        with store.write_lock():
+            pass
+
+    assert not (tmp_path / "data").exists()
@@ -0,0 +1,24 @@
+# tests/test_synthetic_corpus.py
+
+from collections import Counter
+
+from src.benchmarks.synthetic_corpus import DOC_TYPE_MIX, synthetic_records
+from src.corpus.records import doc_type_of
+
+
+def test_slices_of_the_corpus_are_the_same_records():
+    whole = list(synthetic_records(300))
+
+    grown = list(synthetic_records(100)) + list(synthetic_records(300, start=100))
+
+    assert grown == whole
+    assert list(synthetic_records(300, seed=1)) != whole
+
+
+def test_records_have_unique_ids_and_follow_the_mix():
+    records = list(synthetic_records(2_000))
+
+    assert len({record.unique_id for record in records}) == len(records)
+    counts = Counter(doc_type_of(record) for record in records)
+    for doc_type, share in DOC_TYPE_MIX.items():
+        assert abs(counts[doc_type] / len(records) - share) < 0.04
@@ -0,0 +1,98 @@
+# tests/test_tiered.py
+
+import threading
+import time
+import uuid
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("pydantic")
+chromadb = pytest.importorskip("chromadb")
+
+from src.vector_store import tiered  # noqa: E402
+from src.vector_store.store import bump_last_update_date  # noqa: E402
+from src.vector_store.tiered import TieredIndex, select_hot_ids  # noqa: E402
+
+
+def test_concurrent_queries_reload_once(monkeypatch):
+    monkeypatch.setattr(tiered, "stored_collections", lambda: [])
+    index = TieredIndex(None, reload_interval=0)
+    loads = []
+
+    def load():
+        loads.append(1)
+        time.sleep(0.05)
+        index._loaded_at = time.monotonic()
+        index._load_marker = []
+
+    index._loaded_at = time.monotonic()
+    index._load_marker = ["stale"]
+    monkeypatch.setattr(index, "load", load)
+    barrier = threading.Barrier(8)
+
+    def query():
+        barrier.wait()
+        index._maybe_reload()
+
+    threads = [threading.Thread(target=query) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(loads) == 1
+
+
+def test_hot_records_are_recent_or_among_the_latest_entries():
+    now = datetime(2025, 6, 1)
+    ids = ["recent", "old", "undated-1", "undated-2", "undated-3", "other"]
+    metadatas = [
+        {"date": "2025-05-01"},
+        {"date": "2020-01-01"},
+        {"company": "Cursor", "index": 1},
+        {"company": "Cursor", "index": 3},
+        {"company": "Cursor", "index": 2},
+        {"company": "Codeium", "index": 1},
+    ]
+
+    hot = select_hot_ids(ids, metadatas, window_days=90, window_entries=2, now=now)
+
+    assert hot == {"recent", "undated-2", "undated-3", "other"}
+
+
+def test_queries_fan_out_only_without_strong_hot_hits(monkeypatch):
+    collection = chromadb.EphemeralClient().create_collection(
+        name=f"test-{uuid.uuid4().hex[:8]}"
+    )
+    today = datetime.now().strftime("%Y-%m-%d")
+    collection.add(
+        ids=["hot", "cold"],
+        embeddings=[[1.0, 0.0], [0.0, 1.0]],
+        documents=["hot", "cold"],
+        metadatas=[{"date": today}, {"date": "2001-01-01"}],
+    )
+    monkeypatch.setattr(tiered, "stored_collections", lambda: [collection])
+    cold_queries = []
+
+    def query_store(query, n_results, companies, doc_types, embedding_function, query_embedding):
+        cold_queries.append(query)
+        return [{"id": "cold", "document": "cold", "metadata": {}, "distance": 0.5}]
+
+    monkeypatch.setattr(tiered, "query_store", query_store)
+    embeddings = {"new": [1.0, 0.0], "old": [0.0, 0.9]}
+    index = TieredIndex(lambda texts: [embeddings[text] for text in texts], max_distance=0.1)
+
+    assert [hit["id"] for hit in index.query("new", n_results=1)] == ["hot"]
+    assert [hit["id"] for hit in index.query("old", n_results=2)] == ["cold", "hot"]
+    assert cold_queries == ["old"]
+    assert index.stats == {"hot_only": 1, "fan_out": 1}
+
+    # A refresh adds a recent record; the hot tier picks it up on its next check.
+    collection.add(
+        ids=["newer"], embeddings=[[0.0, 0.9]], documents=["newer"], metadatas=[{"date": today}]
+    )
+    bump_last_update_date(collection)
+    index.reload_interval = 0
+
+    assert [hit["id"] for hit in index.query("old", n_results=1)] == ["newer"]
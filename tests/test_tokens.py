@@ -0,0 +1,26 @@
+# tests/test_tokens.py
+
+import pytest
+
+from src.embeddings import tokens
+from src.embeddings.tokens import EstimatedEncoding, count_tokens, truncate_to_tokens
+
+
+@pytest.fixture
+def estimate(monkeypatch):
+    monkeypatch.setattr(tokens, "TOKENIZER", "estimate")
+    tokens.get_encoding.cache_clear()
+    yield
+    tokens.get_encoding.cache_clear()
+
+
+def test_estimated_encoding_round_trips():
+    text = "Cursor 0.45 added MCP_support!\n\n  def f(x): return x**2  # ünïcode"
+    encoding = EstimatedEncoding()
+
+    assert encoding.decode(encoding.encode(text)) == text
+
+
+def test_token_counts_work_offline(estimate):
+    assert count_tokens("Hello, world!") == 4
+    assert truncate_to_tokens("one two three four", 2) == "one two"